@@ -1,18 +1,72 @@
 """
 Интерактивный скрипт для быстрого добавления нового проекта в портфолио
+
+С `--import` добавляет проекты пакетно из CSV, JSON или NDJSON (в том числе
+из файлов export_projects.py) без вопросов. Каждая строка проверяется теми
+же правилами, что и validate_projects.py; папки проектов создаются пулом
+потоков, info.json пишется через временный файл и переименование. Проекты,
+которые уже есть в папке или повторяются в импорте, попадают в отчет о
+конфликтах (`--on-conflict overwrite` — перезаписать существующие).
+
+Примеры:
+    python add_project.py
+    python add_project.py --import projects.csv
+    python add_project.py --import export.ndjson --on-conflict overwrite --jobs 16
+    python add_project.py --import projects.json --dry-run
 """
 
+import argparse
+import csv
 import os
+import re
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from projectpack import configured_pack
+from validate_projects import validate_data
+
 # Исправление кодировки для Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
-def create_project():
+IMPORT_FORMATS = {'.csv': 'csv', '.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+# ID проекта — имя папки: без разделителей пути и точки в начале
+PROJECT_ID_RE = re.compile(r'^\w[\w.-]*$')
+
+# Числовые колонки CSV (в JSON они уже числа)
+INT_FIELDS = ('stars', 'forks')
+
+# Сколько конфликтов и ошибок показывать в отчете (остальные — числом)
+REPORT_LIMIT = 20
+
+
+def normalize_id(value):
+    """ID проекта из ввода: нижний регистр, пробелы -> дефисы"""
+    return str(value).strip().lower().replace(' ', '-')
+
+
+def normalize_tags(value):
+    """Теги из списка или строки через запятую: нижний регистр, без пустых"""
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list):
+        return value
+    return [str(tag).strip().lower() for tag in value if str(tag).strip()]
+
+
+def normalize_link(link):
+    """Ссылка на GitHub: `owner/repo` -> полный адрес"""
+    link = link.strip()
+    if link and not link.startswith('http'):
+        link = f"https://github.com/{link}"
+    return link
+
+
+def create_project(projects_dir='projects'):
     """Создание нового проекта через интерактивный ввод"""
     
     print("=" * 60)
@@ -25,15 +79,14 @@ def create_project():
     
     # ID проекта (название папки)
     while True:
-        project_id = input("ID проекта (латиница, дефисы): ").strip().lower()
-        project_id = project_id.replace(' ', '-')
+        project_id = normalize_id(input("ID проекта (латиница, дефисы): "))
         
         if not project_id:
             print("❌ ID не может быть пустым!")
             continue
         
         # Проверяем, не существует ли уже такой проект
-        project_path = Path('projects') / project_id
+        project_path = Path(projects_dir) / project_id
         if project_path.exists():
             print(f"❌ Проект с ID '{project_id}' уже существует!")
             continue
@@ -52,16 +105,13 @@ def create_project():
     
     # Теги
     print("\nТеги (через запятую, например: python,flask,api):")
-    tags_input = input("Теги: ").strip()
-    tags = [tag.strip().lower() for tag in tags_input.split(',') if tag.strip()]
+    tags = normalize_tags(input("Теги: "))
     
     if not tags:
         tags = ["python"]
     
     # Ссылка на GitHub
-    link = input("\nСсылка на GitHub (оставьте пустым если нет): ").strip()
-    if link and not link.startswith('http'):
-        link = f"https://github.com/{link}"
+    link = normalize_link(input("\nСсылка на GitHub (оставьте пустым если нет): "))
     
     # Создаем данные проекта
     project_data = {
@@ -95,31 +145,243 @@ def create_project():
     return True
 
 
-def main():
+def detect_format(path, explicit=None):
+    """Формат файла импорта: явно заданный или по расширению"""
+    if explicit:
+        return explicit
+    fmt = IMPORT_FORMATS.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"{path}: неизвестный формат, укажите --format (csv, json, ndjson)")
+    return fmt
+
+
+def read_rows(path, fmt):
+    """
+    Строки файла импорта: (место в файле, dict или текст ошибки)
+
+    JSON — список объектов или объект с ключом `projects`; NDJSON — объект на
+    строку; CSV — заголовок с колонками id, name, description, tags, link.
+    """
+    name = Path(path).name
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield f"{name}:{line}", row
+        elif fmt == 'ndjson':
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    yield f"{name}:{line}", json.loads(text)
+                except json.JSONDecodeError as e:
+                    yield f"{name}:{line}", f"Ошибка JSON: {e}"
+        else:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                yield name, f"Ошибка JSON: {e}"
+                return
+            if isinstance(data, dict):
+                data = data.get('projects')
+            if not isinstance(data, list):
+                yield name, "Ожидался список проектов или объект с ключом 'projects'"
+                return
+            for number, row in enumerate(data, start=1):
+                yield f"{name}[{number}]", row
+
+
+def project_from_row(row, fmt):
+    """
+    ID и содержимое info.json из строки импорта
+
+    Поля из JSON сохраняются как есть (кроме id), из CSV — непустые колонки;
+    теги и ссылка нормализуются так же, как при интерактивном вводе.
+
+    Returns:
+        Tuple[str, dict]: (ID проекта, данные)
+
+    Raises:
+        ValueError: строку нельзя превратить в проект
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Строка должна быть объектом")
+    data = {key: value for key, value in row.items() if key and key != 'id'}
+    if fmt == 'csv':
+        data = {key: value.strip() for key, value in data.items() if isinstance(value, str) and value.strip()}
+        for field in INT_FIELDS:
+            if field in data:
+                try:
+                    data[field] = int(data[field])
+                except ValueError:
+                    raise ValueError(f"Поле '{field}' должно быть целым числом") from None
+
+    project_id = normalize_id(row.get('id') or data.get('name') or '')
+    if not PROJECT_ID_RE.match(project_id):
+        raise ValueError(f"Некорректный ID проекта: {project_id!r}")
+    if 'name' not in data:
+        data['name'] = project_id.replace('-', ' ').title()
+    if 'tags' in data:
+        data['tags'] = normalize_tags(data['tags'])
+    if isinstance(data.get('link'), str):
+        data['link'] = normalize_link(data['link'])
+    elif fmt == 'csv':
+        data['link'] = ''
+    return project_id, data
+
+
+def write_project(project_path, data):
+    """Запись info.json через временный файл и переименование"""
+    project_path.mkdir(parents=True, exist_ok=True)
+    info_file = project_path / 'info.json'
+    tmp_file = project_path / 'info.json.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, info_file)
+
+
+def import_projects(paths, projects_dir='projects', fmt=None, on_conflict='skip', jobs=0, dry_run=False):
+    """
+    Пакетный импорт проектов из файлов
+
+    Returns:
+        dict: created, overwritten — списки ID; conflicts, invalid, failed —
+            списки (место в файле или ID, ID, сообщение); total — строк прочитано
+    """
+    projects_dir = Path(projects_dir)
+    # Один проход по папке вместо проверки существования на каждую строку
+    existing = {entry.name for entry in os.scandir(projects_dir) if entry.is_dir()} if projects_dir.exists() else set()
+    summary = {'total': 0, 'created': [], 'overwritten': [], 'conflicts': [], 'invalid': [], 'failed': []}
+    pending = {}
+
+    for path in paths:
+        path_format = detect_format(path, fmt)
+        for location, row in read_rows(path, path_format):
+            summary['total'] += 1
+            if isinstance(row, str):
+                summary['invalid'].append((location, None, row))
+                continue
+            try:
+                project_id, data = project_from_row(row, path_format)
+            except ValueError as e:
+                summary['invalid'].append((location, None, str(e)))
+                continue
+            is_valid, message = validate_data(data)
+            if not is_valid:
+                summary['invalid'].append((location, project_id, message))
+            elif project_id in pending:
+                summary['conflicts'].append((location, project_id, f"повторяется в импорте ({pending[project_id][0]})"))
+            elif project_id in existing and on_conflict != 'overwrite':
+                summary['conflicts'].append((location, project_id, "проект уже существует"))
+            else:
+                pending[project_id] = (location, data)
+
+    if dry_run:
+        for project_id in pending:
+            summary['overwritten' if project_id in existing else 'created'].append(project_id)
+        return summary
+
+    def write(item):
+        project_id, (location, data) = item
+        try:
+            write_project(projects_dir / project_id, data)
+        except OSError as e:
+            return project_id, location, str(e)
+        return project_id, location, None
+
+    # Создание папок и запись файлов — ввод-вывод: хватает потоков
+    with ThreadPoolExecutor(max(jobs or min(32, (os.cpu_count() or 1) * 4), 1)) as pool:
+        for project_id, location, error in pool.map(write, pending.items(), chunksize=64):
+            if error:
+                summary['failed'].append((location, project_id, error))
+            else:
+                summary['overwritten' if project_id in existing else 'created'].append(project_id)
+    return summary
+
+
+def print_problems(title, problems):
+    """Список конфликтов или ошибок, не больше REPORT_LIMIT строк"""
+    if not problems:
+        return
+    print(f"\n{title}:")
+    for location, project_id, message in problems[:REPORT_LIMIT]:
+        print(f"   {location}" + (f" ({project_id})" if project_id else '') + f": {message}")
+    if len(problems) > REPORT_LIMIT:
+        print(f"   ... и еще {len(problems) - REPORT_LIMIT}")
+
+
+def run_import(args):
+    """Пакетный импорт с итоговым отчетом; код возврата 1 при ошибках"""
+    print("=" * 70)
+    print("  Импорт проектов в портфолио" + (" (пробный запуск)" if args.dry_run else ""))
+    print("=" * 70)
+    print()
+
+    for path in args.import_files:
+        if not Path(path).is_file():
+            print(f"❌ Файл '{path}' не найден!")
+            return 1
+    try:
+        summary = import_projects(args.import_files, args.projects_dir, args.format,
+                                  args.on_conflict, args.jobs, args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_problems("⚠️  Конфликты", summary['conflicts'])
+    print_problems("❌ Не прошли проверку", summary['invalid'])
+    print_problems("❌ Ошибки записи", summary['failed'])
+
+    print()
+    print("=" * 70)
+    print(f"  📥 Строк прочитано: {summary['total']}")
+    print(f"  ✅ {'Будет создано' if args.dry_run else 'Создано'}: {len(summary['created'])}, "
+          f"{'будет перезаписано' if args.dry_run else 'перезаписано'}: {len(summary['overwritten'])}")
+    print(f"  ⚠️  Конфликтов: {len(summary['conflicts'])}")
+    print(f"  ❌ Невалидных: {len(summary['invalid'])}, ошибок записи: {len(summary['failed'])}")
+    print("=" * 70)
+
+    pack_path = configured_pack()
+    if not args.dry_run and (summary['created'] or summary['overwritten']) and pack_path and Path(pack_path).exists():
+        print(f"\n💡 {pack_path} устарел: пересоберите его командой python projectpack.py build")
+    return 1 if summary['invalid'] or summary['failed'] else 0
+
+
+def main(argv=None):
     """Главная функция"""
+    parser = argparse.ArgumentParser(description='Добавление проектов в портфолио PortfolioHub')
+    parser.add_argument('--import', dest='import_files', nargs='+', metavar='FILE',
+                        help='Пакетный импорт из CSV, JSON или NDJSON')
+    parser.add_argument('--format', choices=sorted(set(IMPORT_FORMATS.values())),
+                        help='Формат файлов импорта (по умолчанию — по расширению)')
+    parser.add_argument('--projects-dir', default='projects', help='Папка с проектами')
+    parser.add_argument('--on-conflict', choices=['skip', 'overwrite'], default='skip',
+                        help='Что делать с уже существующими проектами (по умолчанию skip)')
+    parser.add_argument('--jobs', type=int, default=0, help='Потоков записи (по умолчанию — по числу ядер)')
+    parser.add_argument('--dry-run', action='store_true', help='Только проверить, ничего не записывая')
+    args = parser.parse_args(argv)
+    
+    if args.import_files:
+        return run_import(args)
     
     # Проверяем наличие папки projects
-    projects_dir = Path('projects')
+    projects_dir = Path(args.projects_dir)
     if not projects_dir.exists():
         projects_dir.mkdir(parents=True, exist_ok=True)
     
-    # Создаем проект
-    success = create_project()
-    
-    # Предлагаем добавить еще один проект
-    if success:
+    # Создаем проекты, пока пользователь не откажется
+    while create_project(projects_dir):
         print("\n" + "-" * 60)
         another = input("\nДобавить еще один проект? (y/n): ").strip().lower()
-        if another in ['y', 'yes', 'д', 'да']:
-            print()
-            main()
+        if another not in ['y', 'yes', 'д', 'да']:
+            break
+        print()
+    return 0
 
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\n\n[!] Отменено пользователем")
     except Exception as e:
         print(f"\n❌ Неожиданная ошибка: {e}")
-
@@ -1,108 +1,426 @@
 import os
 import json
-import requests
+import hashlib
+import mimetypes
+import operator
+import threading
+import time
+import traceback
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify
+from urllib.parse import quote, urlencode
+from flask import Flask, Response, abort, redirect, render_template, request, jsonify, send_from_directory, url_for
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+import assets
+from broadcast import Broadcast
+from changelog import Changelog
 from config import Config
+from history import DAY, HistoryStore
+from jobs import JobQueue
+from projectpack import open_pack
+from project_index import ProjectIndex
+from query import QueryError
+from suggest import SUGGEST_ORDERS, SuggestIndex
+from webhooks import RepoChange, is_stale, parse_event, verify_signature
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Скомпилированные шаблоны сохраняются на диск: новые процессы и воркеры
+# загружают байткод вместо повторной компиляции
+if app.config['JINJA_CACHE_DIR']:
+    try:
+        os.makedirs(app.config['JINJA_CACHE_DIR'], exist_ok=True)
+        app.jinja_options = {
+            **app.jinja_options,
+            'bytecode_cache': FileSystemBytecodeCache(app.config['JINJA_CACHE_DIR'])
+        }
+    except OSError as e:
+        print(f"Кэш байткода шаблонов отключен: {e}")
+
 # Простое кэширование в памяти
 _cache = {
-    'github_repos': None,
-    'github_repos_timestamp': None,
+    'github_repos': None,  # Объединенный список со всех источников GitHub
+    'github_repos_sources': None,  # Набор источников, для которого он собран
+    'github_sources': None,  # Источник -> {'pages', 'projects', 'timestamp'}
     'local_projects': None,
     'local_projects_timestamp': None
 }
 
+# Объединенный набор проектов. Поколение (generation) увеличивается каждый раз,
+# когда меняется содержимое набора, и служит ключом для производных кэшей
+_data = {
+    'github_repos': None,
+    'local_projects': None,
+    'projects': None,
+    'generation': 0,
+    'fingerprint': None,
+    'updated_at': None
+}
+_data_lock = threading.Lock()
 
-def get_github_repos():
-    """Получение всех публичных репозиториев с GitHub"""
-    # Проверяем кэш
-    if _cache['github_repos'] and _cache['github_repos_timestamp']:
-        cache_age = datetime.now() - _cache['github_repos_timestamp']
-        if cache_age < timedelta(seconds=app.config['CACHE_TIMEOUT']):
-            return _cache['github_repos']
+# Журнал изменений по поколениям для /api/projects/changes
+changelog = Changelog(limit=app.config['CHANGELOG_LIMIT'])
+
+# Рассылка изменений подписчикам /api/events (создается при первом подписчике)
+_events = {
+    'hub': None
+}
+_events_lock = threading.Lock()
+# Если изменений больше, ID в событие не попадают: клиент заберет их через /api/projects/changes
+EVENT_IDS_LIMIT = 100
+
+# Готовые документы sitemap для текущего поколения данных
+_sitemap = {
+    'generation': None,
+    'documents': None,
+    'etag': None
+}
+_sitemap_lock = threading.Lock()
+
+# Индекс проектов (битовые множества, порядки сортировки) и бандл для браузера
+_index = {
+    'generation': None,
+    'index': None,
+    'version': None,
+    'bundle': None,
+    'suggest': None
+}
+_index_lock = threading.Lock()
+
+# Отрендеренные карточки проектов: by_hash — хеш содержимого проекта -> HTML,
+# by_id — id проекта -> (объект проекта, HTML) для текущего поколения данных,
+# blocks — собранные списки карточек (ключ — кортеж id) для частых страниц
+_cards = {
+    'template': None,
+    'generation': None,
+    'by_id': {},
+    'by_hash': {},
+    'previous': {},
+    'blocks': OrderedDict()
+}
+CARD_BLOCKS_LIMIT = 16
+_cards_lock = threading.Lock()
+
+# Манифест собранной статики (assets.py); перечитывается при изменении файла
+_assets = {
+    'mtime': None,
+    'manifest': {}
+}
+# Предварительно сжатые варианты в порядке предпочтения: (Content-Encoding, суффикс)
+ASSET_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+ASSET_MAX_AGE = 31536000
+
+# Фоновые задачи (генерация отчетов)
+job_queue = JobQueue(workers=1)
+
+# Асинхронный клиент GitHub API (создается при первом запросе)
+_github = {
+    'client': None,
+    'settings': None
+}
+_github_lock = threading.Lock()
+_github_refresh_lock = threading.Lock()
+
+# Команды для всех воркеров (broadcast.py): /api/refresh и вебхуки GitHub
+# (ключ — ID доставки, повторная доставка в любой воркер не применяется).
+# results — итоги последних команд в этом процессе по номеру команды
+_broadcast = {
+    'bus': None,
+    'path': None,
+    'results': OrderedDict()
+}
+_broadcast_lock = threading.Lock()
+_broadcast_apply_lock = threading.Lock()
+BROADCAST_RESULTS_LIMIT = 64
+
+# История звезд и форков (создается при первой записи или запросе).
+# compaction — False в мастере gunicorn до fork (serve.py): поток сжатия,
+# запущенный там, не перешел бы в воркеры, а его блокировки — перешли бы
+_history = {
+    'store': None,
+    'path': None,
+    'generation': 0,
+    'compaction': True
+}
+_history_lock = threading.Lock()
+_history_record_lock = threading.Lock()
+HISTORY_LIMIT = 100
+
+# Состояние прогрева кэшей при старте
+_warmup = {
+    'enabled': False,
+    'ready': threading.Event(),
+    'duration': None,
+    'error': None
+}
+
+
+def _repo_to_project(repo):
+    """Преобразование репозитория из ответа GitHub API в проект портфолио"""
+    # Определяем основной язык для тегов
+    languages = []
+    if repo.get('language'):
+        languages.append(repo['language'].lower())
     
-    repos = []
-    username = app.config['GITHUB_USERNAME']
-    token = app.config['GITHUB_TOKEN']
+    # Дополнительные языки есть, только если включен GITHUB_FETCH_LANGUAGES
+    for language in repo.get('languages', []):
+        if language.lower() not in languages:
+            languages.append(language.lower())
+    
+    # Добавляем топики как теги
+    topics = repo.get('topics', [])
+    all_tags = list(set(languages + topics))
+    
+    return {
+        'id': repo['name'],
+        'name': repo['name'].replace('-', ' ').replace('_', ' ').title(),
+        'description': repo.get('description') or 'No description provided',
+        'tags': all_tags[:10],  # Ограничиваем до 10 тегов
+        'link': repo['html_url'],
+        'stars': repo.get('stargazers_count', 0),
+        'forks': repo.get('forks_count', 0),
+        'language': repo.get('language'),
+        'updated_at': repo.get('updated_at'),
+        'created_at': repo.get('created_at'),
+        'is_fork': repo.get('fork', False),
+        'homepage': repo.get('homepage'),
+        'source': 'github'
+    }
+
+
+def get_github_client():
+    """Клиент GitHub API для текущих настроек (пересоздается при их изменении)"""
+    from github_client import GitHubClient, run
+    
+    settings = (app.config['GITHUB_API_URL'], app.config['GITHUB_TOKEN'],
+                app.config['GITHUB_CONCURRENCY'], app.config['GITHUB_TIMEOUT'])
+    with _github_lock:
+        if _github['settings'] != settings:
+            if _github['client'] is not None:
+                run(_github['client'].close())
+            _github['client'] = GitHubClient(*settings)
+            _github['settings'] = settings
+        return _github['client']
+
+
+def close_github_client():
+    """Закрытие соединений клиента GitHub (например, перед fork воркеров)"""
+    with _github_lock:
+        if _github['client'] is not None:
+            from github_client import run
+            run(_github['client'].close())
+
+
+def get_github_sources():
+    """Источники репозиториев GitHub (по умолчанию — пользователь GITHUB_USERNAME)"""
+    from github_client import parse_sources
+    
+    spec = app.config['GITHUB_SOURCES'] or f"user:{app.config['GITHUB_USERNAME']}"
+    return parse_sources(spec, app.config['CACHE_TIMEOUT'])
+
+
+def _stale_sources(sources, entries):
+    """Источники без кэша или с истекшим TTL"""
+    now = datetime.now()
+    return [
+        source for source in sources
+        if source not in entries or now - entries[source]['timestamp'] >= timedelta(seconds=source.ttl)
+    ]
+
+
+def _refresh_github_sources(stale, entries):
+    """
+    Параллельная загрузка устаревших источников в entries
     
-    headers = {'Accept': 'application/vnd.github.v3+json'}
-    if token:
-        headers['Authorization'] = f'token {token}'
+    Returns:
+        bool: изменился ли состав репозиториев хотя бы одного источника
+    """
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+    from github_client import GitHubError, run
     
+    budget = app.config['GITHUB_BUDGET']
+    previous = {source: entries[source]['pages'] for source in stale if source in entries}
     try:
-        # Получаем все репозитории пользователя
-        url = f"{app.config['GITHUB_API_URL']}/users/{username}/repos"
-        params = {
-            'type': 'public',
-            'sort': 'updated',
-            'per_page': 100
-        }
+        # Все источники, страницы (и языки) загружаются параллельно в рамках общего бюджета
+        results = run(
+            get_github_client().fetch_sources(
+                stale, previous, languages=app.config['GITHUB_FETCH_LANGUAGES'], budget=budget
+            ),
+            timeout=budget + 5
+        )
+    except FutureTimeoutError:
+        results = [GitHubError(f"Загрузка не уложилась в {budget} с")] * len(stale)
+    
+    now = datetime.now()
+    changed = False
+    for source, result in zip(stale, results):
+        entry = entries.get(source)
+        if isinstance(result, GitHubError):
+            print(f"Ошибка при получении репозиториев GitHub ({source}): {result}")
+            # Источник остается с прежними данными (или пустым) и повторяется
+            # не раньше чем через GITHUB_RETRY_AFTER, не задерживая каждый запрос
+            retry_after = min(app.config['GITHUB_RETRY_AFTER'], source.ttl)
+            entries[source] = {
+                'pages': entry['pages'] if entry else [],
+                'projects': entry['projects'] if entry else {},
+                'timestamp': now - timedelta(seconds=source.ttl - retry_after)
+            }
+            continue
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
+        # Все страницы пришли как 304 — проекты источника остаются прежними
+        if entry and len(result) == len(entry['pages']) and all(
+                new[1] is old[1] for new, old in zip(result, entry['pages'])):
+            projects = entry['projects']
+        else:
+            projects = {
+                repo.get('full_name') or repo['name']: _repo_to_project(repo)
+                for repo in source.select(result)
+            }
+            changed = True
+        entries[source] = {'pages': result, 'projects': projects, 'timestamp': now}
+    return changed
+
+
+def _merge_github_sources(sources, entries):
+    """
+    Объединение репозиториев всех источников
+    
+    Репозиторий, найденный в нескольких источниках (например, у участника и в
+    организации), берется один раз — по full_name. Одноименные репозитории
+    разных владельцев получают id вида `owner-name`.
+    """
+    merged = {}
+    for source in sources:
+        entry = entries.get(source)
+        if entry:
+            for full_name, project in entry['projects'].items():
+                merged.setdefault(full_name, project)
+    
+    repos = []
+    ids = set()
+    for full_name, project in merged.items():
+        if project['id'] in ids:
+            project = {**project, 'id': full_name.replace('/', '-')}
+        ids.add(project['id'])
+        repos.append(project)
+    return repos
+
+
+def get_github_repos():
+    """Получение всех публичных репозиториев со всех источников GitHub"""
+    sources = get_github_sources()
+    
+    # Проверяем кэш
+    if (_cache['github_repos'] is not None and _cache['github_repos_sources'] == sources and
+            not _stale_sources(sources, _cache['github_sources'] or {})):
+        return _cache['github_repos']
+    
+    with _github_refresh_lock:
+        # Пока ждали блокировку, источники мог обновить другой поток
+        entries = dict(_cache['github_sources'] or {})
+        stale = _stale_sources(sources, entries)
+        changed = _cache['github_repos'] is None or _cache['github_repos_sources'] != sources
+        if stale:
+            changed = _refresh_github_sources(stale, entries) or changed
+            _cache['github_sources'] = entries
         
-        github_repos = response.json()
+        # Список пересобирается, только если что-то изменилось: прежний объект
+        # позволяет get_all_projects() не пересчитывать объединение
+        if changed:
+            _cache['github_repos'] = _merge_github_sources(sources, entries)
+            _cache['github_repos_sources'] = sources
+        return _cache['github_repos']
+
+
+def _raw_repo(entry, full_name):
+    """Репозиторий из сохраненных страниц источника (например, чтобы взять его языки)"""
+    for _, repos in entry['pages']:
+        for repo in repos:
+            if (repo.get('full_name') or repo['name']) == full_name:
+                return repo
+    return None
+
+
+def apply_repo_change(change):
+    """
+    Изменение одного репозитория (вебхук GitHub) в кэше источников
+    
+    Меняется только запись этого репозитория в источниках его владельца;
+    объединенный список пересобирается из кэша без запросов к GitHub.
+    Вызывается для команды из журнала (apply_broadcast) в каждом воркере;
+    новое поколение данных создает get_all_projects().
+    
+    Returns:
+        str: 'added', 'updated', 'removed', 'stale' (событие старше кэша)
+            или 'untracked' (репозиторий не входит ни в один источник)
+    """
+    sources = get_github_sources()
+    owner = change.full_name.split('/')[0].lower()
+    results = set()
+    
+    with _github_refresh_lock:
+        entries = _cache['github_sources']
+        if not entries or _cache['github_repos_sources'] != sources:
+            # Кэш еще не загружен: репозиторий придет с первой загрузкой
+            return 'untracked'
         
-        for repo in github_repos:
-            # Пропускаем форки, если хотите
-            # if repo.get('fork'):
-            #     continue
-            
-            # Определяем основной язык для тегов
-            languages = []
-            if repo.get('language'):
-                languages.append(repo['language'].lower())
-            
-            # Получаем дополнительные языки (опционально, тратит дополнительные запросы)
-            # Можно раскомментировать для получения всех языков
-            # try:
-            #     lang_url = repo['languages_url']
-            #     lang_response = requests.get(lang_url, headers=headers, timeout=5)
-            #     if lang_response.status_code == 200:
-            #         repo_languages = lang_response.json()
-            #         languages.extend([lang.lower() for lang in repo_languages.keys() if lang.lower() not in languages])
-            # except:
-            #     pass
-            
-            # Добавляем топики как теги
-            topics = repo.get('topics', [])
-            all_tags = list(set(languages + topics))
+        entries = dict(entries)
+        for source in sources:
+            entry = entries.get(source)
+            if entry is None:
+                continue
+            projects = dict(entry['projects'])
+            if change.previous and projects.pop(change.previous, None) is not None:
+                results.add('removed')
             
-            project_data = {
-                'id': repo['name'],
-                'name': repo['name'].replace('-', ' ').replace('_', ' ').title(),
-                'description': repo.get('description') or 'No description provided',
-                'tags': all_tags[:10],  # Ограничиваем до 10 тегов
-                'link': repo['html_url'],
-                'stars': repo.get('stargazers_count', 0),
-                'forks': repo.get('forks_count', 0),
-                'language': repo.get('language'),
-                'updated_at': repo.get('updated_at'),
-                'created_at': repo.get('created_at'),
-                'is_fork': repo.get('fork', False),
-                'homepage': repo.get('homepage'),
-                'source': 'github'
-            }
-            
-            repos.append(project_data)
-        
-        # Кэшируем результат
-        _cache['github_repos'] = repos
-        _cache['github_repos_timestamp'] = datetime.now()
+            current = projects.get(change.full_name)
+            tracked = (not change.removed and source.owner.lower() == owner and
+                       any(source.select([(None, [change.repo])])))
+            if tracked:
+                if is_stale(change.repo, current):
+                    results.add('stale')
+                    continue
+                repo = change.repo
+                if app.config['GITHUB_FETCH_LANGUAGES'] and 'languages' not in repo:
+                    # В событии нет списка языков: берем его из последней загрузки
+                    raw = _raw_repo(entry, change.previous or change.full_name)
+                    if raw and 'languages' in raw:
+                        repo = {**repo, 'languages': raw['languages']}
+                projects[change.full_name] = _repo_to_project(repo)
+                results.add('updated' if current is not None else 'added')
+            elif projects.pop(change.full_name, None) is not None:
+                results.add('removed')
+            else:
+                continue
+            entries[source] = {**entry, 'projects': projects}
         
-    except requests.RequestException as e:
-        print(f"Ошибка при получении репозиториев GitHub: {e}")
-        # Возвращаем кэш если есть, иначе пустой список
-        if _cache['github_repos']:
-            return _cache['github_repos']
-        return []
+        if results - {'stale'}:
+            _cache['github_sources'] = entries
+            _cache['github_repos'] = _merge_github_sources(sources, entries)
     
-    return repos
+    for result in ('added', 'updated', 'removed', 'stale'):
+        if result in results:
+            return result
+    return 'untracked'
+
+
+def _iter_local_sources(projects_dir):
+    """(id, путь к info.json, байты или None) — из pack-файла, если он актуален, иначе из папки"""
+    pack = open_pack(projects_dir, app.config['PROJECTS_PACK'])
+    if pack is not None:
+        with pack:
+            for project_id, raw in pack.items():
+                yield project_id, projects_dir / project_id / 'info.json', raw
+        return
+    
+    for project_dir in projects_dir.iterdir():
+        if project_dir.is_dir():
+            info_file = project_dir / 'info.json'
+            if info_file.exists():
+                yield project_dir.name, info_file, None
 
 
 def load_local_projects():
@@ -119,26 +437,24 @@ def load_local_projects():
     if not projects_dir.exists():
         return projects
     
-    # Перебираем все подпапки в директории projects
-    for project_dir in projects_dir.iterdir():
-        if project_dir.is_dir():
-            info_file = project_dir / 'info.json'
-            if info_file.exists():
-                try:
-                    with open(info_file, 'r', encoding='utf-8') as f:
-                        project_data = json.load(f)
-                        project_data['id'] = project_dir.name
-                        project_data['source'] = 'local'
-                        # Добавляем поля для совместимости
-                        if 'stars' not in project_data:
-                            project_data['stars'] = 0
-                        if 'forks' not in project_data:
-                            project_data['forks'] = 0
-                        projects.append(project_data)
-                except json.JSONDecodeError as e:
-                    print(f"Ошибка при чтении {info_file}: {e}")
-                except Exception as e:
-                    print(f"Неожиданная ошибка при обработке {info_file}: {e}")
+    # Перебираем все подпапки в директории projects (или записи актуального pack-файла)
+    for project_id, info_file, raw in _iter_local_sources(projects_dir):
+        try:
+            if raw is None:
+                raw = info_file.read_bytes()
+            project_data = json.loads(raw.decode('utf-8'))
+            project_data['id'] = project_id
+            project_data['source'] = 'local'
+            # Добавляем поля для совместимости
+            if 'stars' not in project_data:
+                project_data['stars'] = 0
+            if 'forks' not in project_data:
+                project_data['forks'] = 0
+            projects.append(project_data)
+        except json.JSONDecodeError as e:
+            print(f"Ошибка при чтении {info_file}: {e}")
+        except Exception as e:
+            print(f"Неожиданная ошибка при обработке {info_file}: {e}")
     
     # Кэшируем результат
     _cache['local_projects'] = projects
@@ -147,216 +463,998 @@ def load_local_projects():
     return projects
 
 
+def _same_source(current, cached):
+    """Источник не изменился: тот же объект из кэша (или оба пустые)"""
+    return current is cached or (not current and cached is not None and not cached)
+
+
 def get_all_projects():
     """Получение всех проектов: GitHub + локальные"""
+    # Сначала — команды, принятые другими воркерами (сброс кэша и т.п.)
+    apply_broadcast()
     github_repos = get_github_repos()
     local_projects = load_local_projects()
     
-    # Объединяем, приоритет у локальных (перезаписывают GitHub если есть дубликаты)
-    all_projects = {repo['id']: repo for repo in github_repos}
+    with _data_lock:
+        # Источники не менялись с прошлого объединения — отдаем готовый список
+        if (_data['projects'] is not None and
+                _same_source(github_repos, _data['github_repos']) and
+                _same_source(local_projects, _data['local_projects'])):
+            return _data['projects']
+        
+        # Объединяем, приоритет у локальных (перезаписывают GitHub если есть дубликаты)
+        all_projects = {repo['id']: repo for repo in github_repos}
+        
+        for project in local_projects:
+            all_projects[project['id']] = project
+        
+        projects = list(all_projects.values())
+        
+        # Новое поколение — только если содержимое действительно изменилось
+        fingerprint = hashlib.sha256(
+            json.dumps(projects, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+        ).hexdigest()
+        if fingerprint != _data['fingerprint']:
+            _data['generation'] += 1
+            _data['fingerprint'] = fingerprint
+            _data['updated_at'] = datetime.now()
+            changes = changelog.record(_data['generation'], fingerprint[:16], _data['projects'], projects)
+            _publish_changes(changes)
+            recorded = _data['generation']
+        else:
+            recorded = None
+        
+        _data['github_repos'] = github_repos
+        _data['local_projects'] = local_projects
+        _data['projects'] = projects
+    
+    # История пишется после снятия блокировки: запросы не ждут диска и flock
+    if recorded is not None:
+        _record_history(projects, recorded)
+    return projects
+
+
+def _event_head():
+    """ID и данные события для текущего поколения (вызывается под _data_lock)"""
+    version = _data['fingerprint'][:16]
+    return f"{_data['generation']}-{version}", {'generation': _data['generation'], 'version': version}
+
+
+def _publish_changes(changes):
+    """Событие об изменении набора проектов (вызывается под _data_lock)"""
+    hub = _events['hub']
+    if hub is None:
+        return
+    event_id, data = _event_head()
+    if changes is None:
+        hub.reset(event_id, data)
+        return
+    added, updated, removed = changes
+    state = dict(data)
+    data.update(added=len(added), updated=len(updated), removed=len(removed))
+    if len(added) + len(updated) + len(removed) <= EVENT_IDS_LIMIT:
+        data['ids'] = {'added': added, 'updated': updated, 'removed': removed}
+    hub.publish(event_id, 'projects', data, state)
+
+
+def get_broadcast():
+    """Журнал команд (broadcast.Broadcast): в файле BROADCAST_FILE или в памяти процесса"""
+    path = app.config['BROADCAST_FILE'] or None
+    bus = _broadcast['bus']
+    if bus is not None and _broadcast['path'] == path:
+        return bus
+    with _broadcast_lock:
+        if _broadcast['bus'] is None or _broadcast['path'] != path:
+            bus = Broadcast(path, limit=app.config['WEBHOOK_DELIVERIES'])
+            # Точка отсчета: процесс (и воркеры, созданные от него fork) применяет команды после нее
+            bus.poll()
+            _broadcast.update(bus=bus, path=path)
+        return _broadcast['bus']
+
+
+def _apply_command(message):
+    """Команда из журнала в кэше этого процесса"""
+    if message['type'] == 'repo':
+        return apply_repo_change(RepoChange(**message['change']))
+    if message['type'] == 'refresh' and message.get('scope') == 'local':
+        _cache['local_projects'] = None
+    elif message['type'] in ('refresh', 'resync'):
+        reset_cache()
+    return 'ok'
+
+
+def apply_broadcast():
+    """Применение новых команд журнала (вызывается до загрузки данных)"""
+    bus = get_broadcast()
+    if not bus.pending():
+        return
+    with _broadcast_apply_lock:
+        results = _broadcast['results']
+        for seq, message in bus.poll():
+            try:
+                results[seq] = _apply_command(message)
+            except Exception:
+                # Одна неудачная команда не должна останавливать остальные
+                traceback.print_exc()
+                results[seq] = 'error'
+            if len(results) > BROADCAST_RESULTS_LIMIT:
+                results.popitem(last=False)
+
+
+def broadcast_result(seq):
+    """Итог команды seq в этом процессе (применяет новые команды журнала)"""
+    apply_broadcast()
+    # Команду мог забрать другой поток: ждем, пока он ее применит
+    with _broadcast_apply_lock:
+        return _broadcast['results'].get(seq)
+
+
+def get_history():
+    """Хранилище истории (history.HistoryStore) или None, если HISTORY_FILE пуст"""
+    path = app.config['HISTORY_FILE']
+    if not path:
+        return None
+    with _history_lock:
+        if _history['path'] != path:
+            _history.update(store=HistoryStore(path), path=path)
+        return _history['store']
+
+
+def _record_history(projects, generation):
+    """Звезды и форки поколения generation в историю; сжатие — в фоне (вызывается без _data_lock)"""
+    store = get_history()
+    if store is None:
+        return
+    with _history_record_lock:
+        # Потоки могут дойти сюда не по порядку: старое поколение не пишем поверх нового
+        if generation <= _history['generation']:
+            return
+        _history['generation'] = generation
+        try:
+            store.record(projects)
+            compacted_at = store.compacted_at()
+        except (OSError, ValueError) as e:
+            # История не должна мешать отдаче данных
+            print(f"Ошибка записи истории: {e}")
+            return
+    if _history['compaction'] and _compaction_due(compacted_at):
+        job_queue.submit('history-compact', _compact_history, store)
+
+
+def _compaction_due(compacted_at):
+    """Пора ли сжимать историю, сжатую в compacted_at (None — файла нет)"""
+    return compacted_at is not None and time.time() - compacted_at >= app.config['HISTORY_COMPACT_INTERVAL']
+
+
+def _compact_history(store):
+    """Сжатие истории (фоновая задача)"""
+    # Пока задача ждала, файл мог сжать другой воркер или предыдущая задача
+    if not _compaction_due(store.compacted_at()):
+        return None
+    return store.compact(app.config['HISTORY_RAW_DAYS'], app.config['HISTORY_DAILY_DAYS'])
+
+
+def get_event_hub():
+    """Хаб событий SSE (events.EventHub), создается при первом обращении"""
+    with _events_lock:
+        if _events['hub'] is None:
+            from events import EventHub
+            
+            hub = EventHub(
+                replay=app.config['EVENTS_REPLAY'],
+                queue_size=app.config['EVENTS_QUEUE'],
+                heartbeat=app.config['EVENTS_HEARTBEAT'],
+                refresh=get_all_projects,
+                refresh_interval=app.config['EVENTS_REFRESH'],
+                changed=lambda: get_broadcast().pending()
+            )
+            get_all_projects()
+            with _data_lock:
+                hub.reset(*_event_head())
+                _events['hub'] = hub
+        return _events['hub']
+
+
+def start_event_server():
+    """Асинхронный сервер SSE на EVENTS_PORT, если порт задан (не блокирует)"""
+    if not app.config['EVENTS_PORT']:
+        return None
+    from events import serve
     
-    for project in local_projects:
-        all_projects[project['id']] = project
+    return serve(get_event_hub(), app.config['EVENTS_HOST'], app.config['EVENTS_PORT'])
+
+
+def get_data_snapshot():
+    """Согласованные (проекты, поколение, хеш содержимого) текущего набора"""
+    get_all_projects()
+    with _data_lock:
+        return _data['projects'], _data['generation'], _data['fingerprint']
+
+
+def get_data_generation():
+    """Текущее поколение данных: (номер, хеш содержимого)"""
+    get_all_projects()
+    with _data_lock:
+        return _data['generation'], _data['fingerprint']
+
+
+def reset_cache():
+    """Сброс кэша источников (поколение данных сохраняется)"""
+    for key in _cache:
+        _cache[key] = None
+
+
+def expire_cache():
+    """Пометить кэш устаревшим, не удаляя данные (как при истечении TTL)"""
+    now = datetime.now()
+    if _cache['local_projects_timestamp']:
+        _cache['local_projects_timestamp'] = now - timedelta(seconds=app.config['CACHE_TIMEOUT'] + 1)
+    for source, entry in (_cache['github_sources'] or {}).items():
+        entry['timestamp'] = now - timedelta(seconds=source.ttl + 1)
+
+
+def warm_up():
+    """Заполнение кэшей GitHub и локальных проектов, компиляция шаблонов и рендеринг карточек"""
+    started = time.perf_counter()
+    try:
+        projects = get_all_projects()
+        app.jinja_env.get_template('index.html')
+        render_cards(projects)
+        get_bundle()
+        get_asset_manifest()
+    except Exception as e:
+        # Неудачный прогрев не мешает работе: данные загрузятся при первом запросе
+        _warmup['error'] = str(e)
+        print(f"Ошибка прогрева кэша: {e}")
+    _warmup['duration'] = time.perf_counter() - started
+    _warmup['ready'].set()
+
+
+def start_warmup():
+    """Запуск прогрева в фоновом потоке; до его окончания /health отвечает 503"""
+    _warmup['enabled'] = True
+    _warmup['ready'].clear()
+    thread = threading.Thread(target=warm_up, name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def get_project_index():
+    """
+    Индекс проектов текущего поколения данных (строится один раз)
     
-    return list(all_projects.values())
+    Returns:
+        Tuple[ProjectIndex, str]: (индекс, версия — префикс хеша содержимого,
+            одинаковый во всех процессах для одних и тех же данных)
+    """
+    projects, generation, fingerprint = get_data_snapshot()
+    with _index_lock:
+        if _index['generation'] != generation:
+            _index.update(generation=generation, index=ProjectIndex(projects),
+                          version=fingerprint[:16], bundle=None, suggest=None)
+        return _index['index'], _index['version']
 
 
-def get_all_tags(projects):
-    """Получение всех уникальных тегов из проектов"""
-    tags = set()
-    for project in projects:
-        tags.update(project.get('tags', []))
-    return sorted(tags)
+def get_bundle():
+    """Бандл индекса для браузера в виде JSON: (байты, версия)"""
+    index, version = get_project_index()
+    with _index_lock:
+        if _index['version'] == version and _index['bundle'] is not None:
+            return _index['bundle'], version
+        bundle = json.dumps(index.to_bundle(version), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        if _index['version'] == version:
+            _index['bundle'] = bundle
+        return bundle, version
 
 
-def get_all_languages(projects):
-    """Получение всех уникальных языков программирования"""
-    languages = set()
-    for project in projects:
-        if project.get('language'):
-            languages.add(project['language'])
-    return sorted(languages)
+def get_suggest_index():
+    """Индекс подсказок поиска текущего поколения: (SuggestIndex, версия)"""
+    index, version = get_project_index()
+    with _index_lock:
+        if _index['version'] == version and _index['suggest'] is not None:
+            return _index['suggest'], version
+    # Строится вне блокировки: страницы в это время не ждут
+    suggest = SuggestIndex(index.projects)
+    with _index_lock:
+        if _index['version'] == version:
+            _index['suggest'] = suggest
+    return suggest, version
 
 
-@app.route('/')
-def index():
-    """Главная страница портфолио"""
-    projects = get_all_projects()
-    all_tags = get_all_tags(projects)
-    all_languages = get_all_languages(projects)
-    
-    # Фильтрация по тегу
-    selected_tag = request.args.get('tag')
-    if selected_tag:
-        projects = [p for p in projects if selected_tag in p.get('tags', [])]
-    
-    # Фильтрация по языку
-    selected_language = request.args.get('language')
-    if selected_language:
-        projects = [p for p in projects if p.get('language') == selected_language]
-    
-    # Поиск
-    search_query = request.args.get('search', '').lower()
-    if search_query:
-        projects = [
-            p for p in projects
-            if search_query in p.get('name', '').lower() or
-               search_query in p.get('description', '').lower()
-        ]
+# Сколько тегов показывать в панели фильтров (самые частые среди результатов)
+TAG_FACETS_LIMIT = 15
+# Максимум подсказок в ответе /api/suggest
+SUGGEST_LIMIT = 20
+
+
+def build_index_context(args):
+    """Подготовка данных для шаблона index.html по параметрам запроса"""
+    index, version = get_project_index()
+    all_projects = index.projects
+    
+    selected_tag = args.get('tag')
+    selected_language = args.get('language')
+    search_query = args.get('search', '').lower()
+    sort_by = args.get('sort', 'updated')
     
-    # Сортировка
-    sort_by = request.args.get('sort', 'updated')
-    if sort_by == 'stars':
-        projects = sorted(projects, key=lambda x: x.get('stars', 0), reverse=True)
-    elif sort_by == 'name':
-        projects = sorted(projects, key=lambda x: x.get('name', '').lower())
-    elif sort_by == 'updated':
-        projects = sorted(projects, key=lambda x: x.get('updated_at', ''), reverse=True)
+    # Запрос q (query.py): с ошибкой показываем сообщение и не фильтруем по нему
+    query = args.get('q', '').strip()
+    query_error = None
+    if query:
+        try:
+            index.query(query)
+        except QueryError as e:
+            query_error = str(e)
+            query = ''
+    
+    # Фильтрация и сортировка по индексу: пересечение битовых множеств и готовые порядки
+    projects = index.ordered(index.select(selected_tag, selected_language, search_query, query), sort_by)
+    # Счетчики для панели фильтров: популярные теги среди текущих результатов
+    facets = index.facets(selected_tag, selected_language, search_query, query)
     
     # Статистика
-    total_stars = sum(p.get('stars', 0) for p in get_all_projects())
-    total_forks = sum(p.get('forks', 0) for p in get_all_projects())
+    total_stars = sum(p.get('stars', 0) for p in all_projects)
+    total_forks = sum(p.get('forks', 0) for p in all_projects)
     
-    return render_template(
-        'index.html',
+    return dict(
         projects=projects,
-        all_tags=all_tags,
-        all_languages=all_languages,
+        all_tags=sorted(index.tags),
+        all_languages=sorted(index.languages),
+        tag_facets=facets['tags'][:TAG_FACETS_LIMIT],
+        language_facets=facets['languages'],
         selected_tag=selected_tag,
         selected_language=selected_language,
         search_query=search_query,
+        query=args.get('q', '').strip(),
+        query_error=query_error,
         sort_by=sort_by,
         author=app.config['AUTHOR_INFO'],
         total_stars=total_stars,
         total_forks=total_forks,
-        total_projects=len(get_all_projects())
+        total_projects=len(all_projects),
+        bundle_version=version
     )
 
 
+def _card_html(project, template):
+    """HTML карточки проекта из кэша (вызывается под _cards_lock)"""
+    entry = _cards['by_id'].get(project['id'])
+    if entry is not None and entry[0] is project:
+        return entry[1]
+    
+    digest = hashlib.blake2b(
+        json.dumps(project, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'),
+        digest_size=16
+    ).digest()
+    html = _cards['by_hash'].get(digest)
+    if html is None:
+        # Проект не менялся с прошлого поколения — берем готовый фрагмент
+        html = _cards['previous'].pop(digest, None)
+        if html is None:
+            html = Markup(template.render(project=project))
+        _cards['by_hash'][digest] = html
+    _cards['by_id'][project['id']] = (project, html)
+    return html
+
+
+@app.template_global()
+def render_cards(projects):
+    """HTML карточек проектов, собранный из кэшированных фрагментов"""
+    template = app.jinja_env.get_template('_project_card.html')
+    with _cards_lock:
+        generation = _data['generation']
+        if _cards['template'] is not template:
+            # Шаблон карточки перезагружен — старые фрагменты недействительны
+            _cards.update(template=template, generation=generation, by_id={}, by_hash={}, previous={},
+                          blocks=OrderedDict())
+        elif _cards['generation'] != generation:
+            # Новое поколение: фрагменты прошлого доступны по хешу, пока не понадобятся
+            _cards.update(generation=generation, by_id={}, by_hash={}, previous=_cards['by_hash'],
+                          blocks=OrderedDict())
+        
+        key = tuple(project['id'] for project in projects)
+        cached = _cards['blocks'].get(key)
+        # Те же объекты проектов — значит, и то же содержимое
+        if cached is not None and all(map(operator.is_, cached[0], projects)):
+            _cards['blocks'].move_to_end(key)
+            return cached[1]
+        
+        block = Markup('\n'.join([_card_html(project, template) for project in projects]))
+        _cards['blocks'][key] = (tuple(projects), block)
+        if len(_cards['blocks']) > CARD_BLOCKS_LIMIT:
+            _cards['blocks'].popitem(last=False)
+        return block
+
+
+def get_asset_manifest():
+    """Манифест static/dist: {исходное имя: имя с хешем}; пустой, если сборки нет"""
+    path = os.path.join(app.static_folder, assets.DIST_DIR, assets.MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime != _assets['mtime']:
+        _assets.update(mtime=mtime, manifest=assets.load_manifest(app.static_folder) if mtime else {})
+    return _assets['manifest']
+
+
+@app.template_global()
+def asset_url(filename):
+    """Адрес статического файла: версия с хешем из static/dist, если статика собрана"""
+    target = get_asset_manifest().get(filename)
+    if target is None:
+        return url_for('static', filename=filename)
+    return url_for('static_asset', filename=target)
+
+
+@app.route('/static/dist/<path:filename>')
+def static_asset(filename):
+    """Собранная статика: кэшируется навсегда, отдается сжатой, если клиент это поддерживает"""
+    dist = os.path.join(app.static_folder, assets.DIST_DIR)
+    mimetype = mimetypes.guess_type(filename)[0]
+    for encoding, suffix in ASSET_ENCODINGS:
+        if encoding in request.accept_encodings and os.path.isfile(os.path.join(dist, filename + suffix)):
+            response = send_from_directory(dist, filename + suffix, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(dist, filename, max_age=ASSET_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    # Имя файла меняется вместе с содержимым: браузеру не нужно перепроверять
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@app.route('/')
+def index():
+    """Главная страница портфолио"""
+    return render_template('index.html', **build_index_context(request.args))
+
+
+def query_error_response(error):
+    """Ответ 400 на запрос q с синтаксической ошибкой"""
+    return jsonify({'status': 'error', 'message': str(error), 'position': error.position}), 400
+
+
 @app.route('/api/projects')
 def api_projects():
-    """API endpoint для получения списка проектов"""
-    projects = get_all_projects()
-    return jsonify(projects)
+    """
+    API endpoint для получения списка проектов (q — фильтр на языке query.py)
+
+    С explain=1 и q ответ — объект: запрос в каноническом виде, план
+    вычисления с оценками числа проектов и сами проекты (для отладки запросов).
+    """
+    projects, generation, fingerprint = get_data_snapshot()
+    query = request.args.get('q', '').strip()
+    payload = projects
+    if query:
+        index, _ = get_project_index()
+        try:
+            projects = payload = index.ordered(index.query(query), None)
+            if request.args.get('explain') == '1':
+                canonical, steps = index.explain(query)
+                payload = {'query': canonical, 'plan': steps, 'total': len(projects), 'projects': projects}
+        except QueryError as e:
+            return query_error_response(e)
+    response = jsonify(payload)
+    # Точка отсчета для /api/projects/changes
+    response.headers['X-Data-Generation'] = str(generation)
+    response.headers['X-Data-Version'] = fingerprint[:16]
+    return response
+
+
+@app.route('/api/projects/changes')
+def api_project_changes():
+    """Изменения набора проектов после поколения since (вместо полной загрузки списка)"""
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({'status': 'error', 'message': "Parameter 'since' is required"}), 400
+    
+    get_all_projects()
+    with _data_lock:
+        # Журнал пишется под той же блокировкой: изменения и список проектов согласованы
+        projects, generation, fingerprint = _data['projects'], _data['generation'], _data['fingerprint']
+        changes = changelog.since(since, request.args.get('version'))
+    
+    payload = {'generation': generation, 'version': fingerprint[:16], 'since': since}
+    if changes is None:
+        # История усечена или поколение неизвестно этому процессу
+        payload.update(resync=True, projects_url=url_for('api_projects'))
+        return jsonify(payload)
+    
+    wanted = set(changes['added']) | set(changes['updated'])
+    changed = {project['id']: project for project in projects if project['id'] in wanted} if wanted else {}
+    payload.update(
+        resync=False,
+        added=[changed[project_id] for project_id in changes['added']],
+        updated=[changed[project_id] for project_id in changes['updated']],
+        removed=changes['removed']
+    )
+    return jsonify(payload)
+
+
+@app.route('/api/facets')
+def api_facets():
+    """Счетчики тегов и языков для фильтров tag, language, search и запроса q"""
+    index, version = get_project_index()
+    try:
+        facets = index.facets(request.args.get('tag'), request.args.get('language'),
+                              request.args.get('search', ''), request.args.get('q', '').strip())
+    except QueryError as e:
+        return query_error_response(e)
+    return jsonify({
+        'version': version,
+        'total': facets['total'],
+        'tags': [{'name': name, 'count': count} for name, count in facets['tags']],
+        'languages': [{'name': name, 'count': count} for name, count in facets['languages']]
+    })
+
+
+def _history_window(default):
+    """Окно истории из параметра days: (days, начало окна unix) или None при ошибке"""
+    days = request.args.get('days', default, type=int)
+    if days is None or days < 0:
+        return None
+    return days, int(time.time()) - days * DAY if days else 0
+
+
+@app.route('/api/history/<project_id>')
+def api_history(project_id):
+    """Звезды и форки проекта за последние days дней (0 — вся история)"""
+    store = get_history()
+    if store is None:
+        abort(404)
+    window = _history_window(30)
+    if window is None:
+        return jsonify({'status': 'error', 'message': "Parameter 'days' must be a non-negative integer"}), 400
+    days, since = window
+
+    projects = {project['id']: project for project in get_all_projects()}
+    if project_id not in projects:
+        return jsonify({'status': 'error', 'message': 'Project not found'}), 404
+    points = store.series(project_id, since)
+    project = projects[project_id]
+    return jsonify({
+        'id': project_id,
+        'days': days,
+        'stars': project.get('stars', 0),
+        'forks': project.get('forks', 0),
+        'points': [
+            {'time': datetime.fromtimestamp(timestamp).isoformat(timespec='seconds'), 'stars': stars, 'forks': forks}
+            for timestamp, stars, forks in points
+        ]
+    })
+
+
+@app.route('/api/trending')
+def api_trending():
+    """Проекты с наибольшим ростом звезд (by=stars) или форков (by=forks) за days дней"""
+    store = get_history()
+    if store is None:
+        abort(404)
+    window = _history_window(7)
+    if window is None:
+        return jsonify({'status': 'error', 'message': "Parameter 'days' must be a non-negative integer"}), 400
+    days, since = window
+    by = request.args.get('by', 'stars')
+    if by not in ('stars', 'forks'):
+        return jsonify({'status': 'error', 'message': "Parameter 'by' must be 'stars' or 'forks'"}), 400
+    limit = min(max(request.args.get('limit', 10, type=int), 1), HISTORY_LIMIT)
+
+    projects = {project['id']: project for project in get_all_projects()}
+    # Только текущие проекты: удаленные остаются в истории, но не в ответе
+    growth = store.growth(since, limit=limit, by=by, only=projects)
+    return jsonify({
+        'days': days,
+        'by': by,
+        'projects': [
+            {
+                'id': project_id,
+                'name': projects[project_id]['name'],
+                'stars': projects[project_id].get('stars', 0),
+                'forks': projects[project_id].get('forks', 0),
+                'growth': {'stars': stars, 'forks': forks}
+            }
+            for project_id, stars, forks in growth
+        ]
+    })
+
+
+@app.route('/api/suggest')
+def api_suggest():
+    """Подсказки для поля поиска: проекты, теги и языки, начинающиеся с prefix"""
+    by = request.args.get('by', 'stars')
+    if by not in SUGGEST_ORDERS:
+        return jsonify({'status': 'error', 'message': "Parameter 'by' must be 'stars' or 'updated'"}), 400
+    limit = min(max(request.args.get('limit', 8, type=int), 1), SUGGEST_LIMIT)
+    index, version = get_suggest_index()
+    # Ответ для адреса меняется только с версией данных
+    if request.if_none_match.contains(version):
+        response = Response(status=304)
+    else:
+        prefix = request.args.get('prefix', '')
+        response = jsonify({'prefix': prefix, 'by': by, 'version': version,
+                            'suggestions': index.suggest(prefix, by, limit)})
+    response.set_etag(version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/api/bundle')
+def api_bundle():
+    """Компактный индекс проектов для фильтрации и сортировки в браузере"""
+    bundle, version = get_bundle()
+    if request.if_none_match.contains(version):
+        response = Response(status=304)
+    else:
+        response = Response(bundle, mimetype='application/json')
+    response.set_etag(version)
+    if request.args.get('v') == version:
+        # Адрес с версией никогда не меняет содержимое
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 @app.route('/api/refresh')
 def api_refresh():
     """Принудительное обновление кэша"""
-    global _cache
-    _cache = {
-        'github_repos': None,
-        'github_repos_timestamp': None,
-        'local_projects': None,
-        'local_projects_timestamp': None
-    }
+    # scope=local — изменились только локальные проекты (watcher.py --notify): GitHub не трогаем.
+    # Кэш сбрасывают все воркеры: команда идет через общий журнал (broadcast.py)
+    scope = 'local' if request.args.get('scope') == 'local' else 'all'
+    get_broadcast().publish({'type': 'refresh', 'scope': scope})
+    # Загружаем заново в фоне: подписчики /api/events узнают об изменениях сразу
+    job_queue.submit('refresh', lambda: get_data_generation()[0])
     return jsonify({'status': 'ok', 'message': 'Cache cleared'})
 
 
-@app.route('/generate-sitemap')
-def generate_sitemap():
-    """Генерация sitemap.xml"""
-    projects = get_all_projects()
-    base_url = app.config['SITE_URL']
+@app.route('/api/github/webhook', methods=['POST'])
+def github_webhook():
+    """Вебхук GitHub (repository, push, star, fork): точечное обновление проекта"""
+    secret = app.config['GITHUB_WEBHOOK_SECRET']
+    if not secret:
+        abort(404)
     
-    sitemap_content = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    sitemap_content += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    # Подпись считается по сырому телу запроса, до разбора JSON
+    body = request.get_data()
+    if not verify_signature(secret, body, request.headers.get('X-Hub-Signature-256')):
+        return jsonify({'status': 'error', 'message': 'Invalid signature'}), 401
+    delivery_id = request.headers.get('X-GitHub-Delivery')
+    if not delivery_id:
+        return jsonify({'status': 'error', 'message': "Header 'X-GitHub-Delivery' is required"}), 400
+    event = request.headers.get('X-GitHub-Event', '')
+    if event == 'ping':
+        return jsonify({'status': 'ok', 'event': event})
     
-    # Главная страница
-    sitemap_content += f'''  <url>
-    <loc>{base_url}/</loc>
-    <lastmod>{datetime.now().strftime("%Y-%m-%d")}</lastmod>
-    <changefreq>daily</changefreq>
-    <priority>1.0</priority>
-  </url>\n'''
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        return jsonify({'status': 'error', 'message': 'Invalid JSON payload'}), 400
     
-    # Страницы с фильтрами по тегам
-    all_tags = get_all_tags(projects)
-    for tag in all_tags:
-        sitemap_content += f'''  <url>
-    <loc>{base_url}/?tag={tag}</loc>
-    <lastmod>{datetime.now().strftime("%Y-%m-%d")}</lastmod>
-    <changefreq>weekly</changefreq>
-    <priority>0.8</priority>
-  </url>\n'''
+    change = parse_event(event, payload)
+    if change is None:
+        return jsonify({'status': 'ignored', 'event': event}), 202
+    # Изменение применяет каждый воркер: команда идет через общий журнал
+    # (broadcast.py), где ID доставки записывается один раз
+    seq = get_broadcast().publish({'type': 'repo', 'change': change._asdict()}, key=delivery_id)
+    if seq is None:
+        return jsonify({'status': 'duplicate', 'delivery': delivery_id})
     
-    sitemap_content += '</urlset>'
+    result = broadcast_result(seq)
+    if result == 'error':
+        return jsonify({'status': 'error', 'delivery': delivery_id, 'message': 'Change was not applied'}), 500
+    generation = get_data_snapshot()[1]
+    return jsonify({
+        'status': 'ok',
+        'event': event,
+        'delivery': delivery_id,
+        'repository': change.full_name,
+        'result': result,
+        'generation': generation
+    })
+
+
+@app.route('/api/events')
+def api_events():
+    """Поток событий об изменениях проектов (server-sent events)"""
+    # Поток отдает только асинхронный сервер на EVENTS_PORT (start_event_server),
+    # за прокси по этому же адресу: здесь каждое соединение занимало бы поток
+    # воркера. Ответ 204 — браузер не переподключается
+    return Response(status=204)
+
+
+@app.route('/health')
+def health():
+    """Готовность к приему трафика (данные не загружает)"""
+    if _warmup['enabled'] and not _warmup['ready'].is_set():
+        return jsonify({'status': 'starting'}), 503
+    return jsonify({
+        'status': 'ok',
+        'warm': _data['projects'] is not None,
+        'generation': _data['generation'],
+        'warmup_s': round(_warmup['duration'], 3) if _warmup['duration'] is not None else None,
+        'warmup_error': _warmup['error']
+    })
+
+
+def page_query(params):
+    """
+    Строка запроса страницы в написании ссылок шаблона (фильтр |urlencode):
+    пробел — %20, "/" не кодируется. Одно написание нужно статической сборке
+    (freeze.py): nginx ищет файл страницы по строке запроса как есть
+    """
+    return urlencode(params, quote_via=quote, safe='/')
+
+
+def iter_sitemap_urls(projects):
+    """Записи sitemap: (адрес, lastmod, changefreq, priority)"""
+    base_url = app.config['SITE_URL'].rstrip('/')
+    default_lastmod = (_data['updated_at'] or datetime.now()).strftime('%Y-%m-%d')
+    
+    # Дата последнего обновления страницы = самый свежий updated_at среди ее проектов
+    newest = ''
+    tag_dates = {}
+    language_dates = {}
+    for project in projects:
+        updated = (project.get('updated_at') or '')[:10]
+        newest = max(newest, updated)
+        for tag in project.get('tags', []):
+            tag_dates[tag] = max(tag_dates.get(tag, ''), updated)
+        if project.get('language'):
+            language = project['language']
+            language_dates[language] = max(language_dates.get(language, ''), updated)
     
-    # Сохраняем sitemap
-    with open('sitemap.xml', 'w', encoding='utf-8') as f:
-        f.write(sitemap_content)
+    yield f'{base_url}/', newest or default_lastmod, 'daily', '1.0'
     
-    return 'Sitemap успешно сгенерирован в файл sitemap.xml', 200
+    # Страницы с фильтрами по тегам и языкам
+    for tag in sorted(tag_dates):
+        yield f"{base_url}/?{page_query({'tag': tag})}", tag_dates[tag] or default_lastmod, 'weekly', '0.8'
+    for language in sorted(language_dates):
+        yield (f"{base_url}/?{page_query({'language': language})}",
+               language_dates[language] or default_lastmod, 'weekly', '0.7')
+    
+    # Страницы отдельных проектов (если у сайта они есть)
+    project_url = app.config.get('SITEMAP_PROJECT_URL')
+    if project_url:
+        for project in sorted(projects, key=lambda p: p['id']):
+            updated = (project.get('updated_at') or '')[:10]
+            yield (base_url + project_url.format(id=quote(str(project['id']), safe='')),
+                   updated or default_lastmod, 'monthly', '0.6')
 
 
-@app.route('/generate-readme')
-def generate_readme():
-    """Генерация README с описанием всех проектов"""
-    projects = get_all_projects()
+def _xml_chunks(header, entries, footer, batch=1000):
+    """Документ XML в виде списка байтовых блоков по `batch` записей"""
+    chunks = [header.encode('utf-8')]
+    for start in range(0, len(entries), batch):
+        chunks.append(''.join(entries[start:start + batch]).encode('utf-8'))
+    chunks.append(footer.encode('utf-8'))
+    return chunks
+
+
+def build_sitemap_documents(projects):
+    """
+    Сборка документов sitemap
+    
+    Returns:
+        dict: имя файла -> список байтовых блоков. При числе адресов больше
+        SITEMAP_MAX_URLS `sitemap.xml` становится индексом для `sitemap-N.xml`
+    """
+    # saxutils тянет за собой urllib.request (~20 мс) — импортируем только при сборке sitemap
+    from xml.sax.saxutils import escape as xml_escape
+    
+    urlset_header = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                     '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    urls = list(iter_sitemap_urls(projects))
+    entries = [
+        f'  <url>\n'
+        f'    <loc>{xml_escape(loc)}</loc>\n'
+        f'    <lastmod>{lastmod}</lastmod>\n'
+        f'    <changefreq>{changefreq}</changefreq>\n'
+        f'    <priority>{priority}</priority>\n'
+        f'  </url>\n'
+        for loc, lastmod, changefreq, priority in urls
+    ]
+    
+    limit = app.config['SITEMAP_MAX_URLS']
+    if len(entries) <= limit:
+        return {'sitemap.xml': _xml_chunks(urlset_header, entries, '</urlset>')}
     
-    readme_content = f"# {app.config['SITE_TITLE']}\n\n"
-    readme_content += f"**Автор:** {app.config['AUTHOR_INFO']['name']}\n\n"
-    readme_content += f"**Роль:** {app.config['AUTHOR_INFO']['role']}\n\n"
-    readme_content += f"{app.config['AUTHOR_INFO']['description']}\n\n"
+    documents = {}
+    base_url = app.config['SITE_URL'].rstrip('/')
+    index_entries = []
+    for number, start in enumerate(range(0, len(entries), limit), 1):
+        name = f'sitemap-{number}.xml'
+        documents[name] = _xml_chunks(urlset_header, entries[start:start + limit], '</urlset>')
+        lastmod = max(url[1] for url in urls[start:start + limit])
+        index_entries.append(
+            f'  <sitemap>\n'
+            f'    <loc>{xml_escape(f"{base_url}/{name}")}</loc>\n'
+            f'    <lastmod>{lastmod}</lastmod>\n'
+            f'  </sitemap>\n'
+        )
+    index_header = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    documents['sitemap.xml'] = _xml_chunks(index_header, index_entries, '</sitemapindex>')
+    return documents
+
+
+def get_sitemap_documents():
+    """Документы sitemap для текущего поколения данных (собираются один раз)"""
+    # Проекты, поколение и хеш — из одного снимка: иначе при параллельном
+    # обновлении в кэш попали бы документы поколения N+1 с номером N
+    projects, generation, fingerprint = get_data_snapshot()
+    with _sitemap_lock:
+        if _sitemap['generation'] != generation:
+            _sitemap['documents'] = build_sitemap_documents(projects)
+            _sitemap['etag'] = f'{generation}-{fingerprint[:16]}'
+            _sitemap['generation'] = generation
+        return _sitemap['documents'], _sitemap['etag']
+
+
+def _sitemap_response(name):
+    """Потоковая отдача документа sitemap с поддержкой ETag"""
+    documents, etag = get_sitemap_documents()
+    chunks = documents.get(name)
+    if chunks is None:
+        abort(404)
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(iter(chunks), mimetype='application/xml')
+        response.headers['Content-Length'] = str(sum(len(chunk) for chunk in chunks))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+@app.route('/sitemap.xml')
+def sitemap_xml():
+    """Sitemap (или индекс sitemap для больших каталогов)"""
+    return _sitemap_response('sitemap.xml')
+
+
+@app.route('/sitemap-<int:number>.xml')
+def sitemap_part(number):
+    """Часть sitemap при разбиении по SITEMAP_MAX_URLS"""
+    return _sitemap_response(f'sitemap-{number}.xml')
+
+
+@app.route('/generate-sitemap')
+def generate_sitemap():
+    """Старый адрес генерации sitemap: теперь sitemap отдается из памяти"""
+    return redirect(url_for('sitemap_xml'), code=301)
+
+
+def iter_overview(projects):
+    """Генерация README с описанием всех проектов по частям"""
+    author = app.config['AUTHOR_INFO']
+    yield f"# {app.config['SITE_TITLE']}\n\n"
+    yield f"**Автор:** {author['name']}\n\n"
+    yield f"**Роль:** {author['role']}\n\n"
+    yield f"{author['description']}\n\n"
     
     # Контакты
-    readme_content += "## 📞 Контакты\n\n"
-    contacts = app.config['AUTHOR_INFO']['contacts']
+    yield "## 📞 Контакты\n\n"
+    contacts = author['contacts']
     if contacts.get('github'):
-        readme_content += f"- GitHub: [{contacts['github']}]({contacts['github']})\n"
+        yield f"- GitHub: [{contacts['github']}]({contacts['github']})\n"
     if contacts.get('email'):
-        readme_content += f"- Email: {contacts['email']}\n"
+        yield f"- Email: {contacts['email']}\n"
     if contacts.get('telegram'):
-        readme_content += f"- Telegram: {contacts['telegram']}\n"
+        yield f"- Telegram: {contacts['telegram']}\n"
     
     # Статистика
     total_stars = sum(p.get('stars', 0) for p in projects)
     total_forks = sum(p.get('forks', 0) for p in projects)
     
-    readme_content += f"\n## 📊 Статистика\n\n"
-    readme_content += f"- **Всего проектов:** {len(projects)}\n"
-    readme_content += f"- **Звезд на GitHub:** ⭐ {total_stars}\n"
-    readme_content += f"- **Форков:** 🔱 {total_forks}\n"
+    yield f"\n## 📊 Статистика\n\n"
+    yield f"- **Всего проектов:** {len(projects)}\n"
+    yield f"- **Звезд на GitHub:** ⭐ {total_stars}\n"
+    yield f"- **Форков:** 🔱 {total_forks}\n"
     
-    readme_content += f"\n## 📁 Проекты ({len(projects)})\n\n"
+    yield f"\n## 📁 Проекты ({len(projects)})\n\n"
     
     # Группируем проекты по языкам
     projects_by_lang = {}
     for p in projects:
-        lang = p.get('language', 'Other')
-        if lang not in projects_by_lang:
-            projects_by_lang[lang] = []
-        projects_by_lang[lang].append(p)
+        lang = p.get('language') or 'Other'
+        projects_by_lang.setdefault(lang, []).append(p)
     
     # Список проектов по языкам
     for lang, lang_projects in sorted(projects_by_lang.items()):
-        readme_content += f"### {lang} ({len(lang_projects)})\n\n"
+        yield f"### {lang} ({len(lang_projects)})\n\n"
         
         for project in sorted(lang_projects, key=lambda x: x.get('stars', 0), reverse=True):
-            readme_content += f"#### {project.get('name', 'Без названия')}\n\n"
-            readme_content += f"{project.get('description', 'Нет описания')}\n\n"
+            parts = [
+                f"#### {project.get('name', 'Без названия')}\n\n",
+                f"{project.get('description', 'Нет описания')}\n\n"
+            ]
             
             if project.get('stars', 0) > 0 or project.get('forks', 0) > 0:
-                readme_content += f"⭐ {project.get('stars', 0)} | 🔱 {project.get('forks', 0)}\n\n"
+                parts.append(f"⭐ {project.get('stars', 0)} | 🔱 {project.get('forks', 0)}\n\n")
             
             if project.get('tags'):
                 tags_str = ' '.join([f"`{tag}`" for tag in project['tags'][:8]])
-                readme_content += f"**Теги:** {tags_str}\n\n"
+                parts.append(f"**Теги:** {tags_str}\n\n")
             
             if project.get('link'):
-                readme_content += f"**Ссылка:** [{project['link']}]({project['link']})\n\n"
+                parts.append(f"**Ссылка:** [{project['link']}]({project['link']})\n\n")
             
-            readme_content += "---\n\n"
+            parts.append("---\n\n")
+            yield ''.join(parts)
+
+
+def overview_key(fingerprint):
+    """Ключ отчета: данные проектов + настройки, попадающие в текст"""
+    settings = json.dumps([app.config['SITE_TITLE'], app.config['AUTHOR_INFO']], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256((fingerprint + settings).encode('utf-8')).hexdigest()
+
+
+def write_overview(projects, key, filename):
+    """
+    Запись PROJECTS_OVERVIEW.md: по частям во временный файл, затем атомарная замена.
+    Пропускается, если файл уже собран для тех же данных.
+    """
+    marker = f'<!-- portfolio-data: {key} -->\n'
+    path = Path(filename)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.readline() == marker:
+                return {'file': str(path), 'skipped': True}
+    except OSError:
+        pass
     
-    # Сохраняем README
-    with open('PROJECTS_OVERVIEW.md', 'w', encoding='utf-8') as f:
-        f.write(readme_content)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(marker)
+            for chunk in iter_overview(projects):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return {'file': str(path), 'skipped': False}
+
+
+@app.route('/generate-readme', methods=['GET', 'POST'])
+def generate_readme():
+    """Постановка генерации README с описанием всех проектов в фоновую очередь"""
+    # Ключ задачи и содержимое отчета — из одного снимка данных
+    projects, generation, fingerprint = get_data_snapshot()
+    key = overview_key(fingerprint)
     
-    return 'README успешно сгенерирован в файл PROJECTS_OVERVIEW.md', 200
+    job, created = job_queue.submit(('overview', key), write_overview, projects, key, 'PROJECTS_OVERVIEW.md')
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'created': created,
+        'generation': generation,
+        'status_url': url_for('api_job', job_id=job.id)
+    }), 202
+
+
+@app.route('/api/jobs/<job_id>')
+def api_job(job_id):
+    """Статус фоновой задачи"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    return jsonify(job.to_dict())
 
 
 if __name__ == '__main__':
     # Поддержка переменной окружения PORT для деплоя на Render/Heroku
     port = int(os.environ.get('PORT', 5000))
     debug_mode = os.environ.get('FLASK_ENV') == 'development'
+    # В режиме отладки прогрев не нужен: reloader все равно перезапускает процесс
+    if app.config['WARMUP_ON_BOOT'] and not debug_mode:
+        start_warmup()
+    if not debug_mode:
+        start_event_server()
     app.run(debug=debug_mode, host='0.0.0.0', port=port)
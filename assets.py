@@ -0,0 +1,203 @@
+"""
+Сборка статики: минификация, хеш в имени файла и предварительное сжатие.
+
+Для каждого CSS/JS из папки static пишет в static/dist:
+    <имя>.<хеш>.<расширение>        - минифицированный файл
+    <имя>.<хеш>.<расширение>.gz     - gzip (уровень 9)
+    <имя>.<хеш>.<расширение>.br     - brotli (если установлен пакет brotli)
+    manifest.json                   - {"style.css": "style.3f9a1c0d5e7b.css", ...}
+
+Хеш вычисляется по минифицированному содержимому, поэтому адрес файла
+меняется только вместе с содержимым и его можно кэшировать навсегда.
+Шаблоны получают адреса через `asset_url('style.css')` (app.py); без
+манифеста используются исходные файлы.
+
+Примеры:
+    python assets.py
+    python assets.py --static-dir static --no-brotli
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+# Исправление кодировки для Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE_RE = re.compile(r'\s+')
+CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
+JS_HEADER_RE = re.compile(r'\A\s*/\*.*?\*/\s*', re.S)
+
+
+def minify_css(text):
+    """
+    Консервативная минификация CSS: комментарии, пробелы, лишние `;`
+
+    Пробелы вокруг `:` не трогаются: в селекторах (`.card :hover`) они значимы.
+    """
+    text = CSS_COMMENT_RE.sub('', text)
+    text = CSS_SPACE_RE.sub(' ', text)
+    text = CSS_PUNCT_RE.sub(r'\1', text)
+    return text.replace(';}', '}').strip() + '\n'
+
+
+def minify_js(text):
+    """
+    Консервативная минификация JS: заголовочный комментарий, отступы,
+    строки-комментарии и пустые строки
+
+    Переводы строк сохраняются, поэтому автоматическая вставка `;` работает
+    как в исходнике.
+    """
+    lines = []
+    for line in JS_HEADER_RE.sub('', text).splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+def compressors(use_brotli=True):
+    """Варианты сжатия: {расширение: функция}; brotli — только если установлен"""
+    variants = {'.gz': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if use_brotli:
+        try:
+            import brotli
+        except ImportError:
+            return variants
+        variants['.br'] = lambda data: brotli.compress(data, quality=11)
+    return variants
+
+
+def hashed_name(name, data):
+    """Имя файла с хешем содержимого: style.css -> style.<хеш>.css"""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    path = Path(name)
+    return path.with_name(f'{path.stem}.{digest}{path.suffix}').as_posix()
+
+
+def write_atomic(path, data):
+    """Запись файла через временный файл и переименование"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def source_files(static_dir):
+    """CSS и JS из папки static (кроме собранных)"""
+    dist = static_dir / DIST_DIR
+    return sorted(
+        path for path in static_dir.rglob('*')
+        if path.is_file() and path.suffix in MINIFIERS and dist not in path.parents
+    )
+
+
+def build(static_dir='static', use_brotli=True):
+    """
+    Сборка static/dist и манифеста
+
+    Неизменившиеся файлы не перезаписываются, файлы прошлых версий удаляются.
+
+    Returns:
+        dict: статистика (assets, written, removed, original, minified, gzip, brotli — байты)
+    """
+    static_dir = Path(static_dir)
+    dist = static_dir / DIST_DIR
+    variants = compressors(use_brotli)
+    manifest = {}
+    keep = {MANIFEST_NAME}
+    stats = {'assets': 0, 'written': 0, 'removed': 0, 'original': 0, 'minified': 0, 'gzip': 0, 'brotli': 0}
+
+    for path in source_files(static_dir):
+        name = path.relative_to(static_dir).as_posix()
+        source = path.read_bytes()
+        data = MINIFIERS[path.suffix](source.decode('utf-8')).encode('utf-8')
+        target = hashed_name(name, data)
+        manifest[name] = target
+
+        outputs = {target: data}
+        outputs.update({target + suffix: compress(data) for suffix, compress in variants.items()})
+        for output, content in outputs.items():
+            keep.add(output)
+            output_path = dist / output
+            if not output_path.exists():
+                write_atomic(output_path, content)
+                stats['written'] += 1
+
+        stats['assets'] += 1
+        stats['original'] += len(source)
+        stats['minified'] += len(data)
+        stats['gzip'] += (dist / (target + '.gz')).stat().st_size
+        if '.br' in variants:
+            stats['brotli'] += (dist / (target + '.br')).stat().st_size
+
+    write_atomic(dist / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    # Старые версии файлов больше не упоминаются в манифесте
+    for path in dist.rglob('*'):
+        if path.is_file() and path.relative_to(dist).as_posix() not in keep:
+            path.unlink()
+            stats['removed'] += 1
+
+    return stats
+
+
+def load_manifest(static_dir='static'):
+    """Манифест {исходное имя: имя в dist}; пустой, если сборки нет"""
+    try:
+        with open(Path(static_dir) / DIST_DIR / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv=None):
+    """Сборка статики"""
+    parser = argparse.ArgumentParser(description='Сборка статики PortfolioHub')
+    parser.add_argument('--static-dir', default='static', help='Папка со статикой')
+    parser.add_argument('--no-brotli', dest='brotli', action='store_false', help='Не создавать .br')
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("  Сборка статики PortfolioHub")
+    print("=" * 70)
+    print()
+
+    if not Path(args.static_dir).exists():
+        print(f"❌ Папка '{args.static_dir}' не найдена!")
+        sys.exit(1)
+
+    stats = build(args.static_dir, args.brotli)
+    for name, target in load_manifest(args.static_dir).items():
+        print(f"✅ {name} -> {DIST_DIR}/{target}")
+
+    print()
+    print("=" * 70)
+    print(f"  📦 Файлов: {stats['assets']} (записано: {stats['written']}, удалено старых: {stats['removed']})")
+    print(f"  📉 Размер: {stats['original']} -> {stats['minified']} байт, gzip: {stats['gzip']}"
+          + (f", brotli: {stats['brotli']}" if stats['brotli'] else " (brotli не установлен)"))
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
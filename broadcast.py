@@ -0,0 +1,181 @@
+"""
+Команды для всех процессов сервера: общий журнал в файле.
+
+serve.py запускает несколько воркеров gunicorn, и у каждого свои данные и
+свои подписчики /api/events. Запрос, меняющий данные (`/api/refresh`,
+вебхук GitHub), попадает только в один воркер. Поэтому воркер не меняет
+данные сам, а дописывает команду в журнал, и каждый процесс перед загрузкой
+данных применяет команды, которых еще не видел. Проверка без новых команд —
+один os.stat.
+
+Журнал — строки JSON `{"seq": номер, "key": ключ или null, "message": ...}`,
+запись под flock. Команда с ключом (ID доставки вебхука) записывается
+один раз: повторная доставка, пришедшая в другой воркер, не применяется
+второй раз. В файле остаются последние `limit`..2*`limit` команд: при
+переполнении он заменяется новым (os.replace). Процесс, пропустивший
+вытесненные команды, получает команду `{'type': 'resync'}`.
+
+Без файла (path=None, один процесс) журнал хранится в памяти.
+
+    bus = Broadcast('/tmp/portfoliohub.bus')
+    seq = bus.publish({'type': 'refresh', 'scope': 'local'})
+    for seq, message in bus.poll():
+        ...
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: один процесс, блокировки файла не нужны
+    fcntl = None
+
+# Команда для процесса, который пропустил вытесненные из журнала команды
+RESYNC = {'type': 'resync'}
+
+
+class Broadcast:
+    """Журнал команд, общий для процессов (файл) или для потоков одного процесса"""
+
+    def __init__(self, path=None, limit=1024):
+        self.path = path
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._keys = OrderedDict()
+        self._pending = []
+        # Прочитанная часть файла: (inode, seq первой строки, размер), число строк
+        self._file_state = None
+        self._lines = 0
+
+    def publish(self, message, key=None):
+        """
+        Добавить команду для всех процессов
+
+        Returns:
+            int | None: номер команды; None, если команда с таким key уже есть
+        """
+        with self._lock:
+            if self.path is None:
+                if key is not None and key in self._keys:
+                    return None
+                self._seq += 1
+                self._pending.append((self._seq, message))
+                self._remember(key, self._seq)
+                return self._seq
+
+            with self._locked() as f:
+                self._sync(f)
+                if key is not None and key in self._keys:
+                    return None
+                seq = self._seq + 1
+                entry = {'seq': seq, 'key': key, 'message': message}
+                f.seek(0, os.SEEK_END)
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+                f.flush()
+                self._sync(f)
+                if self._lines > 2 * self.limit:
+                    self._trim(f)
+                return seq
+
+    def pending(self):
+        """Есть ли непрочитанные команды (без блокировок, для частых проверок)"""
+        if self._pending or self.path is None:
+            return bool(self._pending)
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        state = self._file_state
+        return state is None or (stat.st_ino, stat.st_size) != (state[0], state[2])
+
+    def poll(self):
+        """
+        Новые команды с прошлого вызова (в этом процессе)
+
+        Returns:
+            List[tuple]: (номер, команда) по порядку
+        """
+        if not self.pending():
+            return []
+        with self._lock:
+            if self.path is not None:
+                with self._locked(exclusive=False) as f:
+                    self._sync(f)
+            pending, self._pending = self._pending, []
+            return pending
+
+    def _remember(self, key, seq):
+        if key is None:
+            return
+        self._keys[key] = seq
+        while len(self._keys) > 2 * self.limit:
+            self._keys.popitem(last=False)
+
+    @contextmanager
+    def _locked(self, exclusive=True):
+        """Текущий файл журнала под flock (открывается заново, если его заменили)"""
+        while True:
+            f = open(self.path, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(f.fileno()).st_ino:
+                break
+            f.close()
+        try:
+            yield f
+        finally:
+            f.close()
+
+    def _sync(self, f):
+        """Дочитать строки, добавленные с прошлого раза (вызывается под _locked())"""
+        stat = os.fstat(f.fileno())
+        f.seek(0)
+        first = f.readline()
+        # Номер inode может достаться новому файлу: файл узнаем еще и по первой команде
+        identity = (stat.st_ino, json.loads(first)['seq'] if first.endswith(b'\n') else None)
+        fresh = self._file_state is None and self._seq == 0
+        if self._file_state is None or self._file_state[:2] != identity:
+            start = 0
+            self._lines = 0
+            self._keys.clear()
+        else:
+            start = self._file_state[2]
+
+        f.seek(start)
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            entry = json.loads(line)
+            seq = entry['seq']
+            self._lines += 1
+            self._remember(entry['key'], seq)
+            if seq <= self._seq:
+                continue
+            # Новый процесс загружает данные сам: прежние команды ему не нужны
+            if not fresh:
+                if seq != self._seq + 1:
+                    self._pending.append((seq, RESYNC))
+                else:
+                    self._pending.append((seq, entry['message']))
+            self._seq = seq
+        self._file_state = (identity[0], identity[1], start + end)
+
+    def _trim(self, f):
+        """Оставить в файле последние limit команд (вызывается под _locked())"""
+        f.seek(0)
+        lines = f.read().splitlines(keepends=True)[-self.limit:]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as tmp:
+            tmp.writelines(lines)
+        os.replace(tmp_path, self.path)
+        # Новый файл дочитывается с начала: команды до self._seq уже применены
+        self._file_state = None
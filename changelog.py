@@ -0,0 +1,129 @@
+"""
+Журнал изменений набора проектов по поколениям данных.
+
+Каждое новое поколение (app.get_all_projects) записывается как список
+добавленных, измененных и удаленных ID проектов. Журнал ограничен
+`limit` последними поколениями; клиенту, который отстал сильнее (или чье
+поколение этому процессу неизвестно), возвращается признак resync — ему
+нужно заново загрузить полный список.
+
+    log = Changelog(limit=256)
+    log.record(1, 'a1b2...', None, projects)        # первая загрузка — точка отсчета
+    log.record(2, 'c3d4...', projects, new_projects)
+    log.since(1)    # {'added': [...], 'updated': [...], 'removed': [...]} или None
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+
+
+class Changelog:
+    """Ограниченный журнал изменений: поколение -> добавленные/измененные/удаленные ID"""
+
+    def __init__(self, limit=256):
+        self.limit = limit
+        self._entries = deque(maxlen=limit)
+        # Самое раннее поколение, от которого еще можно посчитать изменения
+        self._base = None
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def diff(previous, projects):
+        """
+        Изменения между двумя списками проектов
+
+        Проекты сравниваются сначала по идентичности объекта (неизменившиеся
+        источники отдают те же объекты), затем по содержимому.
+
+        Returns:
+            Tuple[list, list, list]: (added, updated, removed) — ID проектов
+        """
+        old = {project['id']: project for project in previous}
+        added = []
+        updated = []
+        for project in projects:
+            before = old.pop(project['id'], None)
+            if before is None:
+                added.append(project['id'])
+            elif before is not project and before != project:
+                updated.append(project['id'])
+        return added, updated, list(old)
+
+    def record(self, generation, version, previous, projects):
+        """
+        Запись нового поколения
+
+        Args:
+            version: версия содержимого поколения (префикс хеша)
+            previous: проекты прошлого поколения или None при первой загрузке
+
+        Returns:
+            Tuple[list, list, list] | None: (added, updated, removed) или None
+                для точки отсчета
+        """
+        with self._lock:
+            if previous is None or self._base is None:
+                self._entries.clear()
+                self._versions = {generation: version}
+                self._base = generation
+                return None
+            added, updated, removed = self.diff(previous, projects)
+            if len(self._entries) == self.limit:
+                # Самая старая запись вытесняется: от ее поколения изменений уже не посчитать
+                oldest = self._entries[0]['generation']
+                self._versions.pop(self._base, None)
+                self._base = oldest
+            self._entries.append({
+                'generation': generation,
+                'added': added,
+                'updated': updated,
+                'removed': removed,
+                'timestamp': datetime.now()
+            })
+            self._versions[generation] = version
+            return added, updated, removed
+
+    def since(self, generation, version=None):
+        """
+        Суммарные изменения после поколения `generation`
+
+        Изменения одного проекта в нескольких поколениях объединяются:
+        добавленный, а затем удаленный проект в ответ не попадает, удаленный
+        и добавленный снова считается измененным.
+
+        Args:
+            version: версия содержимого поколения у клиента; если не совпадает
+                с известной этому процессу, нужен resync
+
+        Returns:
+            dict с ключами added, updated, removed (ID) или None — нужен resync
+        """
+        with self._lock:
+            if self._base is None or generation not in self._versions:
+                return None
+            if version is not None and self._versions[generation] != version:
+                return None
+
+            states = {}
+            for entry in self._entries:
+                if entry['generation'] <= generation:
+                    continue
+                for project_id in entry['added']:
+                    # Удален и снова добавлен — для клиента это изменение
+                    states[project_id] = 'updated' if states.get(project_id) == 'removed' else 'added'
+                for project_id in entry['updated']:
+                    if states.get(project_id) != 'added':
+                        states[project_id] = 'updated'
+                for project_id in entry['removed']:
+                    if states.get(project_id) == 'added':
+                        # Клиент этого проекта не видел
+                        del states[project_id]
+                    else:
+                        states[project_id] = 'removed'
+
+        changes = {'added': [], 'updated': [], 'removed': []}
+        for project_id, state in states.items():
+            changes[state].append(project_id)
+        return changes
@@ -1,21 +1,57 @@
 import os
-from dotenv import load_dotenv
 
-# Загрузка переменных окружения из .env файла
-load_dotenv()
+# Загрузка переменных окружения из .env файла (python-dotenv импортируется,
+# только если файл есть: на хостинге переменные задаются окружением)
+if os.path.exists('.env') or os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 class Config:
     """Конфигурация приложения"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     PROJECTS_DIR = 'projects'
+    PROJECTS_PACK = os.environ.get('PROJECTS_PACK', 'projects.pack')  # Собирается: python projectpack.py build
     
     # GitHub API настройки
     GITHUB_USERNAME = os.environ.get('GITHUB_USERNAME') or 'dettline1'
     GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')  # Опционально, но увеличивает лимит
     GITHUB_API_URL = 'https://api.github.com'
+    # Несколько аккаунтов и организаций: "user:alice, org:acme#portfolio+web@600"
+    # (#топики — фильтр репозиториев, @секунды — свой TTL кэша). Пусто — только GITHUB_USERNAME
+    GITHUB_SOURCES = os.environ.get('GITHUB_SOURCES', '')
+    GITHUB_RETRY_AFTER = int(os.environ.get('GITHUB_RETRY_AFTER', 60))  # Повтор источника после ошибки, секунд
+    GITHUB_CONCURRENCY = int(os.environ.get('GITHUB_CONCURRENCY', 8))  # Параллельных запросов к API
+    GITHUB_TIMEOUT = float(os.environ.get('GITHUB_TIMEOUT', 10))  # Таймаут одного запроса, секунд
+    GITHUB_BUDGET = float(os.environ.get('GITHUB_BUDGET', 15))  # Лимит на всю загрузку, секунд
+    # Все языки каждого репозитория (+1 запрос на репозиторий, выполняются параллельно)
+    GITHUB_FETCH_LANGUAGES = os.environ.get('GITHUB_FETCH_LANGUAGES', '').lower() in ('1', 'true', 'yes')
+    # Секрет вебхука GitHub (/api/github/webhook); пусто — вебхук отключен
+    GITHUB_WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET', '')
+    WEBHOOK_DELIVERIES = int(os.environ.get('WEBHOOK_DELIVERIES', 1024))  # Команд в журнале (broadcast.py) для защиты от повторов
     
     # Кэширование
     CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', 3600))  # 1 час по умолчанию
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR', '.jinja-cache')  # Байткод шаблонов; пусто — отключить
+    CHANGELOG_LIMIT = int(os.environ.get('CHANGELOG_LIMIT', 256))  # Поколений в журнале /api/projects/changes
+    # Прогрев кэшей в фоне сразу после старта; до его окончания /health отвечает 503
+    WARMUP_ON_BOOT = os.environ.get('WARMUP_ON_BOOT', '').lower() in ('1', 'true', 'yes')
+    
+    # Уведомления об изменениях (server-sent events, /api/events)
+    EVENTS_PORT = int(os.environ.get('EVENTS_PORT', 0))  # Асинхронный сервер SSE; 0 — уведомления отключены
+    EVENTS_HOST = os.environ.get('EVENTS_HOST', '127.0.0.1')
+    EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15))  # Пауза между heartbeat, секунд
+    EVENTS_QUEUE = int(os.environ.get('EVENTS_QUEUE', 32))  # Очередь клиента; при переполнении поток закрывается
+    EVENTS_REPLAY = int(os.environ.get('EVENTS_REPLAY', 64))  # Событий в истории для Last-Event-ID
+    EVENTS_REFRESH = float(os.environ.get('EVENTS_REFRESH', 60))  # Проверка данных при подписчиках, секунд
+    # Журнал команд для всех воркеров (broadcast.py): сброс кэша, вебхуки.
+    # serve.py с несколькими воркерами создает временный файл сам; пусто — в памяти процесса
+    BROADCAST_FILE = os.environ.get('BROADCAST_FILE', '')
+    
+    # История звезд и форков (history.py, /api/history, /api/trending)
+    HISTORY_FILE = os.environ.get('HISTORY_FILE', '')  # Например history.bin; пусто — история отключена
+    HISTORY_RAW_DAYS = int(os.environ.get('HISTORY_RAW_DAYS', 30))  # Старше — одна запись на день
+    HISTORY_DAILY_DAYS = int(os.environ.get('HISTORY_DAILY_DAYS', 365))  # Старше — одна запись на неделю
+    HISTORY_COMPACT_INTERVAL = int(os.environ.get('HISTORY_COMPACT_INTERVAL', 86400))  # Сжатие не чаще, секунд
     
     # Информация об авторе
     AUTHOR_INFO = {
@@ -32,4 +68,8 @@ class Config:
     # Настройки сайта
     SITE_URL = 'https://yourdomain.com'  # Измените на свой домен
     SITE_TITLE = 'Daniil Projects'
+    
+    # Sitemap
+    SITEMAP_MAX_URLS = 50000  # Лимит адресов в одном файле по протоколу sitemaps.org
+    SITEMAP_PROJECT_URL = os.environ.get('SITEMAP_PROJECT_URL')  # Например: /projects/{id}
 
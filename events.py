@@ -0,0 +1,216 @@
+"""
+Server-sent events: уведомления об изменениях набора проектов.
+
+EventHub живет на собственном event loop в отдельном потоке (LoopThread).
+Каждый подписчик — это корутина и ограниченная очередь, а не поток, поэтому
+тысячи простаивающих соединений почти ничего не стоят. Если клиент не
+успевает читать и его очередь переполнилась, поток для него закрывается:
+браузер переподключится с `Last-Event-ID` и получит пропущенное из истории.
+
+Последние события хранятся в кольцевом буфере. При переподключении с
+`Last-Event-ID` клиент получает все события после него; если такого события
+уже нет в буфере (или оно из другого процесса), приходит событие `resync`.
+Пока есть подписчики, хаб периодически вызывает `refresh` (загрузку данных),
+чтобы изменения в GitHub доходили до клиентов без входящих запросов, а раз в
+секунду — `changed`: команды, принятые другими воркерами (broadcast.py),
+доходят до подписчиков этого воркера сразу.
+
+События отдает асинхронный сервер aiohttp на том же loop (serve(), порт
+EVENTS_PORT), не занимая потоков WSGI-сервера.
+"""
+
+import asyncio
+import json
+import threading
+import traceback
+from collections import deque
+
+from github_client import LoopThread
+
+# Заголовки ответа: без кэширования и без буферизации в nginx
+SSE_HEADERS = {
+    'Content-Type': 'text/event-stream; charset=utf-8',
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+# Пауза перед переподключением браузера, мс
+RETRY_MS = 5000
+
+# Как часто хаб с подписчиками вызывает changed(), секунд
+CHECK_INTERVAL = 1
+
+
+def format_event(event_id, event, data):
+    """Событие в формате text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class EventHub:
+    """Рассылка событий подписчикам SSE с историей для Last-Event-ID"""
+
+    def __init__(self, replay=64, queue_size=32, heartbeat=15, refresh=None, refresh_interval=60, changed=None):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.refresh = refresh
+        self.refresh_interval = refresh_interval
+        # Дешевая проверка (например, новые команды broadcast.py): True — refresh сразу
+        self.changed = changed
+        self.loop_thread = LoopThread('events')
+        self._history = deque(maxlen=replay)
+        self._head = None
+        self._subscribers = set()
+        self._refresher = None
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self):
+        """Число подключенных клиентов"""
+        with self._lock:
+            return len(self._subscribers)
+
+    def reset(self, event_id, state):
+        """
+        Новая точка отсчета без рассылки (например, первая загрузка данных)
+
+        Args:
+            state: данные событий ready/resync — текущее состояние
+        """
+        with self._lock:
+            self._history.clear()
+            # Точка отсчета без сообщения: клиент, подключившийся к ней, получит все после нее
+            self._history.append((event_id, None))
+            self._head = (event_id, state)
+
+    def publish(self, event_id, event, data, state=None):
+        """
+        Отправка события всем подписчикам; можно вызывать из любого потока
+
+        Args:
+            state: текущее состояние для ready/resync (по умолчанию data)
+        """
+        message = format_event(event_id, event, data)
+        with self._lock:
+            self._history.append((event_id, message))
+            self._head = (event_id, data if state is None else state)
+            if not self._subscribers:
+                return
+        self.loop_thread.loop.call_soon_threadsafe(self._deliver, message)
+
+    def _deliver(self, message):
+        with self._lock:
+            queues = list(self._subscribers)
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Клиент не успевает читать: закрываем поток, он переподключится
+                # с Last-Event-ID и получит пропущенное из истории
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def _backlog(self, last_event_id):
+        # Вызывается под self._lock
+        if self._head is None:
+            return []
+        head_id, head_data = self._head
+        if not last_event_id:
+            return [format_event(head_id, 'ready', head_data)]
+        if last_event_id == head_id:
+            return []
+        ids = [event_id for event_id, _ in self._history]
+        if last_event_id in ids:
+            missed = list(self._history)[ids.index(last_event_id) + 1:]
+            return [message for _, message in missed if message is not None]
+        return [format_event(head_id, 'resync', head_data)]
+
+    async def _refresh_loop(self):
+        loop = asyncio.get_running_loop()
+        waited = 0
+        while self.subscribers:
+            await asyncio.sleep(CHECK_INTERVAL)
+            waited += CHECK_INTERVAL
+            if waited < self.refresh_interval and not (self.changed and self.changed()):
+                continue
+            waited = 0
+            try:
+                # Загрузка данных синхронная: выполняем ее в пуле потоков
+                await loop.run_in_executor(None, self.refresh)
+            except Exception:
+                traceback.print_exc()
+
+    async def stream(self, last_event_id=None):
+        """
+        Поток сообщений для одного клиента (асинхронный генератор байтов)
+
+        Начинается с `ready` (текущее поколение), пропущенных событий после
+        last_event_id или `resync`; во время простоя — комментарии-heartbeat.
+        """
+        queue = asyncio.Queue(self.queue_size)
+        with self._lock:
+            backlog = self._backlog(last_event_id)
+            self._subscribers.add(queue)
+        if self.refresh and (self._refresher is None or self._refresher.done()):
+            self._refresher = asyncio.ensure_future(self._refresh_loop())
+        try:
+            yield f'retry: {RETRY_MS}\n\n'.encode('ascii')
+            for message in backlog:
+                yield message
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield b': ping\n\n'
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            with self._lock:
+                self._subscribers.discard(queue)
+
+def make_app(hub, path='/api/events'):
+    """Приложение aiohttp с одним маршрутом SSE"""
+    from aiohttp import web
+
+    async def handle(request):
+        response = web.StreamResponse(headers=SSE_HEADERS)
+        await response.prepare(request)
+        stream = hub.stream(request.headers.get('Last-Event-ID'))
+        try:
+            async for message in stream:
+                await response.write(message)
+        except ConnectionResetError:
+            # Клиент отключился: заметим при следующем сообщении или heartbeat
+            pass
+        finally:
+            await stream.aclose()
+        return response
+
+    app = web.Application()
+    app.router.add_get(path, handle)
+    return app
+
+
+def serve(hub, host='127.0.0.1', port=8001, path='/api/events'):
+    """
+    Запуск сервера SSE на loop хаба (не блокирует)
+
+    reuse_port позволяет каждому воркеру gunicorn слушать один и тот же порт:
+    соединения распределяет ядро.
+    """
+    from aiohttp import web
+
+    async def start():
+        runner = web.AppRunner(make_app(hub, path), handle_signals=False, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port, reuse_port=True).start()
+        return runner
+
+    return hub.loop_thread.run(start())
@@ -1,27 +1,64 @@
 """
 Скрипт для экспорта всех проектов в различные форматы
+
+Проекты читаются один раз и потоком передаются сразу всем выбранным форматам.
+Каждый формат пишется инкрементально: память не зависит от числа проектов.
+
+Повторный запуск опирается на манифест `.export-manifest.json` с хешами
+содержимого проектов: перечитываются только изменившиеся info.json,
+неизменные фрагменты файлов копируются из прошлого экспорта, а форматы без
+изменений не переписываются вовсе. Первый запуск и `--full` пишут все
+форматы за один проход по проектам.
+
+Примеры:
+    python export_projects.py
+    python export_projects.py --formats json,ndjson --parallel
+    python export_projects.py --full
 """
 
-import json
+import argparse
 import csv
+import hashlib
+import io
+import json
+import os
+import queue
+import shutil
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+from projectpack import open_pack, scan_listing
+
 # Исправление кодировки для Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
-def load_projects():
-    """Загрузка всех проектов"""
-    projects = []
-    projects_dir = Path('projects')
-    
+def iter_projects(projects_dir='projects'):
+    """Потоковая загрузка проектов: по одному info.json за раз (из pack-файла, если он актуален)"""
+    projects_dir = Path(projects_dir)
+
     if not projects_dir.exists():
-        return projects
-    
-    for project_dir in projects_dir.iterdir():
+        return
+
+    pack = open_pack(projects_dir)
+    if pack is not None:
+        with pack:
+            for name, raw in pack.items():
+                try:
+                    project_data = json.loads(raw.decode('utf-8'))
+                    project_data['id'] = name
+                except Exception as e:
+                    print(f"Ошибка при чтении {projects_dir / name / 'info.json'}: {e}")
+                    continue
+                yield project_data
+        return
+
+    for project_dir in sorted(projects_dir.iterdir()):
         if project_dir.is_dir():
             info_file = project_dir / 'info.json'
             if info_file.exists():
@@ -29,71 +66,150 @@ def load_projects():
                     with open(info_file, 'r', encoding='utf-8') as f:
                         project_data = json.load(f)
                         project_data['id'] = project_dir.name
-                        projects.append(project_data)
+                        yield project_data
                 except Exception as e:
                     print(f"Ошибка при чтении {info_file}: {e}")
-    
-    return projects
 
 
-def export_to_json(projects, filename='projects_export.json'):
-    """Экспорт в JSON"""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(projects, f, ensure_ascii=False, indent=2)
-    print(f"✅ Экспортировано в {filename}")
+def load_projects():
+    """Загрузка всех проектов"""
+    return list(iter_projects())
 
 
-def export_to_csv(projects, filename='projects_export.csv'):
+class ExportWriter:
+    """
+    Потоковый писатель формата экспорта.
+
+    Файл = header() + item() для каждого проекта + footer(). Заголовок и
+    подвал получают общее число проектов, поэтому пишутся после элементов.
+    """
+
+    name = ''
+    filename = ''
+    description = ''
+
+    def header(self, total, generated):
+        return ''
+
+    def item(self, index, project):
+        raise NotImplementedError
+
+    def item_key(self, index, project_key):
+        """Ключ фрагмента: при совпадении ключей item() дает одинаковый текст"""
+        return project_key
+
+    def footer(self, total, generated):
+        return ''
+
+
+class JsonWriter(ExportWriter):
+    """Экспорт в JSON (тот же вывод, что json.dump(projects, indent=2))"""
+
+    name = 'json'
+    filename = 'projects_export.json'
+    description = 'JSON формат'
+
+    def header(self, total, generated):
+        return '[\n' if total else '['
+
+    def item(self, index, project):
+        body = json.dumps(project, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        return ('  ' if index == 1 else ',\n  ') + body
+
+    def item_key(self, index, project_key):
+        # Первый элемент пишется без разделителя
+        return f'{index == 1}:{project_key}'
+
+    def footer(self, total, generated):
+        return '\n]' if total else ']'
+
+
+class NdjsonWriter(ExportWriter):
+    """Экспорт в NDJSON: один проект на строку"""
+
+    name = 'ndjson'
+    filename = 'projects_export.ndjson'
+    description = 'NDJSON (JSON Lines)'
+
+    def item(self, index, project):
+        return json.dumps(project, ensure_ascii=False) + '\n'
+
+
+class CsvWriter(ExportWriter):
     """Экспорт в CSV"""
-    if not projects:
-        print("⚠️  Нет проектов для экспорта")
-        return
-    
-    with open(filename, 'w', encoding='utf-8', newline='') as f:
-        # Определяем поля
-        fieldnames = ['id', 'name', 'description', 'tags', 'link']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        for project in projects:
-            # Преобразуем список тегов в строку
-            row = project.copy()
-            row['tags'] = ', '.join(project.get('tags', []))
-            writer.writerow(row)
-    
-    print(f"✅ Экспортировано в {filename}")
 
+    name = 'csv'
+    filename = 'projects_export.csv'
+    description = 'CSV для Excel'
+    fieldnames = ['id', 'name', 'description', 'tags', 'link']
 
-def export_to_markdown(projects, filename='projects_export.md'):
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(self._buffer, fieldnames=self.fieldnames, extrasaction='ignore')
+
+    def _take(self):
+        value = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return value
+
+    def header(self, total, generated):
+        self._writer.writeheader()
+        return self._take()
+
+    def item(self, index, project):
+        # Преобразуем список тегов в строку
+        row = project.copy()
+        row['tags'] = ', '.join(project.get('tags', []))
+        self._writer.writerow(row)
+        return self._take()
+
+
+class MarkdownWriter(ExportWriter):
     """Экспорт в Markdown"""
-    content = f"# Экспорт проектов\n\n"
-    content += f"*Сгенерировано: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n"
-    content += f"**Всего проектов: {len(projects)}**\n\n"
-    content += "---\n\n"
-    
-    for i, project in enumerate(projects, 1):
-        content += f"## {i}. {project.get('name', 'Без названия')}\n\n"
-        content += f"**ID:** `{project.get('id', 'N/A')}`\n\n"
-        content += f"**Описание:** {project.get('description', 'Нет описания')}\n\n"
-        
+
+    name = 'md'
+    filename = 'projects_export.md'
+    description = 'Markdown документ'
+
+    def header(self, total, generated):
+        return (
+            f"# Экспорт проектов\n\n"
+            f"*Сгенерировано: {generated}*\n\n"
+            f"**Всего проектов: {total}**\n\n"
+            "---\n\n"
+        )
+
+    def item(self, index, project):
+        parts = [
+            f"## {index}. {project.get('name', 'Без названия')}\n\n",
+            f"**ID:** `{project.get('id', 'N/A')}`\n\n",
+            f"**Описание:** {project.get('description', 'Нет описания')}\n\n"
+        ]
+
         if project.get('tags'):
             tags_str = ' '.join([f'`{tag}`' for tag in project['tags']])
-            content += f"**Технологии:** {tags_str}\n\n"
-        
+            parts.append(f"**Технологии:** {tags_str}\n\n")
+
         if project.get('link'):
-            content += f"**Ссылка:** [{project['link']}]({project['link']})\n\n"
-        
-        content += "---\n\n"
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
-    print(f"✅ Экспортировано в {filename}")
+            parts.append(f"**Ссылка:** [{project['link']}]({project['link']})\n\n")
 
+        parts.append("---\n\n")
+        return ''.join(parts)
 
-def export_to_html(projects, filename='projects_export.html'):
+    def item_key(self, index, project_key):
+        return f'{index}:{project_key}'
+
+
+class HtmlWriter(ExportWriter):
     """Экспорт в HTML таблицу"""
-    html = """<!DOCTYPE html>
+
+    name = 'html'
+    filename = 'projects_export.html'
+    description = 'HTML таблица'
+
+    def header(self, total, generated):
+        return """<!DOCTYPE html>
 <html lang="ru">
 <head>
     <meta charset="UTF-8">
@@ -148,8 +264,8 @@ def export_to_html(projects, filename='projects_export.html'):
 </head>
 <body>
     <h1>📁 Экспорт проектов</h1>
-    <p><strong>Всего проектов:</strong> """ + str(len(projects)) + """</p>
-    <p><em>Сгенерировано: """ + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + """</em></p>
+    <p><strong>Всего проектов:</strong> """ + str(total) + """</p>
+    <p><em>Сгенерировано: """ + generated + """</em></p>
     
     <table>
         <thead>
@@ -163,66 +279,502 @@ def export_to_html(projects, filename='projects_export.html'):
         </thead>
         <tbody>
 """
-    
-    for i, project in enumerate(projects, 1):
+
+    def item(self, index, project):
         tags_html = ''.join([f'<span class="tag">{tag}</span>' for tag in project.get('tags', [])])
-        
-        html += f"""            <tr>
-                <td>{i}</td>
+
+        return f"""            <tr>
+                <td>{index}</td>
                 <td><strong>{project.get('name', 'Без названия')}</strong></td>
                 <td>{project.get('description', 'Нет описания')}</td>
                 <td>{tags_html}</td>
                 <td><a href="{project.get('link', '#')}" target="_blank">GitHub</a></td>
             </tr>
 """
-    
-    html += """        </tbody>
+
+    def item_key(self, index, project_key):
+        return f'{index}:{project_key}'
+
+    def footer(self, total, generated):
+        return """        </tbody>
     </table>
 </body>
 </html>
 """
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(html)
-    
+
+
+WRITERS = {writer.name: writer for writer in (JsonWriter, CsvWriter, MarkdownWriter, HtmlWriter, NdjsonWriter)}
+DEFAULT_FORMATS = ['json', 'csv', 'md', 'html']
+
+# Тело файла держим в памяти до этого размера, дальше — во временном файле
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+class FormatSink:
+    """Приемник одного формата: копит тело во временном файле и собирает итоговый файл"""
+
+    def __init__(self, writer, path):
+        self.writer = writer
+        self.path = Path(path)
+        self.body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        # Фрагменты [ключ, смещение, длина] для манифеста инкрементального экспорта
+        self.segments = []
+        self._position = 0
+
+    def put(self, index, project, key=None):
+        data = self.writer.item(index, project).encode('utf-8')
+        self.body.write(data)
+        if key is not None:
+            self.segments.append([key, self._position, len(data)])
+        self._position += len(data)
+
+    def finish(self, total, generated):
+        """Заголовок + тело + подвал во временный файл рядом с целевым, затем замена"""
+        tmp_path = self.path.with_name(f'.{self.path.name}.{os.getpid()}.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                header_size = f.write(self.writer.header(total, generated).encode('utf-8'))
+                self.body.seek(0)
+                shutil.copyfileobj(self.body, f)
+                f.write(self.writer.footer(total, generated).encode('utf-8'))
+            os.replace(tmp_path, self.path)
+        finally:
+            self.body.close()
+            if tmp_path.exists():
+                tmp_path.unlink()
+        # Смещения фрагментов — от начала файла, после заголовка
+        for segment in self.segments:
+            segment[1] += header_size
+
+
+class ThreadedSink:
+    """Приемник формата в отдельном потоке; проекты передаются пачками через ограниченную очередь"""
+
+    def __init__(self, sink, batch_size=512, maxsize=8):
+        self.sink = sink
+        self.error = None
+        self.batch_size = batch_size
+        self._batch = []
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            if self.error is None:
+                try:
+                    for index, project, key in batch:
+                        self.sink.put(index, project, key)
+                except Exception as e:
+                    self.error = e
+
+    def put(self, index, project, key=None):
+        self._batch.append((index, project, key))
+        if len(self._batch) >= self.batch_size:
+            self._queue.put(self._batch)
+            self._batch = []
+
+    def finish(self, total, generated):
+        if self._batch:
+            self._queue.put(self._batch)
+            self._batch = []
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            self.sink.body.close()
+            raise self.error
+        self.sink.finish(total, generated)
+
+
+def export_projects(projects, formats=None, output_dir='.', parallel=False, filenames=None):
+    """
+    Экспорт за один проход по проектам во все выбранные форматы
+
+    Args:
+        projects: итерируемый набор проектов (может быть генератором)
+        formats: список форматов из WRITERS (по умолчанию DEFAULT_FORMATS)
+        output_dir: папка для файлов экспорта
+        parallel: писать каждый формат в отдельном потоке
+        filenames: переопределение имен файлов {формат: имя}
+
+    Returns:
+        Tuple[int, dict]: (число проектов, {формат: путь к файлу})
+    """
+    formats = formats or DEFAULT_FORMATS
+    filenames = filenames or {}
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    paths = {}
+    sinks = []
+    for name in formats:
+        writer = WRITERS[name]()
+        paths[name] = Path(output_dir) / filenames.get(name, writer.filename)
+        sink = FormatSink(writer, paths[name])
+        sinks.append(ThreadedSink(sink) if parallel else sink)
+
+    total = 0
+    for total, project in enumerate(projects, 1):
+        for sink in sinks:
+            sink.put(total, project)
+
+    for sink in sinks:
+        sink.finish(total, generated)
+
+    return total, paths
+
+
+def export_to_json(projects, filename='projects_export.json'):
+    """Экспорт в JSON"""
+    export_projects(projects, ['json'], filenames={'json': filename})
+    print(f"✅ Экспортировано в {filename}")
+
+
+def export_to_csv(projects, filename='projects_export.csv'):
+    """Экспорт в CSV"""
+    if not projects:
+        print("⚠️  Нет проектов для экспорта")
+        return
+
+    export_projects(projects, ['csv'], filenames={'csv': filename})
+    print(f"✅ Экспортировано в {filename}")
+
+
+def export_to_markdown(projects, filename='projects_export.md'):
+    """Экспорт в Markdown"""
+    export_projects(projects, ['md'], filenames={'md': filename})
+    print(f"✅ Экспортировано в {filename}")
+
+
+def export_to_html(projects, filename='projects_export.html'):
+    """Экспорт в HTML таблицу"""
+    export_projects(projects, ['html'], filenames={'html': filename})
     print(f"✅ Экспортировано в {filename}")
 
 
-def main():
+MANIFEST_NAME = '.export-manifest.json'
+
+# Сколько разобранных info.json держать в памяти между сканированием и записью
+PARSED_CACHE_LIMIT = 4096
+
+
+def load_manifest(path):
+    """Загрузка манифеста экспорта (пустой словарь, если его нет или он поврежден)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get('version') == 1 else {}
+
+
+def scan_projects(projects_dir, previous, pack=None):
+    """
+    Stat-проход по проектам: читаются и хешируются только изменившиеся info.json
+
+    Returns:
+        Tuple[dict, dict]: ({id: запись манифеста}, {id: разобранный проект})
+    """
+    entries = {}
+    parsed = {}
+    if pack is not None:
+        listing = [(name, mtime_ns, size, i) for i, (name, mtime_ns, size) in enumerate(pack.listing())]
+    else:
+        listing = [(name, mtime_ns, size, None) for name, mtime_ns, size in scan_listing(projects_dir)]
+
+    for name, mtime_ns, size, pack_index in listing:
+        old = previous.get(name)
+        if old and old['mtime_ns'] == mtime_ns and old['size'] == size:
+            entries[name] = old
+            continue
+
+        try:
+            raw = pack.raw(pack_index) if pack is not None else (Path(projects_dir) / name / 'info.json').read_bytes()
+        except OSError:
+            continue
+        entry = {
+            'mtime_ns': mtime_ns,
+            'size': size,
+            'hash': hashlib.sha256(raw).hexdigest(),
+            'error': None
+        }
+        try:
+            project_data = json.loads(raw.decode('utf-8'))
+            if len(parsed) < PARSED_CACHE_LIMIT:
+                project_data['id'] = name
+                parsed[name] = project_data
+        except Exception as e:
+            entry['error'] = str(e)
+        entries[name] = entry
+    return entries, parsed
+
+
+def _file_intact(path, record):
+    """Файл экспорта не менялся с момента записи в манифест"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return False
+    return stat.st_size == record.get('size') and stat.st_mtime_ns == record.get('mtime_ns')
+
+
+def write_format(writer, path, projects, total, generated, load_project, previous=None):
+    """
+    Запись одного формата с переиспользованием неизменившихся фрагментов
+
+    Фрагменты, ключ которых совпадает с ключом из прошлого экспорта, копируются
+    байтами из старого файла; остальные рендерятся заново.
+
+    Returns:
+        Tuple[str, dict]: (статус: written/patched/skipped, запись манифеста)
+    """
+    keys = [writer.item_key(index, f"{project_id}:{project_hash}")
+            for index, (project_id, project_hash) in enumerate(projects, 1)]
+
+    reusable = {}
+    if previous and _file_intact(path, previous):
+        if (previous['total'] == total and previous['generated'] == generated and
+                [segment[0] for segment in previous['segments']] == keys):
+            return 'skipped', previous
+        reusable = {key: (offset, length) for key, offset, length in previous['segments']}
+
+    segments = []
+    reused = 0
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as out, (open(path, 'rb') if reusable else io.BytesIO()) as old:
+            position = out.write(writer.header(total, generated).encode('utf-8'))
+            # Соседние фрагменты старого файла копируются одним куском
+            copy_start = copy_end = None
+
+            def flush_copy():
+                if copy_start is not None:
+                    old.seek(copy_start)
+                    out.write(old.read(copy_end - copy_start))
+
+            for index, ((project_id, _), key) in enumerate(zip(projects, keys), 1):
+                if key in reusable:
+                    offset, length = reusable[key]
+                    if copy_end != offset:
+                        flush_copy()
+                        copy_start = offset
+                    copy_end = offset + length
+                    reused += 1
+                else:
+                    flush_copy()
+                    copy_start = copy_end = None
+                    data = writer.item(index, load_project(project_id)).encode('utf-8')
+                    out.write(data)
+                    length = len(data)
+                segments.append([key, position, length])
+                position += length
+            flush_copy()
+            out.write(writer.footer(total, generated).encode('utf-8'))
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    stat = path.stat()
+    record = {
+        'file': path.name,
+        'total': total,
+        'generated': generated,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'segments': segments
+    }
+    return ('patched' if reused else 'written'), record
+
+
+def write_formats_once(writers, projects, total, generated, load_project, parallel=False):
+    """
+    Полная запись нескольких форматов за один проход по проектам
+
+    Каждый проект загружается один раз и передается сразу всем форматам
+    (FormatSink), фрагменты запоминаются для следующего инкрементального запуска.
+
+    Args:
+        writers: {формат: (писатель, путь)}
+
+    Returns:
+        dict: {формат: ('written', запись манифеста)}
+    """
+    sinks = {}
+    for name, (writer, path) in writers.items():
+        sink = FormatSink(writer, path)
+        sinks[name] = (sink, ThreadedSink(sink) if parallel else sink)
+
+    for index, (project_id, project_hash) in enumerate(projects, 1):
+        project = load_project(project_id)
+        for sink, target in sinks.values():
+            target.put(index, project, sink.writer.item_key(index, f"{project_id}:{project_hash}"))
+
+    results = {}
+    for name, (sink, target) in sinks.items():
+        target.finish(total, generated)
+        stat = sink.path.stat()
+        results[name] = ('written', {
+            'file': sink.path.name,
+            'total': total,
+            'generated': generated,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'segments': sink.segments
+        })
+    return results
+
+
+def export_incremental(projects_dir='projects', formats=None, output_dir='.', full=False, parallel=False):
+    """
+    Инкрементальный экспорт по манифесту хешей содержимого проектов
+
+    Результат побайтно совпадает с полным экспортом (`full=True`): отметка
+    "Сгенерировано" меняется только вместе с содержимым набора проектов.
+
+    Returns:
+        dict: total, changed, removed, errors и статусы форматов {формат: (статус, путь)}
+    """
+    formats = formats or DEFAULT_FORMATS
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest_path = out / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    previous_projects = {} if full else manifest.get('projects', {})
+    previous_formats = {} if full else manifest.get('formats', {})
+
+    pack = open_pack(projects_dir)
+    pack_index = {name: i for i, (name, _, _) in enumerate(pack.listing())} if pack is not None else {}
+    entries, parsed = scan_projects(projects_dir, previous_projects, pack)
+    errors = {project_id: entry['error'] for project_id, entry in entries.items() if entry['error']}
+    projects = [(project_id, entry['hash']) for project_id, entry in entries.items() if not entry['error']]
+    old_hashes = {project_id: entry['hash'] for project_id, entry in manifest.get('projects', {}).items()}
+
+    digest = hashlib.sha256(json.dumps(projects).encode('utf-8')).hexdigest()
+    if manifest.get('digest') == digest and manifest.get('generated'):
+        generated = manifest['generated']
+    else:
+        generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def load_project(project_id):
+        project_data = parsed.get(project_id)
+        if project_data is None:
+            if project_id in pack_index:
+                project_data = json.loads(pack.raw(pack_index[project_id]).decode('utf-8'))
+            else:
+                with open(Path(projects_dir) / project_id / 'info.json', 'r', encoding='utf-8') as f:
+                    project_data = json.load(f)
+            project_data['id'] = project_id
+        return project_data
+
+    # Форматы без пригодного прошлого файла (первый запуск, --full, файл
+    # изменен) пишутся целиком за один общий проход по проектам; остальные —
+    # по отдельности, с копированием неизменившихся фрагментов
+    fresh = {}
+    incremental = []
+    for name in formats:
+        writer = WRITERS[name]()
+        path = out / writer.filename
+        if previous_formats.get(name) and _file_intact(path, previous_formats[name]):
+            incremental.append(name)
+        else:
+            fresh[name] = (writer, path)
+
+    def run(name):
+        writer = WRITERS[name]()
+        path = out / writer.filename
+        return write_format(writer, path, projects, len(projects), generated, load_project,
+                            previous_formats.get(name))
+
+    try:
+        results = write_formats_once(fresh, projects, len(projects), generated, load_project, parallel) if fresh else {}
+        if parallel and incremental:
+            with ThreadPoolExecutor(len(incremental)) as pool:
+                results.update(zip(incremental, pool.map(run, incremental)))
+        else:
+            results.update((name, run(name)) for name in incremental)
+    finally:
+        if pack is not None:
+            pack.close()
+    # Порядок форматов в отчете — как в запросе
+    results = {name: results[name] for name in formats}
+
+    format_records = {name: record for name, (status, record) in results.items()}
+    # Записи форматов, не участвовавших в этом запуске, сохраняем как есть
+    for name, record in manifest.get('formats', {}).items():
+        format_records.setdefault(name, record)
+
+    new_manifest = {
+        'version': 1,
+        'generated': generated,
+        'digest': digest,
+        'projects': entries,
+        'formats': format_records
+    }
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(new_manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+    return {
+        'total': len(projects),
+        'changed': sum(1 for project_id, project_hash in projects if old_hashes.get(project_id) != project_hash),
+        'removed': sum(1 for project_id in old_hashes if project_id not in entries),
+        'errors': errors,
+        'formats': {name: (status, out / record['file']) for name, (status, record) in results.items()}
+    }
+
+
+def main(argv=None):
     """Главная функция"""
+    parser = argparse.ArgumentParser(description='Экспорт проектов PortfolioHub')
+    parser.add_argument('--formats', default=','.join(DEFAULT_FORMATS),
+                        help=f"Форматы через запятую: {', '.join(WRITERS)} (по умолчанию {','.join(DEFAULT_FORMATS)})")
+    parser.add_argument('--output-dir', default='.', help='Папка для файлов экспорта')
+    parser.add_argument('--projects-dir', default='projects', help='Папка с проектами')
+    parser.add_argument('--parallel', action='store_true', help='Писать форматы параллельно')
+    parser.add_argument('--full', action='store_true', help='Игнорировать манифест и пересобрать все файлы')
+    args = parser.parse_args(argv)
+
+    formats = [name.strip() for name in args.formats.split(',') if name.strip()]
+    unknown = [name for name in formats if name not in WRITERS]
+    if unknown:
+        parser.error(f"Неизвестные форматы: {', '.join(unknown)}")
+
     print("=" * 70)
     print("  Экспорт проектов PortfolioHub")
     print("=" * 70)
     print()
-    
-    projects = load_projects()
-    
-    if not projects:
+
+    if not Path(args.projects_dir).exists() or next(iter_projects(args.projects_dir), None) is None:
         print("⚠️  Проекты не найдены!")
         print("   Добавьте проекты в папку /projects")
         return
-    
-    print(f"Найдено проектов: {len(projects)}\n")
-    
-    # Экспорт во все форматы
+
+    # Экспорт: переписываются только изменившиеся фрагменты
     print("Экспорт в различные форматы:\n")
-    
-    export_to_json(projects)
-    export_to_csv(projects)
-    export_to_markdown(projects)
-    export_to_html(projects)
-    
+
+    result = export_incremental(args.projects_dir, formats, args.output_dir,
+                                full=args.full, parallel=args.parallel)
+
+    for project_id, error in result['errors'].items():
+        print(f"Ошибка при чтении {Path(args.projects_dir) / project_id / 'info.json'}: {error}")
+
+    labels = {'written': '✅ Экспортировано в', 'patched': '🩹 Обновлено', 'skipped': '⏭️  Без изменений:'}
+    for name, (status, path) in result['formats'].items():
+        print(f"{labels[status]} {path}")
+    print(f"\nПроектов: {result['total']} (изменено: {result['changed']}, удалено: {result['removed']})")
+
     print("\n" + "=" * 70)
     print("✅ Экспорт завершен!")
     print("=" * 70)
-    
-    print("\nСозданные файлы:")
-    print("  • projects_export.json - JSON формат")
-    print("  • projects_export.csv - CSV для Excel")
-    print("  • projects_export.md - Markdown документ")
-    print("  • projects_export.html - HTML таблица")
+
+    print("\nФайлы экспорта:")
+    for name, (status, path) in result['formats'].items():
+        print(f"  • {path.name} - {WRITERS[name].description}")
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,344 @@
+"""
+Статическая сборка ("заморозка") портфолио для раздачи с CDN или nginx.
+
+Рендерит главную страницу, все страницы фильтров из sitemap.xml, все
+варианты сортировки, на которые ссылается index.html, а также `/api/projects`
+в выходную папку. Страницы рендерятся параллельно пулом процессов, данные
+загружаются один раз в главном процессе до запуска пула.
+
+Повторная сборка пропускает страницы, входные данные которых не изменились:
+для каждой страницы в манифесте хранится хеш контекста шаблона.
+
+Раскладка результата:
+    build/index.html                    - главная страница (`/`)
+    build/q/<query>.html                - страницы `/?<query>`
+    build/api/projects.json             - `/api/projects`
+    build/api/bundle.json               - `/api/bundle` (индекс для фильтрации в браузере)
+    build/sitemap.xml                   - `/sitemap.xml` (и `sitemap-N.xml`)
+    build/static/                       - копия папки static (со сборкой static/dist, assets.py)
+    build/nginx.conf                    - пример конфигурации nginx
+
+Пример:
+    python freeze.py --output build --jobs 4
+"""
+
+import argparse
+import filecmp
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+import assets
+
+# Исправление кодировки для Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+MANIFEST_NAME = '.freeze-manifest.json'
+
+# Страницы вне `/?<query>`: адрес -> файл в выходной папке
+DATA_PAGES = {
+    'api/projects': 'api/projects.json',
+    'api/bundle': 'api/bundle.json',
+}
+SITEMAP_RE = re.compile(r'sitemap(-[0-9]+)?\.xml')
+
+NGINX_SNIPPET = """# Пример конфигурации nginx для статической сборки PortfolioHub
+# root /path/to/build;
+
+location = / {
+    if ($args) {
+        rewrite ^ /q/$args.html? last;
+    }
+    try_files /index.html =404;
+}
+
+location = /api/projects {
+    default_type application/json;
+    try_files /api/projects.json =404;
+}
+
+location = /api/bundle {
+    default_type application/json;
+    try_files /api/bundle.json =404;
+}
+
+location ~ ^/sitemap(-[0-9]+)?\.xml$ {
+    default_type application/xml;
+}
+
+location /static/dist/ {
+    # Имена файлов содержат хеш содержимого (assets.py)
+    gzip_static on;
+    # brotli_static on;    # при установленном модуле ngx_brotli
+    add_header Cache-Control "public, max-age=31536000, immutable";
+}
+
+location /static/ {
+    expires 1h;
+}
+"""
+
+
+class LinkCollector(HTMLParser):
+    """Сбор ссылок на страницы фильтров (`?tag=...`, `/?sort=...`) из HTML"""
+
+    def __init__(self):
+        super().__init__()
+        self.queries = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        href = dict(attrs).get('href') or ''
+        if href.startswith('/?'):
+            href = href[1:]
+        if href.startswith('?') and len(href) > 1:
+            self.queries.append(href[1:])
+
+
+def data_page_file(query):
+    """Файл страницы данных (`/api/projects`, `/api/bundle`, `/sitemap.xml`) или None"""
+    if query in DATA_PAGES:
+        return DATA_PAGES[query]
+    if SITEMAP_RE.fullmatch(query):
+        return query
+    return None
+
+
+def page_file(query):
+    """Путь к файлу страницы `/?<query>` внутри выходной папки"""
+    if not query:
+        return Path('index.html')
+    if data_page_file(query):
+        return Path(data_page_file(query))
+    parts = query.split('/')
+    if any(part in ('', '.', '..') for part in parts):
+        raise ValueError(f"Недопустимый запрос для статической страницы: {query!r}")
+    return Path('q', *parts[:-1], parts[-1] + '.html')
+
+
+def normalize_query(webapp, query):
+    """
+    Запрос страницы `/?<query>` в одном написании (app.page_query)
+
+    Одна и та же страница может встретиться как `tag=a%2Fb` и `tag=a/b`:
+    без приведения она рендерилась бы дважды в разные файлы.
+    """
+    return webapp.page_query(parse_qsl(query, keep_blank_values=True))
+
+
+def sitemap_queries(webapp, projects):
+    """Запросы `/?<query>` всех страниц sitemap.xml
+
+    Главная показывает только самые частые теги, поэтому обход по ссылкам
+    не доходит до остальных страниц из sitemap — их адреса берутся из нее.
+    """
+    prefix = webapp.app.config['SITE_URL'].rstrip('/') + '/?'
+    for url, *_ in webapp.iter_sitemap_urls(projects):
+        if url.startswith(prefix) and len(url) > len(prefix):
+            yield normalize_query(webapp, url[len(prefix):])
+
+
+def template_fingerprint(app):
+    """Хеш шаблонов и настроек, от которых зависит HTML любой страницы"""
+    digest = hashlib.sha256()
+    templates_dir = Path(app.root_path) / app.template_folder
+    for path in sorted(templates_dir.rglob('*')):
+        if path.is_file():
+            digest.update(path.relative_to(templates_dir).as_posix().encode('utf-8'))
+            digest.update(path.read_bytes())
+    digest.update(str(app.config['SITE_TITLE']).encode('utf-8'))
+    # Адреса статики в HTML зависят от хешей собранных файлов
+    digest.update(json.dumps(assets.load_manifest(app.static_folder), sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def page_key(webapp, query, fingerprint):
+    """Ключ страницы: хеш контекста шаблона (без рендеринга)"""
+    from flask import request
+
+    if data_page_file(query):
+        # Страницы данных целиком определяются содержимым набора проектов
+        data = webapp.get_data_generation()[1]
+    else:
+        with webapp.app.test_request_context('/?' + query):
+            payload = webapp.build_index_context(request.args)
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256((fingerprint + data).encode('utf-8')).hexdigest()
+
+
+def render_page(query):
+    """Рендеринг одной страницы через тестовый клиент (выполняется в воркере)"""
+    from app import app
+
+    url = '/' + query if data_page_file(query) else '/?' + query if query else '/'
+    with app.test_client() as client:
+        response = client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f"{url}: HTTP {response.status_code}")
+
+    body = response.get_data()
+    links = []
+    if not data_page_file(query):
+        collector = LinkCollector()
+        collector.feed(body.decode('utf-8'))
+        links = list(dict.fromkeys(collector.queries))
+    return body, links
+
+
+def write_atomic(path, data):
+    """Запись файла через временный файл и переименование"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def sync_static(static_dir, target_dir):
+    """Копирование статики: переписываются только изменившиеся файлы"""
+    copied = 0
+    if not static_dir.exists():
+        return copied
+    for path in static_dir.rglob('*'):
+        if not path.is_file():
+            continue
+        target = target_dir / path.relative_to(static_dir)
+        if target.exists() and filecmp.cmp(path, target, shallow=False):
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, target)
+        copied += 1
+    return copied
+
+
+def make_executor(jobs):
+    """Пул воркеров: процессы через fork (наследуют прогретый кэш) или потоки"""
+    if jobs > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('fork'))
+    return ThreadPoolExecutor(max(jobs, 1))
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def freeze(output_dir, jobs=None, force=False):
+    """
+    Статическая сборка сайта в `output_dir`
+
+    Returns:
+        dict: статистика сборки (rendered, skipped, removed, assets, static, elapsed_s)
+    """
+    # Сборка только читает данные: история звезд (history.py) пишется сервером
+    os.environ['HISTORY_FILE'] = ''
+    import app as webapp
+
+    webapp.app.config['HISTORY_FILE'] = ''
+    started = time.perf_counter()
+    out = Path(output_dir)
+    jobs = jobs or os.cpu_count() or 1
+
+    # Сначала статика: страницы ссылаются на файлы с хешем из манифеста
+    stats_assets = assets.build(webapp.app.static_folder)
+
+    # Загружаем данные один раз: воркеры получают их вместе с памятью процесса
+    projects = webapp.get_all_projects()
+
+    manifest_path = out / MANIFEST_NAME
+    old_pages = {} if force else load_manifest(manifest_path).get('pages', {})
+    fingerprint = template_fingerprint(webapp.app)
+    pages = {}
+    stats = {'rendered': 0, 'skipped': 0, 'removed': 0, 'assets': stats_assets['written']}
+
+    # sitemap.xml и его части, если каталог не помещается в один файл
+    sitemap_documents, _ = webapp.get_sitemap_documents()
+
+    with make_executor(jobs) as pool:
+        # Обход в ширину: главная и страницы sitemap -> страницы, на которые они ссылаются -> ...
+        frontier = [''] + list(DATA_PAGES) + sorted(sitemap_documents)
+        frontier += [query for query in dict.fromkeys(sitemap_queries(webapp, projects)) if query not in frontier]
+        seen = set(frontier)
+        while frontier:
+            todo = []
+            for query in frontier:
+                key = page_key(webapp, query, fingerprint)
+                entry = old_pages.get(query)
+                if entry and entry.get('key') == key and (out / page_file(query)).exists():
+                    pages[query] = entry
+                    stats['skipped'] += 1
+                else:
+                    todo.append((query, key))
+
+            results = pool.map(render_page, [query for query, _ in todo])
+            for (query, key), (body, links) in zip(todo, results):
+                write_atomic(out / page_file(query), body)
+                pages[query] = {'key': key, 'links': links}
+                stats['rendered'] += 1
+
+            next_frontier = []
+            for query in frontier:
+                for link in pages[query]['links']:
+                    link = normalize_query(webapp, link)
+                    if link not in seen:
+                        seen.add(link)
+                        next_frontier.append(link)
+            frontier = next_frontier
+
+    # Удаляем страницы, на которые больше никто не ссылается
+    for query in set(old_pages) - set(pages):
+        stale = out / page_file(query)
+        if stale.exists():
+            stale.unlink()
+            stats['removed'] += 1
+
+    stats['static'] = sync_static(Path(webapp.app.static_folder), out / 'static')
+    write_atomic(out / 'nginx.conf', NGINX_SNIPPET.encode('utf-8'))
+    write_atomic(manifest_path, json.dumps({'pages': pages}, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    stats['elapsed_s'] = time.perf_counter() - started
+    return stats
+
+
+def main(argv=None):
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description='Статическая сборка PortfolioHub')
+    parser.add_argument('--output', default='build', help='Выходная папка (по умолчанию build)')
+    parser.add_argument('--jobs', type=int, default=0, help='Число воркеров (по умолчанию — число ядер)')
+    parser.add_argument('--force', action='store_true', help='Пересобрать все страницы')
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("  Статическая сборка PortfolioHub")
+    print("=" * 70)
+    print()
+
+    stats = freeze(args.output, jobs=args.jobs, force=args.force)
+
+    print(f"  📄 Отрендерено страниц: {stats['rendered']}")
+    print(f"  ⏭️  Без изменений: {stats['skipped']}")
+    print(f"  🗑️  Удалено устаревших: {stats['removed']}")
+    print(f"  🗜️  Собрано файлов статики: {stats['assets']}")
+    print(f"  📦 Обновлено статических файлов: {stats['static']}")
+    print(f"  ⏱️  Время: {stats['elapsed_s']:.2f} с")
+    print("=" * 70)
+    print(f"\n✅ Сайт собран в {Path(args.output).absolute()}")
+
+
+if __name__ == "__main__":
+    main()
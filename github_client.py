@@ -0,0 +1,352 @@
+"""
+Асинхронный клиент GitHub API.
+
+Все запросы к GitHub выполняются на одном event loop в отдельном потоке
+(LoopThread). Страницы списка репозиториев и дополнительные запросы по каждому
+репозиторию (языки) идут одновременно: число параллельных запросов ограничено
+семафором, у каждого запроса свой таймаут, а у всей загрузки — общий бюджет
+времени, по истечении которого незавершенные запросы отменяются.
+
+Источники (пользователи и организации, GitHubSource) загружаются
+параллельно и независимо: ошибка одного не мешает остальным. Страницы
+запрашиваются условно (If-None-Match): неизменившиеся приходят как 304, не
+расходуют лимит API и берутся из прошлой загрузки. Одновременные загрузки
+одного источника объединяются в одну: при истечении кэша в GitHub уходит один
+набор запросов, сколько бы потоков его ни ждали.
+
+Синхронный код (представления Flask) вызывает клиент через run():
+
+    client = GitHubClient(token=token)
+    sources = parse_sources('user:dettline1, org:acme#portfolio', 3600)
+    results = run(client.fetch_sources(sources, budget=15))
+
+aiohttp импортируется при первом запросе и на время старта приложения не влияет.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import os
+import re
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_API_URL = 'https://api.github.com'
+LINK_LAST_RE = re.compile(r'<([^>]+)>;\s*rel="last"')
+SOURCE_RE = re.compile(r'(?:(user|org):)?([A-Za-z0-9][A-Za-z0-9_.-]*)(?:#([A-Za-z0-9+-]+))?(?:@([0-9]+))?')
+
+
+class GitHubError(Exception):
+    """Ошибка загрузки из GitHub: сеть, код ответа или исчерпанный бюджет времени"""
+
+
+class GitHubSource(namedtuple('GitHubSource', 'kind owner topics ttl')):
+    """
+    Источник репозиториев: пользователь или организация
+
+    Attributes:
+        kind: 'users' или 'orgs'
+        topics: если не пусто — только репозитории хотя бы с одним из этих топиков
+        ttl: время жизни кэша источника, секунд
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        prefix = 'org' if self.kind == 'orgs' else 'user'
+        topics = f"#{'+'.join(self.topics)}" if self.topics else ''
+        return f'{prefix}:{self.owner}{topics}'
+
+    def select(self, pages):
+        """Репозитории из страниц, прошедшие фильтр по топикам"""
+        for _, repos in pages:
+            for repo in repos:
+                if not self.topics or not set(self.topics).isdisjoint(repo.get('topics') or ()):
+                    yield repo
+
+
+@lru_cache(maxsize=16)
+def parse_sources(spec, default_ttl):
+    """
+    Разбор списка источников вида `user:alice, org:acme#portfolio+web@600`
+
+    Элемент: `[user:|org:]<имя>[#топик+топик][@ttl в секундах]`, разделители —
+    запятые или пробелы. Повторяющиеся источники отбрасываются.
+
+    Returns:
+        Tuple[GitHubSource, ...]
+    """
+    sources = []
+    for item in re.split(r'[,\s]+', spec.strip()):
+        if not item:
+            continue
+        match = SOURCE_RE.fullmatch(item)
+        if not match:
+            raise ValueError(f"Некорректный источник GitHub: {item!r}")
+        kind, owner, topics, ttl = match.groups()
+        sources.append(GitHubSource(
+            'orgs' if kind == 'org' else 'users',
+            owner,
+            tuple(sorted(set(topics.lower().split('+')))) if topics else (),
+            int(ttl) if ttl else default_ttl
+        ))
+    return tuple(dict.fromkeys(sources))
+
+
+class LoopThread:
+    """Event loop в отдельном потоке; после fork запускается заново в дочернем процессе"""
+
+    def __init__(self, name='asyncio-loop'):
+        self.name = name
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            # Потоки не переживают fork: в воркере создаем свой loop
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+            return self._loop
+
+    def submit(self, coro):
+        """Запуск корутины на loop; возвращает concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Выполнить корутину и дождаться результата; по таймауту корутина отменяется"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        # До Python 3.11 это не встроенный TimeoutError
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+
+_loop_thread = LoopThread('github-client')
+
+
+def run(coro, timeout=None):
+    """Выполнить корутину клиента из синхронного кода"""
+    return _loop_thread.run(coro, timeout)
+
+
+def last_page(link_header):
+    """Номер последней страницы из заголовка Link (1, если страница одна)"""
+    match = LINK_LAST_RE.search(link_header or '')
+    if not match:
+        return 1
+    page = parse_qs(urlparse(match.group(1)).query).get('page', ['1'])[0]
+    return int(page) if page.isdigit() else 1
+
+
+async def gather_all(coros):
+    """asyncio.gather, который отменяет остальные задачи при первой ошибке"""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+class GitHubClient:
+    """Клиент GitHub API с ограничением параллелизма и таймаутами"""
+
+    def __init__(self, api_url=DEFAULT_API_URL, token=None, concurrency=8, timeout=10, per_page=100):
+        self.api_url = api_url.rstrip('/')
+        self.token = token
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.per_page = per_page
+        self._loop = None
+        self._pid = None
+        self._session = None
+        self._semaphore = None
+        self._inflight = {}
+        # Один обработчик на клиента: он закрывает сессию, актуальную на момент выхода
+        # (воркер после fork наследует его от мастера)
+        atexit.register(self._close_at_exit)
+
+    def _ensure_session(self):
+        # Сессия и семафор привязаны к loop: после fork loop новый, создаем их заново
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            import aiohttp
+
+            headers = {'Accept': 'application/vnd.github.v3+json'}
+            if self.token:
+                headers['Authorization'] = f'token {self.token}'
+            self._loop = loop
+            self._pid = os.getpid()
+            self._session = aiohttp.ClientSession(
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._inflight = {}
+        return self._session
+
+    async def close(self):
+        """Закрытие HTTP-сессии"""
+        if self._session is not None and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = self._loop = None
+
+    def _close_at_exit(self):
+        # Без этого aiohttp предупреждает о незакрытой сессии при выходе
+        loop = self._loop
+        # Loop, унаследованный от родителя при fork, в этом процессе не работает
+        if self._session is None or self._pid != os.getpid() or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(), loop).result(1)
+        except Exception:
+            pass
+
+    async def request(self, url, params=None, etag=None):
+        """
+        Условный GET-запрос к API
+
+        Args:
+            etag: ETag прошлого ответа; если данные не изменились, GitHub вернет 304
+
+        Returns:
+            Tuple[int, Any, Mapping]: (код ответа, JSON или None для 304, заголовки)
+        """
+        import aiohttp
+
+        session = self._ensure_session()
+        headers = {'If-None-Match': etag} if etag else None
+        async with self._semaphore:
+            try:
+                async with session.get(url, params=params, headers=headers) as response:
+                    if response.status == 304:
+                        return 304, None, response.headers
+                    if response.status >= 400:
+                        raise GitHubError(f"{url}: HTTP {response.status} {response.reason}")
+                    return response.status, await response.json(content_type=None), response.headers
+            except asyncio.TimeoutError:
+                raise GitHubError(f"{url}: таймаут {self.timeout} с") from None
+            except aiohttp.ClientError as e:
+                raise GitHubError(f"{url}: {e}") from e
+
+    async def get_json(self, url, params=None):
+        """
+        GET-запрос к API
+
+        Returns:
+            Tuple[Any, str]: (JSON ответа, заголовок Link)
+        """
+        _, data, headers = await self.request(url, params)
+        return data, headers.get('Link')
+
+    async def list_pages(self, owner, kind='users', previous=()):
+        """
+        Страницы списка публичных репозиториев пользователя ('users') или организации ('orgs')
+
+        Args:
+            previous: страницы прошлой загрузки [(etag, repos)]; неизменившиеся
+                страницы (ответ 304) берутся из них без повторной передачи
+
+        Returns:
+            List[Tuple[str, list]]: страницы [(etag, repos)]
+        """
+        url = f'{self.api_url}/{kind}/{owner}/repos'
+        params = {'type': 'public', 'sort': 'updated', 'per_page': self.per_page}
+
+        async def page(number):
+            etag, cached = previous[number - 1] if number <= len(previous) else (None, None)
+            status, data, headers = await self.request(url, {**params, 'page': number}, etag)
+            if status == 304:
+                return (etag, cached), headers.get('Link'), False
+            return (headers.get('ETag'), data), headers.get('Link'), True
+
+        # Первая страница сообщает число страниц, остальные загружаем параллельно
+        first, link, modified = await page(1)
+        count = last_page(link) if link or modified else len(previous)
+        rest = await gather_all(page(number) for number in range(2, count + 1))
+        return [first] + [entry for entry, _, _ in rest]
+
+    async def add_languages(self, repos):
+        """Все языки каждого репозитория в repo['languages'] (по запросу на репозиторий)"""
+        async def load(repo):
+            try:
+                data, _ = await self.get_json(repo['languages_url'])
+            except GitHubError:
+                # Без списка языков репозиторий останется с основным языком
+                return
+            repo['languages'] = list(data)
+
+        # Репозитории из неизменившихся страниц языки уже получили
+        await asyncio.gather(*(
+            load(repo) for repo in repos if repo.get('languages_url') and 'languages' not in repo
+        ))
+        return repos
+
+    async def _load(self, source, previous, languages):
+        pages = await self.list_pages(source.owner, source.kind, previous)
+        if languages:
+            await self.add_languages(list(source.select(pages)))
+        return pages
+
+    async def _load_with_budget(self, source, previous, languages, budget):
+        try:
+            return await asyncio.wait_for(self._load(source, previous, languages), budget)
+        except asyncio.TimeoutError:
+            raise GitHubError(f"Загрузка {source} не уложилась в {budget} с") from None
+
+    async def fetch_source(self, source, previous=(), languages=False, budget=None):
+        """
+        Страницы репозиториев источника в формате GitHub API
+
+        Одновременные вызовы для одного источника ждут одну общую загрузку.
+
+        Args:
+            previous: страницы прошлой загрузки для условных запросов
+            languages: дополнительно загрузить все языки каждого репозитория
+            budget: общий лимит времени на загрузку, секунд (None — без лимита)
+
+        Returns:
+            List[Tuple[str, list]]: страницы [(etag, repos)]; неизменившиеся
+                страницы — те же объекты, что в previous
+        """
+        self._ensure_session()
+        key = (source, languages)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_with_budget(source, previous, languages, budget))
+            self._inflight[key] = task
+
+            def forget(done):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(forget)
+        # shield: отмена одного ожидающего не отменяет загрузку для остальных
+        return await asyncio.shield(task)
+
+    async def fetch_sources(self, sources, previous=None, languages=False, budget=None):
+        """
+        Параллельная загрузка нескольких источников; ошибка одного не мешает остальным
+
+        Returns:
+            list: для каждого источника — страницы (как fetch_source) или GitHubError
+        """
+        previous = previous or {}
+        results = await asyncio.gather(
+            *(self.fetch_source(source, previous.get(source, ()), languages, budget) for source in sources),
+            return_exceptions=True
+        )
+        for result in results:
+            # Непредвиденные ошибки (не сеть и не бюджет) не маскируем
+            if isinstance(result, BaseException) and not isinstance(result, GitHubError):
+                raise result
+        return results
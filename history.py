@@ -0,0 +1,517 @@
+"""
+История звезд и форков проектов: компактное хранилище только на добавление.
+
+Файл состоит из заголовка и записей фиксированной ширины (little-endian):
+    заголовок:  magic (8 байт) | версия u32 | время последнего сжатия u32
+    запись:     время u32 | номер проекта u32 | звезды u32 | форки u32 |
+                изменение звезд i32 | изменение форков i32
+
+Номера проектов — строки файла `<история>.ids` (ID проекта на строку).
+Запись добавляется, только когда счетчики проекта изменились, и хранит
+изменение относительно предыдущей записи (у первой записи проекта — 0).
+Поэтому рост за окно — сумма изменений записей в окне: начало окна
+находится двоичным поиском по времени (записи идут по порядку), остальная
+история не читается. Ряд одного проекта ищется по файлу через mmap, без
+загрузки в память.
+
+Сжатие (`compact`) переписывает файл: записи старше `raw_days` остаются по
+одной на день, старше `daily_days` — по одной на неделю (последнее значение
+периода, изменение — сумма за период). Так годы ежечасных обновлений
+занимают мегабайты.
+
+Несколько процессов (воркеры gunicorn) пишут в один файл под flock;
+каждый перед записью дочитывает чужие записи, поэтому одно изменение не
+записывается дважды. Сжатие заменяет файл новым (os.replace): получив
+блокировку, процесс проверяет, что держит текущий файл, иначе открывает
+его заново — запись в замененный файл пропала бы.
+
+Примеры:
+    python history.py stats
+    python history.py show my-project --days 90
+    python history.py trending --days 7
+    python history.py compact
+"""
+
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: один процесс, блокировки файла не нужны
+    fcntl = None
+
+# Исправление кодировки для Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+DEFAULT_HISTORY = 'history.bin'
+MAGIC = b'PHHIST\x00\x00'
+VERSION = 1
+
+HEADER = struct.Struct('<8sII')
+RECORD = struct.Struct('<IIIIii')
+
+DAY = 86400
+WEEK = 7 * DAY
+
+# Сколько записей читать за раз при последовательном проходе
+SCAN_CHUNK = 65536
+
+
+def _lock(f, exclusive=True):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def iter_records(data, start=0):
+    """Записи из буфера (bytes/mmap) начиная с записи номер start, блоками"""
+    count = (len(data) - HEADER.size) // RECORD.size
+    view = memoryview(data)
+    try:
+        for offset in range(start, count, SCAN_CHUNK):
+            end = min(offset + SCAN_CHUNK, count)
+            yield from RECORD.iter_unpack(view[HEADER.size + offset * RECORD.size:HEADER.size + end * RECORD.size])
+    finally:
+        view.release()
+
+
+def first_record_after(data, timestamp):
+    """Номер первой записи со временем >= timestamp (двоичный поиск)"""
+    low, high = 0, (len(data) - HEADER.size) // RECORD.size
+    while low < high:
+        middle = (low + high) // 2
+        if struct.unpack_from('<I', data, HEADER.size + middle * RECORD.size)[0] < timestamp:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class HistoryStore:
+    """История счетчиков проектов в файле path (+ path.ids)"""
+
+    def __init__(self, path=DEFAULT_HISTORY):
+        self.path = Path(path)
+        self.ids_path = self.path.with_name(self.path.name + '.ids')
+        self._lock = threading.Lock()
+        # Прочитанное состояние файла: ((inode, время сжатия), размер), номера ID, последние значения
+        self._file_state = None
+        self._ids_size = 0
+        self._ids = []
+        self._numbers = {}
+        self._last = {}
+        self._last_time = 0
+
+    # --- Запись ---
+
+    def _ensure_files(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.path.exists():
+            # Создание атомарно: заголовок пишется во временный файл
+            tmp_path = self.path.with_name(self.path.name + f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, int(time.time())))
+            if not self.path.exists():
+                os.replace(tmp_path, self.path)
+            else:
+                os.unlink(tmp_path)
+        self.ids_path.touch(exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """Текущий файл истории под flock (открывается заново, если его заменило сжатие)"""
+        while True:
+            self._ensure_files()
+            f = open(self.path, 'r+b')
+            _lock(f)
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(f.fileno()).st_ino:
+                break
+            # Пока ждали блокировку, сжатие заменило файл: этот уже не виден читателям
+            _unlock(f)
+            f.close()
+        try:
+            yield f
+        finally:
+            _unlock(f)
+            f.close()
+
+    def _sync(self, f):
+        """
+        Дочитать записи и ID, добавленные другими процессами
+
+        Вызывается под _locked(): f — текущий файл. Если файл другой (его
+        переписало сжатие), последние значения проектов — основа изменений
+        в новых записях — читаются из него заново.
+        """
+        stat = os.fstat(f.fileno())
+        f.seek(0)
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or HEADER.unpack(header)[:2] != (MAGIC, VERSION):
+            raise ValueError(f"{self.path}: неизвестный формат файла истории")
+        # Номер inode может достаться новому файлу: файл узнаем еще и по времени сжатия
+        identity = (stat.st_ino, HEADER.unpack(header)[2])
+        if self._file_state is None or self._file_state[0] != identity:
+            self._last = {}
+            self._last_time = 0
+            start = 0
+        else:
+            start = (self._file_state[1] - HEADER.size) // RECORD.size
+
+        with open(self.ids_path, 'rb') as ids_file:
+            ids_file.seek(self._ids_size)
+            tail = ids_file.read()
+        complete = tail[:tail.rfind(b'\n') + 1]
+        for line in complete.decode('utf-8').splitlines():
+            self._numbers[line] = len(self._ids)
+            self._ids.append(line)
+        self._ids_size += len(complete)
+
+        count = (stat.st_size - HEADER.size) // RECORD.size
+        if count > start:
+            f.seek(HEADER.size + start * RECORD.size)
+            tail = f.read((count - start) * RECORD.size)
+            for timestamp, number, stars, forks, _, _ in RECORD.iter_unpack(tail):
+                self._last[number] = (stars, forks)
+                self._last_time = max(self._last_time, timestamp)
+        self._file_state = (identity, HEADER.size + count * RECORD.size)
+
+    def record(self, projects, timestamp=None):
+        """
+        Добавить значения звезд и форков проектов, изменившиеся с прошлой записи
+
+        Returns:
+            int: число добавленных записей
+        """
+        with self._lock:
+            with self._locked() as f:
+                self._sync(f)
+                # Время не убывает: по нему идет двоичный поиск
+                timestamp = max(int(timestamp or time.time()), self._last_time)
+                new_ids = []
+                records = []
+                for project in projects:
+                    stars = int(project.get('stars') or 0)
+                    forks = int(project.get('forks') or 0)
+                    number = self._numbers.get(project['id'])
+                    if number is None:
+                        number = self._numbers[project['id']] = len(self._ids)
+                        self._ids.append(project['id'])
+                        new_ids.append(project['id'])
+                    previous = self._last.get(number)
+                    if previous == (stars, forks):
+                        continue
+                    # Первая запись проекта — точка отсчета с нулевым изменением
+                    previous_stars, previous_forks = previous or (stars, forks)
+                    records.append(RECORD.pack(timestamp, number, stars, forks,
+                                               stars - previous_stars, forks - previous_forks))
+                    self._last[number] = (stars, forks)
+
+                if new_ids:
+                    data = ''.join(f'{project_id}\n' for project_id in new_ids).encode('utf-8')
+                    with open(self.ids_path, 'ab') as ids_file:
+                        ids_file.write(data)
+                    self._ids_size += len(data)
+                if records:
+                    f.seek(0, os.SEEK_END)
+                    f.write(b''.join(records))
+                    f.flush()
+                    self._last_time = timestamp
+                self._file_state = (self._file_state[0], self._file_state[1] + len(records) * RECORD.size)
+                return len(records)
+
+    # --- Чтение ---
+
+    def _map(self):
+        """(файл, mmap) для чтения или None, если записей нет"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return None
+        if os.fstat(f.fileno()).st_size <= HEADER.size:
+            f.close()
+            return None
+        return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _load_ids(self):
+        with self._lock:
+            try:
+                with open(self.ids_path, 'rb') as ids_file:
+                    ids_file.seek(self._ids_size)
+                    tail = ids_file.read()
+            except FileNotFoundError:
+                return
+            complete = tail[:tail.rfind(b'\n') + 1]
+            for line in complete.decode('utf-8').splitlines():
+                self._numbers[line] = len(self._ids)
+                self._ids.append(line)
+            self._ids_size += len(complete)
+
+    def series(self, project_id, since=None, until=None):
+        """
+        Значения звезд и форков проекта
+
+        Первая точка — значение на момент since (если до него были записи).
+
+        Returns:
+            List[Tuple[int, int, int]]: (время unix, звезды, форки) по времени
+        """
+        self._load_ids()
+        number = self._numbers.get(project_id)
+        mapped = self._map()
+        if number is None or mapped is None:
+            return []
+        f, data = mapped
+        points = []
+        try:
+            start = first_record_after(data, since) if since else 0
+            end = first_record_after(data, until) if until else (len(data) - HEADER.size) // RECORD.size
+            # Поиск номера проекта по байтам (в C) с проверкой выравнивания записи
+            needle = struct.pack('<I', number)
+            position = HEADER.size + start * RECORD.size + 4
+            limit = HEADER.size + end * RECORD.size
+            while True:
+                position = data.find(needle, position, limit)
+                if position < 0:
+                    break
+                offset = position - 4
+                if (offset - HEADER.size) % RECORD.size:
+                    position += 1
+                    continue
+                timestamp, _, stars, forks, stars_delta, forks_delta = RECORD.unpack_from(data, offset)
+                if not points and since and timestamp > since and (stars_delta or forks_delta):
+                    # Значение на начало окна — до первого изменения внутри него
+                    points.append((since, stars - stars_delta, forks - forks_delta))
+                points.append((timestamp, stars, forks))
+                position = offset + RECORD.size + 4
+        finally:
+            data.close()
+            f.close()
+        return points
+
+    def growth(self, since, until=None, limit=10, by='stars', only=None):
+        """
+        Проекты с наибольшим ростом за окно [since, until)
+
+        Читаются только записи окна: изменения суммируются по проектам,
+        лучшие limit выбираются через heapq. only — ID, среди которых
+        выбирать (удаленные и переименованные проекты остаются в истории).
+
+        Returns:
+            List[Tuple[str, int, int]]: (ID проекта, рост звезд, рост форков)
+        """
+        mapped = self._map()
+        if mapped is None:
+            return []
+        # ID дочитываются после mmap: запись пишет ID раньше записей, поэтому
+        # все номера проектов в отображенных записях уже есть в файле ID
+        self._load_ids()
+        f, data = mapped
+        totals = {}
+        try:
+            start = first_record_after(data, since)
+            for timestamp, number, _, _, stars_delta, forks_delta in iter_records(data, start):
+                if until and timestamp >= until:
+                    break
+                stars, forks = totals.get(number, (0, 0))
+                totals[number] = (stars + stars_delta, forks + forks_delta)
+        finally:
+            data.close()
+            f.close()
+        key = 0 if by == 'stars' else 1
+        best = heapq.nlargest(limit, (
+            (values[key], number, values) for number, values in totals.items()
+            if values[key] > 0 and (only is None or self._ids[number] in only)
+        ))
+        return [(self._ids[number], values[0], values[1]) for _, number, values in best]
+
+    def stats(self):
+        """Размер и границы истории"""
+        mapped = self._map()
+        # Как и в growth(): ID — после mmap, чтобы покрыть все отображенные записи
+        self._load_ids()
+        result = {'records': 0, 'projects': len(self._ids), 'bytes': 0, 'first': None, 'last': None,
+                  'compacted_at': None}
+        if mapped is None:
+            return result
+        f, data = mapped
+        try:
+            count = (len(data) - HEADER.size) // RECORD.size
+            result.update(
+                records=count,
+                bytes=len(data) + self.ids_path.stat().st_size,
+                compacted_at=HEADER.unpack_from(data)[2],
+                first=RECORD.unpack_from(data, HEADER.size)[0] if count else None,
+                last=RECORD.unpack_from(data, HEADER.size + (count - 1) * RECORD.size)[0] if count else None
+            )
+        finally:
+            data.close()
+            f.close()
+        return result
+
+    # --- Сжатие ---
+
+    def compacted_at(self):
+        """Время последнего сжатия (unix) или None, если файла нет"""
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(HEADER.size)
+        except FileNotFoundError:
+            return None
+        return HEADER.unpack(header)[2] if len(header) == HEADER.size else None
+
+    def compact(self, raw_days=30, daily_days=365, now=None):
+        """
+        Прореживание старых записей: по одной на день, затем на неделю
+
+        Файл читается и пишется потоком; в памяти — только последние значения
+        проектов и записи одного незакрытого периода.
+
+        Returns:
+            Tuple[int, int]: (записей было, записей стало)
+        """
+        now = int(now or time.time())
+        # Границы кратны периодам: периоды идут по возрастанию времени без перекрытий
+        daily_from = (now - raw_days * DAY) // DAY * DAY
+        weekly_from = min((now - daily_days * DAY) // WEEK * WEEK, daily_from)
+
+        def period(timestamp):
+            if timestamp >= daily_from:
+                return None
+            size = WEEK if timestamp < weekly_from else DAY
+            return timestamp // size * size + size
+
+        with self._lock:
+            with self._locked() as f:
+                tmp_path = self.path.with_name(self.path.name + '.compact.tmp')
+                written = 0
+                read = 0
+                emitted = {}
+                pending = {}
+                # Первые записи проектов сохраняются: от них считается рост за всю историю
+                first = {}
+                pending_end = None
+
+                with open(tmp_path, 'wb') as out:
+                    out.write(HEADER.pack(MAGIC, VERSION, now))
+                    buffer = []
+
+                    def emit(timestamp, number, stars, forks):
+                        previous_stars, previous_forks = emitted.get(number, (stars, forks))
+                        buffer.append(RECORD.pack(timestamp, number, stars, forks,
+                                                  stars - previous_stars, forks - previous_forks))
+                        emitted[number] = (stars, forks)
+
+                    def flush_period():
+                        for timestamp, number, stars, forks in sorted([*first.values(), *pending.values()]):
+                            emit(timestamp, number, stars, forks)
+                        first.clear()
+                        pending.clear()
+
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    try:
+                        for timestamp, number, stars, forks, _, _ in iter_records(data):
+                            read += 1
+                            end = period(timestamp)
+                            if end != pending_end:
+                                flush_period()
+                                pending_end = end
+                            if end is None:
+                                emit(timestamp, number, stars, forks)
+                            elif number not in emitted and number not in first:
+                                first[number] = (timestamp, number, stars, forks)
+                            else:
+                                # От периода остается последнее значение проекта
+                                pending[number] = (timestamp, number, stars, forks)
+                            if len(buffer) >= SCAN_CHUNK:
+                                out.write(b''.join(buffer))
+                                written += len(buffer)
+                                buffer.clear()
+                    finally:
+                        data.close()
+                    flush_period()
+                    out.write(b''.join(buffer))
+                    written += len(buffer)
+
+                os.replace(tmp_path, self.path)
+                # Следующая запись перечитает новый файл
+                self._file_state = None
+                return read, written
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M')
+
+
+def main(argv=None):
+    """Просмотр и сжатие истории"""
+    parser = argparse.ArgumentParser(description='История звезд и форков PortfolioHub')
+    parser.add_argument('command', nargs='?', default='stats', choices=['stats', 'show', 'trending', 'compact'],
+                        help='stats — размер, show — ряд проекта, trending — рост, compact — сжатие')
+    parser.add_argument('project', nargs='?', help='ID проекта (для show)')
+    parser.add_argument('--file', default=DEFAULT_HISTORY, help=f'Файл истории (по умолчанию {DEFAULT_HISTORY})')
+    parser.add_argument('--days', type=int, default=30, help='Окно, дней (0 — вся история)')
+    parser.add_argument('--limit', type=int, default=10, help='Сколько проектов показать (trending)')
+    parser.add_argument('--raw-days', type=int, default=30, help='Сжатие: сколько дней хранить все записи')
+    parser.add_argument('--daily-days', type=int, default=365, help='Сжатие: сколько дней хранить по дню')
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("  История звезд и форков PortfolioHub")
+    print("=" * 70)
+    print()
+
+    store = HistoryStore(args.file)
+    if not store.path.exists():
+        print(f"❌ Файл '{args.file}' не найден!")
+        return 1
+    since = int(time.time()) - args.days * DAY if args.days else None
+
+    if args.command == 'show':
+        if not args.project:
+            print("❌ Укажите ID проекта")
+            return 1
+        points = store.series(args.project, since)
+        if not points:
+            print(f"⚠️  Нет записей для '{args.project}'")
+        for timestamp, stars, forks in points:
+            print(f"  {_format_time(timestamp)}  ⭐ {stars:>7}  🍴 {forks:>6}")
+    elif args.command == 'trending':
+        for project_id, stars, forks in store.growth(since or 0, limit=args.limit):
+            print(f"  ⭐ +{stars:<6} 🍴 +{forks:<5} {project_id}")
+    elif args.command == 'compact':
+        before, after = store.compact(args.raw_days, args.daily_days)
+        print(f"✅ Записей: {before} -> {after}")
+    else:
+        stats = store.stats()
+        print(f"  📦 Записей: {stats['records']}, проектов: {stats['projects']}, размер: {stats['bytes']} байт")
+        if stats['first'] is not None:
+            print(f"  📅 С {_format_time(stats['first'])} по {_format_time(stats['last'])}")
+        if stats['compacted_at']:
+            print(f"  🗜️  Последнее сжатие: {_format_time(stats['compacted_at'])}")
+
+    print()
+    print("=" * 70)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Фоновая очередь задач PortfolioHub.
+
+Тяжелые операции (генерация отчетов) выполняются в отдельном потоке, а не в
+потоке запроса. Каждая задача получает ID, по которому можно узнать ее статус.
+Одинаковые задачи (с одним ключом), которые еще ждут запуска, не
+дублируются: повторная постановка возвращает уже существующую задачу.
+Выполняющаяся задача могла прочитать данные до изменения, ради которого ее
+ставят снова, поэтому с ней задача не объединяется и выполнится после нее.
+"""
+
+import os
+import queue
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job:
+    """Задача в очереди"""
+
+    def __init__(self, key, func, args):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.func = func
+        self.args = args
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(timespec='seconds'),
+            'started_at': self.started_at.isoformat(timespec='seconds') if self.started_at else None,
+            'finished_at': self.finished_at.isoformat(timespec='seconds') if self.finished_at else None,
+        }
+
+
+class JobQueue:
+    """Очередь задач с пулом потоков-исполнителей и дедупликацией ожидающих задач по ключу"""
+
+    def __init__(self, workers=1, history=200):
+        self.workers = workers
+        self.history = history
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def submit(self, key, func, *args):
+        """
+        Постановка задачи в очередь
+
+        Returns:
+            Tuple[Job, bool]: (задача, создана ли новая задача)
+        """
+        with self._lock:
+            self._ensure_workers()
+            job_id = self._active.get(key)
+            if job_id is not None:
+                return self._jobs[job_id], False
+
+            job = Job(key, func, args)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+            # Ограничиваем историю завершенных задач
+            while len(self._jobs) > self.history:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status in (PENDING, RUNNING):
+                    break
+                self._jobs.popitem(last=False)
+        self._queue.put(job)
+        return job, True
+
+    def get(self, job_id):
+        """Задача по ID или None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _ensure_workers(self):
+        # Потоки не переживают fork: в дочернем процессе запускаем их заново
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._queue = queue.Queue()
+        for job in self._jobs.values():
+            if job.status in (PENDING, RUNNING):
+                job.status = FAILED
+                job.error = 'Процесс перезапущен'
+        self._active.clear()
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True).start()
+
+    def _work(self):
+        job_queue = self._queue
+        while True:
+            job = job_queue.get()
+            with self._lock:
+                job.status = RUNNING
+                # Новая постановка с тем же ключом — уже отдельная задача
+                if self._active.get(job.key) == job.id:
+                    del self._active[job.key]
+            job.started_at = datetime.now()
+            try:
+                job.result = job.func(*job.args)
+                job.status = DONE
+            except Exception as e:
+                job.error = str(e)
+                job.status = FAILED
+                traceback.print_exc()
+            finally:
+                job.finished_at = datetime.now()
@@ -0,0 +1,513 @@
+"""
+Нагрузочное тестирование PortfolioHub.
+
+Поднимает локальный экземпляр приложения поверх заглушки GitHub API и гоняет
+по нему конкурентный трафик: `/`, `/api/projects` и страницы с фильтрами в
+заданной пропорции. В конце печатает пропускную способность, перцентили
+задержек p50/p95/p99 и долю ошибок. Посреди прогона можно принудительно
+"состарить" кэш, чтобы увидеть, сколько запросов одновременно пойдут в GitHub
+(cache stampede).
+
+Примеры:
+    python loadtest.py --concurrency 16 --duration 30
+    python loadtest.py --mix index=5,api=2,tag=2,language=1 --expire-at 0.5
+    python loadtest.py --url http://127.0.0.1:5000 --requests 2000
+    python loadtest.py --startup 5
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import requests
+
+# Исправление кодировки для Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+DEFAULT_MIX = 'index=4,api=2,tag=2,language=1,sort=1'
+STUB_LANGUAGES = ['Python', 'JavaScript', 'TypeScript', 'Go', 'Rust', None]
+STUB_TOPICS = ['flask', 'api', 'cli', 'bot', 'ml', 'web', 'async', 'data', 'devops', 'telegram']
+SORT_ORDERS = ['updated', 'stars', 'name']
+
+
+def make_stub_repos(owner, count, seed=42, api_url='https://api.github.com'):
+    """Генерация детерминированного списка репозиториев в формате GitHub API"""
+    rnd = random.Random(seed)
+    base_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    repos = []
+    for i in range(count):
+        name = f'stub-repo-{i:04d}'
+        updated = base_time + timedelta(hours=rnd.randint(0, 24 * 300))
+        repos.append({
+            'id': 100000 + i,
+            'name': name,
+            'full_name': f'{owner}/{name}',
+            'owner': {'login': owner},
+            'description': f'Тестовый репозиторий №{i} для нагрузочного прогона',
+            'html_url': f'https://github.com/{owner}/{name}',
+            'languages_url': f'{api_url}/repos/{owner}/{name}/languages',
+            'language': rnd.choice(STUB_LANGUAGES),
+            'topics': rnd.sample(STUB_TOPICS, rnd.randint(0, 3)),
+            'stargazers_count': rnd.randint(0, 500),
+            'forks_count': rnd.randint(0, 50),
+            'updated_at': updated.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'created_at': (updated - timedelta(days=rnd.randint(1, 900))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'fork': rnd.random() < 0.1,
+            'homepage': None,
+        })
+    return repos
+
+
+class StubServer(ThreadingHTTPServer):
+    """HTTP-сервер заглушки: очередь соединений рассчитана на всплески параллельных запросов"""
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class StubGitHub:
+    """Заглушка GitHub API: `/users|orgs/<name>/repos` с пагинацией и `/repos/<owner>/<repo>/languages`"""
+
+    def __init__(self, repos_count=60, latency=0.0):
+        self.repos_count = repos_count
+        self.latency = latency
+        self.hits = 0
+        self.not_modified = 0
+        self._repos = {}
+        self._lock = threading.Lock()
+        self.server = StubServer(('127.0.0.1', 0), self._make_handler())
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def repos_for(self, owner):
+        with self._lock:
+            if owner not in self._repos:
+                self._repos[owner] = make_stub_repos(owner, self.repos_count, api_url=self.url)
+            return self._repos[owner]
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.hits += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                parsed = urlparse(self.path)
+                languages = re.fullmatch(r'/repos/([^/]+)/([^/]+)/languages', parsed.path)
+                if languages:
+                    repo = next((r for r in stub.repos_for(languages.group(1))
+                                 if r['name'] == languages.group(2)), None)
+                    if repo is None:
+                        self._send(404, {'message': 'Not Found'})
+                    else:
+                        # Основной язык плюс детерминированный "второй" по номеру репозитория
+                        extra = STUB_LANGUAGES[repo['id'] % (len(STUB_LANGUAGES) - 1)]
+                        names = [name for name in dict.fromkeys([repo['language'], extra]) if name]
+                        self._send(200, {name: 1000 * (len(names) - i) for i, name in enumerate(names)})
+                    return
+
+                match = re.fullmatch(r'/(users|orgs)/([^/]+)/repos', parsed.path)
+                if not match:
+                    self._send(404, {'message': 'Not Found'})
+                    return
+
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                per_page = min(int(params.get('per_page', 30)), 100)
+                page = max(int(params.get('page', 1)), 1)
+                repos = stub.repos_for(match.group(2))
+                last_page = max((len(repos) + per_page - 1) // per_page, 1)
+                chunk = repos[(page - 1) * per_page:page * per_page]
+
+                links = []
+                if page < last_page:
+                    for rel, num in (('next', page + 1), ('last', last_page)):
+                        query = urlencode({**params, 'page': num})
+                        links.append(f'<{stub.url}{parsed.path}?{query}>; rel="{rel}"')
+                headers = {'Link': ', '.join(links)} if links else {}
+
+                # Условные запросы, как у GitHub: неизменившаяся страница — 304 без тела
+                body = json.dumps(chunk).encode('utf-8')
+                headers['ETag'] = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get('If-None-Match') == headers['ETag']:
+                    with stub._lock:
+                        stub.not_modified += 1
+                    self.send_response(304)
+                    for key, value in headers.items():
+                        self.send_header(key, value)
+                    self.end_headers()
+                    return
+                self._send(200, chunk, headers)
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def start_local_app(github_url, cache_timeout):
+    """Запуск приложения на свободном порту поверх заглушки GitHub"""
+    from werkzeug.serving import make_server
+
+    # Данные заглушки не должны попасть в историю звезд (history.py)
+    os.environ['HISTORY_FILE'] = ''
+    import app as webapp
+
+    webapp.app.config['HISTORY_FILE'] = ''
+    webapp.app.config['GITHUB_API_URL'] = github_url
+    webapp.app.config['GITHUB_TOKEN'] = None
+    webapp.app.config['CACHE_TIMEOUT'] = cache_timeout
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = make_server('127.0.0.1', 0, webapp.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return webapp, server, f'http://127.0.0.1:{server.server_port}'
+
+
+def measure_startup(runs, top=10):
+    """
+    Стоимость импорта приложения: `import app` в свежих интерпретаторах с `-X importtime`
+
+    Returns:
+        dict: медиана и разброс общего времени импорта, самые дорогие прямые импорты app
+    """
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import app'],
+            cwd=app_dir, capture_output=True, text=True, check=True,
+        )
+        # Строки вида: "import time:   self [us] |  cumulative | imported package",
+        # вложенные импорты печатаются раньше родителя и с большим отступом
+        children = []
+        for line in result.stderr.splitlines():
+            parts = line.split('|')
+            if len(parts) != 3 or not parts[1].strip().isdigit():
+                continue
+            name = parts[2].rstrip()
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            cumulative_ms = int(parts[1]) / 1000
+            if depth == 1:
+                children.append((name.strip(), cumulative_ms))
+            elif depth == 0:
+                # Модули интерпретатора (site и т.п.) в отчет не попадают
+                if name.strip() == 'app':
+                    totals.append(cumulative_ms)
+                    for child, ms in children:
+                        modules.setdefault(child, []).append(ms)
+                children = []
+
+    heaviest = sorted(
+        ((name, statistics.median(values)) for name, values in modules.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:top]
+    return {
+        'runs': runs,
+        'median_ms': statistics.median(totals),
+        'min_ms': min(totals),
+        'max_ms': max(totals),
+        'modules': [{'module': name, 'cumulative_ms': ms} for name, ms in heaviest],
+    }
+
+
+def print_startup(report):
+    """Печать отчета о стоимости импорта"""
+    print(f"Импорт app ({report['runs']} запусков): медиана {report['median_ms']:.1f} мс, "
+          f"min {report['min_ms']:.1f} мс, max {report['max_ms']:.1f} мс\n")
+    print(f"{'Модуль':<30}{'мс (кумулятивно)':>18}")
+    print("-" * 48)
+    for entry in report['modules']:
+        print(f"{entry['module']:<30}{entry['cumulative_ms']:>18.1f}")
+
+
+def parse_mix(spec):
+    """Разбор строки вида `index=4,api=2,tag=1` в список (вид запроса, вес)"""
+    kinds = {'index', 'api', 'tag', 'language', 'sort', 'search'}
+    mix = []
+    for part in spec.split(','):
+        kind, _, weight = part.strip().partition('=')
+        if kind not in kinds:
+            raise ValueError(f"Неизвестный вид запроса '{kind}' (доступны: {', '.join(sorted(kinds))})")
+        mix.append((kind, float(weight or 1)))
+    if not any(weight > 0 for _, weight in mix):
+        raise ValueError('Сумма весов в --mix должна быть больше нуля')
+    return mix
+
+
+class RequestPlan:
+    """Выбор очередного запроса согласно смеси и словарю фильтров"""
+
+    def __init__(self, mix, tags, languages, seed):
+        self.kinds = [kind for kind, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.tags = tags or ['python']
+        self.languages = languages or ['Python']
+        self.rnd = random.Random(seed)
+
+    def pick(self):
+        kind = self.rnd.choices(self.kinds, self.weights)[0]
+        if kind == 'index':
+            return kind, '/'
+        if kind == 'api':
+            return kind, '/api/projects'
+        if kind == 'tag':
+            return kind, '/?' + urlencode({'tag': self.rnd.choice(self.tags)})
+        if kind == 'language':
+            return kind, '/?' + urlencode({'language': self.rnd.choice(self.languages)})
+        if kind == 'sort':
+            return kind, '/?' + urlencode({'sort': self.rnd.choice(SORT_ORDERS)})
+        return kind, '/?' + urlencode({'search': self.rnd.choice(self.tags)[:3]})
+
+
+def discover_filters(base_url, timeout):
+    """Получение списка тегов и языков из `/api/projects` (заодно прогревает кэш)"""
+    response = requests.get(f'{base_url}/api/projects', timeout=timeout)
+    response.raise_for_status()
+    tags, languages = set(), set()
+    for project in response.json():
+        tags.update(project.get('tags', []))
+        if project.get('language'):
+            languages.add(project['language'])
+    return sorted(tags), sorted(languages)
+
+
+def percentile(sorted_values, pct):
+    """Перцентиль методом ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples, elapsed):
+    """Сводка по выборке (kind, start, latency, ok)"""
+    latencies = sorted(s[2] for s in samples)
+    errors = sum(1 for s in samples if not s[3])
+    return {
+        'requests': len(samples),
+        'rps': len(samples) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+        'errors': errors,
+        'error_rate': errors / len(samples) if samples else 0.0,
+    }
+
+
+def run_load(base_url, plan_factory, concurrency, duration, total_requests, timeout, on_tick=None):
+    """Замкнутый цикл: `concurrency` потоков шлют запросы, пока не кончится время или лимит"""
+    counter = itertools.count()
+    per_worker = [[] for _ in range(concurrency)]
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    def worker(index):
+        session = requests.Session()
+        plan = plan_factory(index)
+        samples = per_worker[index]
+        while True:
+            seq = next(counter)
+            if total_requests and seq >= total_requests:
+                break
+            if deadline and time.perf_counter() >= deadline:
+                break
+            if on_tick:
+                on_tick(seq)
+            kind, path = plan.pick()
+            begin = time.perf_counter()
+            try:
+                response = session.get(base_url + path, timeout=timeout)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            samples.append((kind, begin - started, time.perf_counter() - begin, ok))
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    return [s for samples in per_worker for s in samples], elapsed
+
+
+def print_report(report):
+    """Печать отчета в человекочитаемом виде"""
+    header = f"{'Запрос':<10}{'Кол-во':>9}{'RPS':>9}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}{'max, мс':>10}{'Ошибки':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report['by_kind'].items()) + [('ИТОГО', report['total'])]
+    for kind, s in rows:
+        print(f"{kind:<10}{s['requests']:>9}{s['rps']:>9.1f}{s['p50_ms']:>10.1f}"
+              f"{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}{s['error_rate']:>8.1%}")
+
+    expiry = report.get('expiry')
+    if expiry:
+        print()
+        print(f"Истечение TTL на {expiry['at_s']:.2f} с:")
+        print(f"  Запросов к GitHub после истечения: {expiry['upstream_hits']} (в идеале — одна загрузка)")
+        window = expiry['window']
+        print(f"  Окно {expiry['window_s']:.0f} с после истечения: {window['requests']} запросов, "
+              f"p99 {window['p99_ms']:.1f} мс, ошибок {window['error_rate']:.1%}")
+
+
+def main(argv=None):
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description='Нагрузочное тестирование PortfolioHub')
+    parser.add_argument('--url', help='Адрес уже запущенного экземпляра (по умолчанию поднимается локальный)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Число параллельных клиентов')
+    parser.add_argument('--duration', type=float, default=10.0, help='Длительность прогона, секунд')
+    parser.add_argument('--requests', type=int, default=0, help='Общее число запросов (вместо --duration)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Смесь запросов (по умолчанию {DEFAULT_MIX})')
+    parser.add_argument('--expire-at', type=float, help='Доля прогона (0..1), на которой сбросить TTL кэша')
+    parser.add_argument('--stub-repos', type=int, default=60, help='Число репозиториев в заглушке GitHub')
+    parser.add_argument('--stub-latency', type=float, default=200.0, help='Задержка заглушки GitHub, мс')
+    parser.add_argument('--cache-timeout', type=int, default=3600, help='TTL кэша локального экземпляра, секунд')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Таймаут одного запроса, секунд')
+    parser.add_argument('--seed', type=int, default=1, help='Seed генератора запросов')
+    parser.add_argument('--json', action='store_true', help='Вывести отчет в JSON')
+    parser.add_argument('--startup', type=int, metavar='RUNS',
+                        help='Вместо нагрузки измерить стоимость импорта приложения за RUNS запусков')
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        report = measure_startup(args.startup)
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            print("=" * 70)
+            print("  Стоимость старта PortfolioHub")
+            print("=" * 70)
+            print()
+            print_startup(report)
+            print("\n" + "=" * 70)
+        return 0
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.expire_at is not None and not 0 <= args.expire_at <= 1:
+        parser.error('--expire-at должен быть в диапазоне 0..1')
+    if args.expire_at is not None and args.url:
+        parser.error('--expire-at доступен только для локального экземпляра')
+    duration = 0 if args.requests else args.duration
+
+    stub = webapp = server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        stub = StubGitHub(args.stub_repos, args.stub_latency / 1000).start()
+        webapp, server, base_url = start_local_app(stub.url, args.cache_timeout)
+
+    if not args.json:
+        print("=" * 70)
+        print("  Нагрузочное тестирование PortfolioHub")
+        print("=" * 70)
+        print(f"\nЦель: {base_url}")
+        print(f"Клиентов: {args.concurrency}, "
+              + (f"запросов: {args.requests}" if args.requests else f"длительность: {duration:.0f} с"))
+        print(f"Смесь: {args.mix}\n")
+
+    try:
+        tags, languages = discover_filters(base_url, args.timeout)
+
+        expiry = {}
+        expire_lock = threading.Lock()
+
+        def expire_now():
+            with expire_lock:
+                if expiry:
+                    return
+                expiry['hits_before'] = stub.hits
+                expiry['at'] = time.perf_counter()
+                webapp.expire_cache()
+
+        on_tick = None
+        timer = None
+        if args.expire_at is not None:
+            if args.requests:
+                threshold = int(args.requests * args.expire_at)
+                on_tick = lambda seq: seq == threshold and expire_now()
+            else:
+                timer = threading.Timer(duration * args.expire_at, expire_now)
+
+        run_started = time.perf_counter()
+        if timer:
+            timer.start()
+        samples, elapsed = run_load(
+            base_url,
+            lambda index: RequestPlan(mix, tags, languages, args.seed + index),
+            args.concurrency, duration, args.requests, args.timeout, on_tick,
+        )
+        if timer:
+            timer.cancel()
+    finally:
+        if server:
+            server.shutdown()
+        if stub:
+            stub.stop()
+
+    by_kind = {}
+    for kind in sorted({s[0] for s in samples}):
+        by_kind[kind] = summarize([s for s in samples if s[0] == kind], elapsed)
+    report = {'url': base_url, 'elapsed_s': elapsed, 'by_kind': by_kind, 'total': summarize(samples, elapsed)}
+
+    if expiry:
+        at = expiry['at'] - run_started
+        window_s = 2.0
+        window = [s for s in samples if at <= s[1] < at + window_s]
+        report['expiry'] = {
+            'at_s': at,
+            'upstream_hits': stub.hits - expiry['hits_before'],
+            'window_s': window_s,
+            'window': summarize(window, window_s),
+        }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+        print("\n" + "=" * 70)
+
+    return 1 if report['total']['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+Индекс проектов для фильтрации и сортировки.
+
+Строится один раз на поколение данных. Для каждого тега и языка хранится
+битовое множество (int) позиций проектов, у которых он есть; фильтр по
+нескольким условиям — пересечение множеств (`&`). Порядки сортировки
+(`updated`, `stars`, `name`) вычисляются заранее в виде списков позиций.
+
+Фасеты (`facets`) — число проектов с каждым тегом и языком среди текущих
+результатов: число битов пересечения множеств (`popcount`). Счетчики тегов
+считаются без учета выбранного тега, счетчики языков — без выбранного языка,
+чтобы было видно, сколько проектов даст переключение фильтра.
+
+Запрос `?q=` (query.py) вычисляется над теми же множествами: теги и языки
+без учета регистра, форки и диапазоны звезд и дат. Для диапазонов позиции
+хранятся по возрастанию ключа, границы ищутся bisect, а число проектов в
+диапазоне известно до построения множества — по нему план запроса выбирает
+порядок пересечения.
+
+Индекс также сериализуется в компактный бандл для браузера (`to_bundle`):
+записи проектов массивами, битовые множества в base64 и готовые порядки.
+"""
+
+import base64
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from itertools import repeat
+
+from query import describe, execute, explain, parse, plan
+
+SORT_ORDERS = ('updated', 'stars', 'name')
+
+# Поля проекта в бандле (записи передаются массивами в этом порядке)
+BUNDLE_FIELDS = ('id', 'name', 'description', 'tags', 'link', 'stars', 'forks',
+                 'language', 'updated_at', 'is_fork')
+
+# Число единичных битов множества: int.bit_count появился в Python 3.10
+try:
+    popcount = int.bit_count
+except AttributeError:
+    def popcount(bits):
+        return bin(bits).count('1')
+
+# Сколько последних поисковых запросов хранить в виде битовых множеств
+SEARCH_CACHE_LIMIT = 64
+
+# Поля с диапазонами для запросов: stars:10..100, updated:>2024-01
+RANGE_FIELDS = {
+    'stars': ('stars', lambda project: project.get('stars', 0)),
+    'updated': ('updated', lambda project: project.get('updated_at') or None),
+}
+
+
+def sort_positions(projects, sort_by):
+    """Позиции проектов в порядке сортировки (те же ключи, что у страницы)"""
+    positions = range(len(projects))
+    if sort_by == 'stars':
+        return sorted(positions, key=lambda i: projects[i].get('stars', 0), reverse=True)
+    if sort_by == 'name':
+        return sorted(positions, key=lambda i: projects[i].get('name', '').lower())
+    if sort_by == 'updated':
+        return sorted(positions, key=lambda i: projects[i].get('updated_at') or '', reverse=True)
+    return list(positions)
+
+
+def encode_bits(bits, size):
+    """Битовое множество в base64 (little-endian, бит i — проект i)"""
+    return base64.b64encode(bits.to_bytes((size + 7) // 8, 'little')).decode('ascii')
+
+
+class ProjectIndex:
+    """Битовые множества тегов, языков и форков плюс предсортированные порядки"""
+
+    def __init__(self, projects):
+        self.projects = list(projects)
+        self.size = len(self.projects)
+        self.all = (1 << self.size) - 1
+
+        # Позиции собираем списками и превращаем в int одним проходом:
+        # побитовое OR в цикле копировало бы большое число на каждом шаге
+        tag_positions = {}
+        language_positions = {}
+        fork_positions = []
+        # Счетчики пар тег/язык: фасеты при фильтре по одному измерению без
+        # поиска берутся готовыми, без пересечения множеств
+        pairs = []
+        for i, project in enumerate(self.projects):
+            tags = set(project.get('tags') or ())
+            for tag in tags:
+                tag_positions.setdefault(tag, []).append(i)
+            language = project.get('language')
+            if language:
+                language_positions.setdefault(language, []).append(i)
+                pairs.extend(zip(repeat(language), tags))
+            if project.get('is_fork'):
+                fork_positions.append(i)
+
+        self.tags_by_language = {}
+        self.languages_by_tag = {}
+        for (language, tag), count in Counter(pairs).items():
+            self.tags_by_language.setdefault(language, {})[tag] = count
+            self.languages_by_tag.setdefault(tag, {})[language] = count
+
+        self.tags = {tag: self._bits(positions) for tag, positions in tag_positions.items()}
+        self.languages = {name: self._bits(positions) for name, positions in language_positions.items()}
+        self.forks = self._bits(fork_positions)
+        self.orders = {sort_by: sort_positions(self.projects, sort_by) for sort_by in SORT_ORDERS}
+        # Счетчики без фильтров — самый частый случай (главная без параметров)
+        self.tag_totals = {tag: len(positions) for tag, positions in tag_positions.items()}
+        self.language_totals = {name: len(positions) for name, positions in language_positions.items()}
+        self.fork_count = len(fork_positions)
+
+        # Для запросов: теги и языки без учета регистра, диапазоны по готовым порядкам
+        self._terms = {
+            'tag': self._fold(self.tags, tag_positions),
+            'language': self._fold(self.languages, language_positions),
+        }
+        self._ranges = {}
+        for field, (order, key) in RANGE_FIELDS.items():
+            # Порядки сортировки по убыванию: в обратном порядке ключи возрастают
+            ascending = [i for i in reversed(self.orders[order]) if key(self.projects[i]) is not None]
+            self._ranges[field] = ([key(self.projects[i]) for i in ascending], ascending)
+
+        # Текст для поиска в нижнем регистре, чтобы не переводить его на каждый запрос
+        self._names = [(project.get('name') or '').lower() for project in self.projects]
+        self._descriptions = [(project.get('description') or '').lower() for project in self.projects]
+        self._searches = OrderedDict()
+        self._facets = OrderedDict()
+        self._range_bits = OrderedDict()
+        self._queries = OrderedDict()
+
+    def _bits(self, positions):
+        flags = bytearray((self.size + 7) // 8)
+        for i in positions:
+            flags[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(flags, 'little')
+
+    def _fold(self, sets, positions):
+        # {имя в нижнем регистре: (множество, число)}; разный регистр одного имени объединяется
+        groups = {}
+        for name in sets:
+            groups.setdefault(name.lower(), []).append(name)
+        folded = {}
+        for key, names in groups.items():
+            if len(names) == 1:
+                folded[key] = (sets[names[0]], len(positions[names[0]]))
+            else:
+                bits = self._bits(i for name in names for i in positions[name])
+                folded[key] = (bits, popcount(bits))
+        return folded
+
+    def term_count(self, kind, name):
+        """Число проектов с тегом или языком name (kind: tag, language или word — любой из них)"""
+        if kind == 'word':
+            return min(self.size, self.term_count('tag', name) + self.term_count('language', name))
+        return self._terms[kind].get(name, (0, 0))[1]
+
+    def term_bits(self, kind, name):
+        """Множество проектов с тегом или языком name (в нижнем регистре)"""
+        if kind == 'word':
+            return self.term_bits('tag', name) | self.term_bits('language', name)
+        return self._terms[kind].get(name, (0, 0))[0]
+
+    def _range_slice(self, field, low, high):
+        keys, positions = self._ranges[field]
+        start = 0 if low is None else bisect_left(keys, low)
+        end = len(keys) if high is None else bisect_left(keys, high)
+        return positions, start, max(start, end)
+
+    def range_count(self, field, low, high):
+        """Число проектов с low <= значение < high, без построения множества"""
+        _, start, end = self._range_slice(field, low, high)
+        return end - start
+
+    def range_bits(self, field, low, high):
+        """Множество проектов с low <= значение поля < high (None — без границы)"""
+        key = (field, low, high)
+        bits = self._range_bits.get(key)
+        if bits is None:
+            positions, start, end = self._range_slice(field, low, high)
+            bits = self._range_bits[key] = self._bits(positions[start:end])
+            if len(self._range_bits) > SEARCH_CACHE_LIMIT:
+                self._range_bits.popitem(last=False)
+        return bits
+
+    def query(self, text):
+        """
+        Множество проектов по запросу на языке query.py
+
+        Raises:
+            QueryError: синтаксическая ошибка в запросе
+        """
+        bits = self._queries.get(text)
+        if bits is None:
+            bits = self._queries[text] = execute(plan(parse(text), self), self)
+            if len(self._queries) > SEARCH_CACHE_LIMIT:
+                self._queries.popitem(last=False)
+        return bits
+
+    def explain(self, text):
+        """
+        Запрос в каноническом виде и план вычисления с оценками (для ?explain=1)
+
+        Raises:
+            QueryError: синтаксическая ошибка в запросе
+        """
+        tree = parse(text)
+        return describe(tree), explain(plan(tree, self))
+
+    def search(self, query):
+        """Битовое множество проектов, в названии или описании которых есть query"""
+        query = query.lower()
+        bits = self._searches.get(query)
+        if bits is None:
+            bits = self._bits(
+                i for i, (name, description) in enumerate(zip(self._names, self._descriptions))
+                if query in name or query in description
+            )
+            self._searches[query] = bits
+            if len(self._searches) > SEARCH_CACHE_LIMIT:
+                self._searches.popitem(last=False)
+        return bits
+
+    def _filters(self, tag, language, search, query=None):
+        # Множества по каждому измерению фильтра (all, если фильтр не задан);
+        # запрос q сужает то же измерение, что и поиск
+        search_bits = self.search(search) if search else self.all
+        if query:
+            search_bits &= self.query(query)
+        return (
+            self.tags.get(tag, 0) if tag else self.all,
+            self.languages.get(language, 0) if language else self.all,
+            search_bits
+        )
+
+    def select(self, tag=None, language=None, search=None, query=None):
+        """Битовое множество проектов, подходящих под фильтры страницы и запрос q"""
+        tag_bits, language_bits, search_bits = self._filters(tag, language, search, query)
+        return tag_bits & language_bits & search_bits
+
+    def facets(self, tag=None, language=None, search=None, query=None):
+        """
+        Счетчики тегов и языков для текущих фильтров
+
+        Счетчик тега — сколько проектов будет найдено, если выбрать этот тег
+        вместо текущего (остальные фильтры сохраняются); так же для языков.
+
+        Returns:
+            dict: total (найдено проектов), tags и languages — списки
+                (название, число) по убыванию числа; выбранные значения
+                остаются в списке даже с нулем
+        """
+        if search or query:
+            key = (tag or None, language or None, (search or '').lower(), query or None)
+            facets = self._facets.get(key)
+            if facets is None:
+                facets = self._facets[key] = self._search_facets(tag, language, search, query)
+                if len(self._facets) > SEARCH_CACHE_LIMIT:
+                    self._facets.popitem(last=False)
+            return facets
+
+        # Без поиска база для тегов — множество языка, для языков — множество тега
+        tag_counts = self.tags_by_language.get(language, {}) if language else self.tag_totals
+        language_counts = self.languages_by_tag.get(tag, {}) if tag else self.language_totals
+        if tag:
+            total = tag_counts.get(tag, 0)
+        else:
+            total = self.language_totals.get(language, 0) if language else self.size
+        return {
+            'total': total,
+            'tags': self._items(tag_counts, tag),
+            'languages': self._items(language_counts, language),
+        }
+
+    def _search_facets(self, tag, language, search, query):
+        # С поиском или запросом: popcount пересечения множеств
+        tag_bits, language_bits, search_bits = self._filters(tag, language, search, query)
+        tag_base = language_bits & search_bits
+        language_base = tag_bits & search_bits
+        return {
+            'total': popcount(tag_base & tag_bits),
+            'tags': self._items({key: popcount(bits & tag_base) for key, bits in self.tags.items()}, tag),
+            'languages': self._items(
+                {key: popcount(bits & language_base) for key, bits in self.languages.items()}, language
+            ),
+        }
+
+    @staticmethod
+    def _items(counts, selected):
+        items = [(key, count) for key, count in counts.items() if count or key == selected]
+        if selected and selected not in counts:
+            items.append((selected, 0))
+        items.sort(key=lambda item: (-item[1], item[0]))
+        return items
+
+    def ordered(self, bits, sort_by):
+        """Проекты из множества bits в порядке сортировки sort_by"""
+        order = self.orders.get(sort_by) or range(self.size)
+        if bits == self.all:
+            return [self.projects[i] for i in order]
+        flags = bits.to_bytes((self.size + 7) // 8, 'little')
+        return [self.projects[i] for i in order if flags[i >> 3] >> (i & 7) & 1]
+
+    def to_bundle(self, version):
+        """Компактное представление индекса для фильтрации в браузере"""
+        return {
+            'version': version,
+            'fields': list(BUNDLE_FIELDS),
+            'projects': [[project.get(field) for field in BUNDLE_FIELDS] for project in self.projects],
+            'tags': {tag: encode_bits(bits, self.size) for tag, bits in sorted(self.tags.items())},
+            'languages': {name: encode_bits(bits, self.size) for name, bits in sorted(self.languages.items())},
+            'forks': encode_bits(self.forks, self.size),
+            'orders': self.orders
+        }
@@ -0,0 +1,227 @@
+"""
+Упакованный каталог проектов (pack-файл).
+
+Собирает содержимое всех `projects/*/info.json` в один файл, который
+приложение и утилиты читают через mmap вместо тысяч мелких файлов.
+
+Формат (little-endian):
+    заголовок:  magic (8 байт) | версия u32 | число записей u32 | смещение индекса u64
+    записи:     длина u32 | длина имени u16 | имя (utf-8) | исходные байты info.json
+    индекс:     на каждую запись: смещение u64 | mtime_ns i64 | размер файла u64
+
+Путь к pack-файлу по умолчанию — PROJECTS_PACK из config.py, тот же, что
+открывает сервер; пустое значение отключает pack.
+
+Записи хранят исходные байты info.json и декодируются лениво. Индекс хранит
+mtime и размер исходных файлов: если каталог изменился после сборки, pack
+считается устаревшим и читатели возвращаются к папке projects.
+
+Пример:
+    python projectpack.py build
+    python projectpack.py check
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+# Исправление кодировки для Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+MAGIC = b'PHPACK\x00\x00'
+VERSION = 1
+
+HEADER = struct.Struct('<8sIIQ')
+INDEX_ENTRY = struct.Struct('<QqQ')
+RECORD_PREFIX = struct.Struct('<IH')
+
+
+class PackError(Exception):
+    """Поврежденный или несовместимый pack-файл"""
+
+
+def configured_pack():
+    """Pack-файл из настроек (PROJECTS_PACK, config.py); пустая строка — pack отключен"""
+    from config import Config
+
+    return Config.PROJECTS_PACK
+
+
+def scan_listing(projects_dir):
+    """Список (имя проекта, mtime_ns, размер) для всех `projects_dir/*/info.json`, по имени"""
+    listing = []
+    with os.scandir(projects_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            try:
+                stat = os.stat(os.path.join(entry.path, 'info.json'))
+            except OSError:
+                continue
+            listing.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    listing.sort()
+    return listing
+
+
+def build_pack(projects_dir='projects', pack_path=None):
+    """
+    Сборка pack-файла из папки проектов (запись через временный файл)
+
+    Returns:
+        int: число записей
+    """
+    projects_dir = Path(projects_dir)
+    pack_path = Path(pack_path or configured_pack())
+    tmp_path = pack_path.with_name(f'.{pack_path.name}.{os.getpid()}.tmp')
+    index = []
+
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+            for name, mtime_ns, size in scan_listing(projects_dir):
+                raw = (projects_dir / name / 'info.json').read_bytes()
+                name_bytes = name.encode('utf-8')
+                offset = f.tell()
+                f.write(RECORD_PREFIX.pack(2 + len(name_bytes) + len(raw), len(name_bytes)))
+                f.write(name_bytes)
+                f.write(raw)
+                # Файл мог измениться между stat и чтением: тогда pack просто окажется устаревшим
+                index.append((offset, mtime_ns, size))
+
+            index_offset = f.tell()
+            for entry in index:
+                f.write(INDEX_ENTRY.pack(*entry))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, len(index), index_offset))
+        os.replace(tmp_path, pack_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    return len(index)
+
+
+class ProjectPack:
+    """Pack-файл, отображенный в память; записи декодируются по требованию"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < HEADER.size:
+                raise PackError('Файл слишком короткий')
+            magic, version, count, index_offset = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != VERSION:
+                raise PackError('Неизвестный формат pack-файла')
+            if index_offset + count * INDEX_ENTRY.size > len(self._mmap):
+                raise PackError('Индекс выходит за границы файла')
+            self._index = list(INDEX_ENTRY.iter_unpack(
+                self._mmap[index_offset:index_offset + count * INDEX_ENTRY.size]
+            ))
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def __len__(self):
+        return len(self._index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mmap.close()
+
+    def _record(self, i):
+        offset = self._index[i][0]
+        length, name_length = RECORD_PREFIX.unpack_from(self._mmap, offset)
+        name_start = offset + RECORD_PREFIX.size
+        return name_start, name_length, offset + 4 + length
+
+    def name(self, i):
+        """Имя проекта (папки) записи i"""
+        name_start, name_length, _ = self._record(i)
+        return self._mmap[name_start:name_start + name_length].decode('utf-8')
+
+    def raw(self, i):
+        """Исходные байты info.json записи i"""
+        name_start, name_length, end = self._record(i)
+        return self._mmap[name_start + name_length:end]
+
+    def stat(self, i):
+        """(mtime_ns, размер) исходного info.json на момент сборки"""
+        return self._index[i][1], self._index[i][2]
+
+    def listing(self):
+        """Список (имя, mtime_ns, размер) в том же виде, что scan_listing()"""
+        return [(self.name(i), *self.stat(i)) for i in range(len(self))]
+
+    def items(self):
+        """Пары (имя проекта, байты info.json) в порядке имен"""
+        for i in range(len(self)):
+            yield self.name(i), self.raw(i)
+
+    def is_fresh(self, projects_dir):
+        """Pack соответствует текущему состоянию папки проектов"""
+        return self.listing() == scan_listing(projects_dir)
+
+
+def open_pack(projects_dir='projects', pack_path=None):
+    """Открыть pack, если он есть и не устарел; иначе None (читать папку напрямую)"""
+    if pack_path is None:
+        pack_path = configured_pack()
+    if not pack_path or not os.path.exists(pack_path) or not os.path.isdir(projects_dir):
+        return None
+    try:
+        pack = ProjectPack(pack_path)
+    except (OSError, ValueError, PackError, struct.error):
+        return None
+    if not pack.is_fresh(projects_dir):
+        pack.close()
+        return None
+    return pack
+
+
+def main(argv=None):
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description='Упаковка каталога проектов PortfolioHub')
+    parser.add_argument('command', nargs='?', default='build', choices=['build', 'check'],
+                        help='build — собрать pack, check — проверить актуальность')
+    parser.add_argument('--projects-dir', default='projects', help='Папка с проектами')
+    parser.add_argument('--output', default=configured_pack(),
+                        help='Pack-файл (по умолчанию PROJECTS_PACK из config.py)')
+    args = parser.parse_args(argv)
+
+    if not args.output:
+        print("❌ Pack-файл не задан: PROJECTS_PACK пуст, укажите --output")
+        return 1
+
+    if not Path(args.projects_dir).exists():
+        print(f"❌ Папка '{args.projects_dir}' не найдена!")
+        return 1
+
+    if args.command == 'check':
+        pack = open_pack(args.projects_dir, args.output)
+        if pack is None:
+            print(f"⚠️  {args.output} отсутствует или устарел")
+            return 1
+        with pack:
+            print(f"✅ {args.output} актуален ({len(pack)} проектов)")
+        return 0
+
+    count = build_pack(args.projects_dir, args.output)
+    size = Path(args.output).stat().st_size
+    print(f"✅ Собран {args.output}: {count} проектов, {size / 1024:.1f} КБ")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
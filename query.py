@@ -0,0 +1,368 @@
+"""
+Язык запросов для фильтра `?q=`.
+
+    python AND (flask OR fastapi) NOT fork
+    lang:Go stars:>=10 updated:>2024-01
+    tag:"machine learning" -is:fork stars:5..50
+
+Условия:
+    python, "c++"            тег или язык (без учета регистра)
+    tag:python               только тег (tags:, t:)
+    lang:Go                  только язык (language:, l:)
+    fork, is:fork            форк
+    stars:10                 ровно 10 звезд; stars:>10, >=, <, <=
+    stars:10..100            диапазон включительно; stars:10.. и stars:..100
+    updated:2024-03          обновлен в марте 2024 (год, месяц или день);
+                             updated:>2024-01-15, updated:2023..2024-06
+
+Операторы: NOT (или `-` перед условием), AND (или просто пробел), OR и
+скобки; приоритет NOT > AND > OR. Ключевые слова — заглавными буквами, чтобы
+тег `or` оставался тегом.
+
+Запрос разбирается в дерево (`parse`, результат кэшируется), затем для
+конкретного индекса строится план (`plan`): оценка числа проектов у каждого
+узла и порядок AND от самого избирательного условия. `execute` вычисляет
+план над битовыми множествами ProjectIndex, прерывая AND, как только
+пересечение стало пустым; отрицания внутри AND вычитаются (`& ~`) после
+положительных условий, без построения дополнения.
+"""
+
+import re
+from functools import lru_cache
+
+FIELDS = {
+    'tag': 'tag', 'tags': 'tag', 't': 'tag',
+    'lang': 'language', 'language': 'language', 'l': 'language',
+    'stars': 'stars', 'star': 'stars',
+    'updated': 'updated',
+    'is': 'is',
+}
+
+KEYWORDS = ('AND', 'OR', 'NOT')
+
+# Сколько разобранных запросов хранить (разбор не зависит от данных)
+PARSE_CACHE_SIZE = 256
+
+WORD_RE = re.compile(r'(?:(?P<field>[A-Za-z_]+):)?(?:"(?P<quoted>[^"]*)"|(?P<value>[^\s()"]+))')
+RANGE_RE = re.compile(r'^(?P<low>[^.]*)\.\.(?P<high>[^.]*)$')
+COMPARE_RE = re.compile(r'^(?P<op>[<>]=?)?(?P<value>.+)$')
+DATE_RE = re.compile(r'^\d{4}(-\d{2}(-\d{2})?)?$')
+
+# Больше любого символа даты: '2024-01' + DATE_END — конец января
+DATE_END = '\uffff'
+
+
+class QueryError(ValueError):
+    """Ошибка в тексте запроса; position — смещение в строке"""
+
+    def __init__(self, message, position=None):
+        super().__init__(message)
+        self.position = position
+
+
+def tokenize(text):
+    """
+    Токены запроса: (вид, значение, позиция)
+
+    Виды: '(' и ')', AND/OR/NOT, term — (поле или None, значение, в кавычках ли).
+    """
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        char = text[pos]
+        if char.isspace():
+            pos += 1
+        elif char in '()':
+            tokens.append((char, char, pos))
+            pos += 1
+        elif char == '-' and pos + 1 < len(text) and not text[pos + 1].isspace():
+            tokens.append(('NOT', char, pos))
+            pos += 1
+        else:
+            match = WORD_RE.match(text, pos)
+            if match is None:
+                raise QueryError('Незакрытая кавычка', pos)
+            field, quoted, value = match.group('field', 'quoted', 'value')
+            if field is None and quoted is None and value.endswith(':'):
+                raise QueryError(f"Пустое значение поля '{value[:-1]}'", pos)
+            if quoted is None and field is None and value in KEYWORDS:
+                tokens.append((value, value, pos))
+            else:
+                tokens.append(('term', (field, value if quoted is None else quoted, quoted is not None), pos))
+            pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Рекурсивный спуск: or := and (OR and)*, and := not (AND? not)*, not := NOT not | atom"""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def position(self):
+        return self.tokens[self.pos][2] if self.pos < len(self.tokens) else len(self.text)
+
+    def parse(self):
+        if not self.tokens:
+            raise QueryError('Пустой запрос', 0)
+        node = self.parse_or()
+        if self.pos < len(self.tokens):
+            raise QueryError('Лишняя закрывающая скобка', self.position())
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.take()
+            children.append(self.parse_and())
+        return _combine('or', children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() not in (None, 'OR', ')'):
+            if self.peek() == 'AND':
+                self.take()
+            children.append(self.parse_not())
+        return _combine('and', children)
+
+    def parse_not(self):
+        if self.peek() == 'NOT':
+            self.take()
+            node = self.parse_not()
+            # NOT NOT x == x
+            return node[1] if node[0] == 'not' else ('not', node)
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind = self.peek()
+        if kind is None:
+            raise QueryError('Запрос оборвался: ожидалось условие', len(self.text))
+        if kind == '(':
+            self.take()
+            node = self.parse_or()
+            if self.peek() != ')':
+                raise QueryError('Не хватает закрывающей скобки', self.position())
+            self.take()
+            return node
+        if kind != 'term':
+            raise QueryError(f"Ожидалось условие, а не '{self.tokens[self.pos][1]}'", self.position())
+        _, (field, value, quoted), position = self.take()
+        return term(field, value, position, quoted)
+
+
+def _combine(op, children):
+    # Вложенные and/or того же вида разворачиваются: a AND (b AND c) -> and(a, b, c)
+    flat = []
+    for child in children:
+        flat.extend(child[1] if child[0] == op else (child,))
+    return flat[0] if len(flat) == 1 else (op, tuple(flat))
+
+
+def term(field, value, position=None, quoted=False):
+    """Узел дерева для одного условия `поле:значение` (в кавычках "fork" — тег)"""
+    if field is None:
+        if value.lower() == 'fork' and not quoted:
+            return ('fork',)
+        return ('word', value.lower())
+    name = FIELDS.get(field.lower())
+    if name is None:
+        raise QueryError(f"Неизвестное поле '{field}'", position)
+    if not value:
+        raise QueryError(f"Пустое значение поля '{field}'", position)
+    if name == 'is':
+        if value.lower() != 'fork':
+            raise QueryError(f"Неизвестное условие 'is:{value}'", position)
+        return ('fork',)
+    if name in ('tag', 'language'):
+        return (name, value.lower())
+    if name == 'stars':
+        return ('stars',) + _stars_range(value, position)
+    return ('updated',) + _date_range(value, position)
+
+
+def _bounds(value, position, convert, after):
+    """
+    Полуинтервал [low, high) для `a..b`, `>a`, `<=a`, `a` (None — без границы)
+
+    convert — разбор значения, after(x) — наименьшее значение, большее x и всех уточнений x
+    """
+    match = RANGE_RE.match(value)
+    if match:
+        low, high = match.group('low', 'high')
+        if not low and not high:
+            raise QueryError(f"Пустой диапазон '{value}'", position)
+        return (convert(low) if low else None), (after(convert(high)) if high else None)
+    op, value = COMPARE_RE.match(value).group('op', 'value')
+    value = convert(value)
+    if op == '>':
+        return after(value), None
+    if op == '>=':
+        return value, None
+    if op == '<':
+        return None, value
+    if op == '<=':
+        return None, after(value)
+    return value, after(value)
+
+
+def _stars_range(value, position):
+    def convert(text):
+        if not text.isdigit():
+            raise QueryError(f"Число звезд должно быть целым: '{text}'", position)
+        return int(text)
+
+    return _bounds(value, position, convert, lambda stars: stars + 1)
+
+
+def _date_range(value, position):
+    def convert(text):
+        if not DATE_RE.match(text):
+            raise QueryError(f"Дата должна быть в формате ГГГГ, ГГГГ-ММ или ГГГГ-ММ-ДД: '{text}'", position)
+        return text
+
+    # Даты сравниваются как строки ISO 8601: '2024-01' покрывает весь январь
+    return _bounds(value, position, convert, lambda date: date + DATE_END)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse(text):
+    """
+    Дерево запроса из кортежей
+
+    Узлы: ('and', children), ('or', children), ('not', node), ('word', name),
+    ('tag', name), ('language', name), ('fork',), ('stars', low, high),
+    ('updated', low, high); диапазоны — полуинтервалы [low, high).
+
+    Raises:
+        QueryError: синтаксическая ошибка
+    """
+    return _Parser(text).parse()
+
+
+def describe(node):
+    """Запрос в каноническом виде (поле query ответа /api/projects?explain=1)"""
+    op = node[0]
+    if op in ('and', 'or'):
+        parts = []
+        for child in node[1]:
+            text = describe(child)
+            parts.append(f'({text})' if op == 'and' and child[0] == 'or' else text)
+        return (' AND ' if op == 'and' else ' OR ').join(parts)
+    if op == 'not':
+        text = describe(node[1])
+        return f'NOT ({text})' if node[1][0] in ('and', 'or') else f'NOT {text}'
+    if op == 'fork':
+        return 'is:fork'
+    if op in ('word', 'tag', 'language'):
+        value = node[1]
+        if not WORD_RE.fullmatch(value) or ':' in value or value.upper() in KEYWORDS or value == 'fork':
+            value = f'"{value}"'
+        return value if op == 'word' else f'{op}:{value}'
+    low, high = node[1], node[2]
+    if op == 'stars':
+        if high is None:
+            return f'stars:>={low}'
+        if low is None:
+            return f'stars:<{high}'
+        return f'stars:{low}' if high == low + 1 else f'stars:{low}..{high - 1}'
+    if high is None:
+        return f'updated:>={low}' if not low.endswith(DATE_END) else f'updated:>{low[:-1]}'
+    if low is None:
+        return f'updated:<{high}' if not high.endswith(DATE_END) else f'updated:<={high[:-1]}'
+    if high == low + DATE_END:
+        return f'updated:{low}'
+    return f'updated:{low}..{high[:-1]}'
+
+
+def estimate(node, index):
+    """Оценка числа проектов, подходящих под узел (для порядка вычисления)"""
+    op = node[0]
+    if op == 'and':
+        positive = [estimate(child, index) for child in node[1] if child[0] != 'not']
+        return min(positive) if positive else index.size
+    if op == 'or':
+        return min(index.size, sum(estimate(child, index) for child in node[1]))
+    if op == 'not':
+        return index.size - estimate(node[1], index)
+    if op == 'fork':
+        return index.fork_count
+    if op in ('stars', 'updated'):
+        return index.range_count(op, node[1], node[2])
+    return index.term_count(op, node[1])
+
+
+def plan(node, index):
+    """
+    План вычисления: дерево с оценками, AND — от самого избирательного условия
+
+    Узлы плана: (op, оценка, children | аргументы). Отрицания внутри AND
+    ставятся в конец: они только вычитают из уже найденного.
+    """
+    op = node[0]
+    if op in ('and', 'or'):
+        children = [plan(child, index) for child in node[1]]
+        if op == 'and':
+            children.sort(key=lambda child: (child[0] == 'not', child[1]))
+            cost = min([child[1] for child in children if child[0] != 'not'] or [index.size])
+        else:
+            # Самые большие множества первыми: OR раньше заполнится целиком
+            children.sort(key=lambda child: -child[1])
+            cost = min(index.size, sum(child[1] for child in children))
+        return (op, cost, tuple(children))
+    if op == 'not':
+        child = plan(node[1], index)
+        return ('not', index.size - child[1], child)
+    return (op, estimate(node, index), node[1:])
+
+
+def execute(step, index):
+    """Битовое множество проектов по плану"""
+    op = step[0]
+    if op == 'and':
+        bits = None
+        for child in step[2]:
+            if child[0] == 'not':
+                bits = (index.all if bits is None else bits) & ~execute(child[2], index)
+            else:
+                child_bits = execute(child, index)
+                bits = child_bits if bits is None else bits & child_bits
+            if not bits:
+                return 0
+        return bits
+    if op == 'or':
+        bits = 0
+        for child in step[2]:
+            bits |= execute(child, index)
+            if bits == index.all:
+                break
+        return bits
+    if op == 'not':
+        return index.all & ~execute(step[2], index)
+    if op == 'fork':
+        return index.forks
+    if op in ('stars', 'updated'):
+        return index.range_bits(op, *step[2])
+    return index.term_bits(op, step[2][0])
+
+
+def explain(step, depth=0):
+    """План в виде строк с оценками (поле plan ответа /api/projects?explain=1)"""
+    op, cost = step[0], step[1]
+    if op in ('and', 'or'):
+        lines = [f"{'  ' * depth}{op.upper()} ~{cost}"]
+        for child in step[2]:
+            lines.extend(explain(child, depth + 1))
+        return lines
+    if op == 'not':
+        return [f"{'  ' * depth}NOT ~{cost}"] + explain(step[2], depth + 1)
+    return [f"{'  ' * depth}{describe((op,) + tuple(step[2]))} ~{cost}"]
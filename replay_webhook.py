@@ -0,0 +1,138 @@
+"""
+Отправка записанных событий GitHub на вебхук локального сервера.
+
+Файл события — JSON одного из видов:
+    {"event": "star", "delivery": "<ID>", "payload": {...}}   - запись доставки
+    {...}                                                     - только payload (тип — из --event)
+
+Тело подписывается секретом (--secret или GITHUB_WEBHOOK_SECRET), как это
+делает GitHub. По умолчанию каждая отправка получает новый ID доставки;
+с --keep-delivery используется записанный — так проверяется защита от повторов.
+
+Примеры:
+    python replay_webhook.py deliveries/star.json
+    python replay_webhook.py payload.json --event push --url http://localhost:5000
+    python replay_webhook.py deliveries/*.json --keep-delivery
+"""
+
+import argparse
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from webhooks import sign
+
+# Исправление кодировки для Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+WEBHOOK_PATH = '/api/github/webhook'
+
+
+def load_delivery(path, event=None):
+    """
+    Событие из файла
+
+    Returns:
+        Tuple[str, str | None, bytes]: (тип события, записанный ID доставки, тело)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'payload' in data and ('event' in data or event):
+        event = event or data['event']
+        return event, data.get('delivery'), json.dumps(data['payload'], ensure_ascii=False).encode('utf-8')
+    if not event:
+        raise ValueError(f"{path}: тип события не записан в файле, укажите --event")
+    return event, None, json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def post_delivery(url, secret, event, delivery_id, body, timeout=10):
+    """
+    POST события с подписью X-Hub-Signature-256
+
+    Returns:
+        Tuple[int, dict | str]: (код ответа, ответ сервера)
+    """
+    request = Request(url, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'User-Agent': 'GitHub-Hookshot/replay',
+        'X-GitHub-Event': event,
+        'X-GitHub-Delivery': delivery_id,
+        'X-Hub-Signature-256': sign(secret, body),
+    })
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            status, raw = response.status, response.read()
+    except HTTPError as e:
+        status, raw = e.code, e.read()
+    try:
+        return status, json.loads(raw)
+    except ValueError:
+        return status, raw.decode('utf-8', 'replace')
+
+
+def main(argv=None):
+    """Отправка событий из файлов"""
+    parser = argparse.ArgumentParser(description='Отправка записанных событий GitHub на вебхук PortfolioHub')
+    parser.add_argument('files', nargs='+', help='JSON-файлы событий')
+    parser.add_argument('--url', default='http://localhost:5000', help='Адрес сервера')
+    parser.add_argument('--event', help='Тип события для файлов с одним payload (push, star, ...)')
+    parser.add_argument('--secret', default=os.environ.get('GITHUB_WEBHOOK_SECRET'),
+                        help='Секрет вебхука (по умолчанию GITHUB_WEBHOOK_SECRET)')
+    parser.add_argument('--keep-delivery', action='store_true',
+                        help='Использовать записанный ID доставки вместо нового')
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("  Повтор событий вебхука GitHub")
+    print("=" * 70)
+    print()
+
+    if not args.secret:
+        print("❌ Не задан секрет: --secret или GITHUB_WEBHOOK_SECRET")
+        sys.exit(1)
+
+    url = args.url.rstrip('/') + WEBHOOK_PATH
+    failed = 0
+    for path in args.files:
+        name = Path(path).name
+        try:
+            event, recorded, body = load_delivery(path, args.event)
+        except (OSError, ValueError) as e:
+            print(f"❌ {name}: {e}")
+            failed += 1
+            continue
+
+        delivery_id = recorded if args.keep_delivery and recorded else str(uuid.uuid4())
+        try:
+            status, response = post_delivery(url, args.secret, event, delivery_id, body)
+        except (URLError, OSError) as e:
+            print(f"❌ {name}: сервер недоступен ({e})")
+            failed += 1
+            continue
+
+        if status >= 400:
+            failed += 1
+            print(f"❌ {name} [{event}] -> HTTP {status}: {response}")
+        elif isinstance(response, dict):
+            details = ', '.join(f"{key}: {response[key]}"
+                                for key in ('status', 'repository', 'result', 'generation') if key in response)
+            print(f"✅ {name} [{event}] -> HTTP {status}, {details}")
+        else:
+            print(f"✅ {name} [{event}] -> HTTP {status}")
+
+    print()
+    print("=" * 70)
+    print(f"  📨 Отправлено: {len(args.files)}, с ошибками: {failed}")
+    print("=" * 70)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
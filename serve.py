@@ -0,0 +1,199 @@
+"""
+Запуск PortfolioHub в продакшене через gunicorn.
+
+Мастер-процесс импортирует приложение, собирает статику (assets.py) и
+прогревает кэши (GitHub, локальные проекты, шаблон главной страницы) до
+запуска воркеров. Воркеры создаются
+через fork и получают уже загруженные данные без повторных запросов к GitHub;
+`gc.freeze()` перед fork не дает сборщику мусора в воркерах трогать эти
+объекты, поэтому страницы памяти остаются общими (copy-on-write).
+
+По SIGHUP мастер заново загружает данные и плавно заменяет воркеры:
+старые дообслуживают свои запросы, новые стартуют уже с прогретым кэшем.
+
+`/api/refresh` (и вебхук GitHub) приходит в один воркер; остальные узнают о
+нем из общего журнала команд (broadcast.py). Если BROADCAST_FILE не задан,
+мастер создает для журнала временный файл и удаляет его при выходе.
+
+Настройки (аргументы или переменные окружения):
+    PORT              - порт (по умолчанию 5000)
+    WEB_CONCURRENCY   - число воркеров (по умолчанию — число ядер)
+    WEB_THREADS       - потоков на воркер (по умолчанию 4)
+    WEB_TIMEOUT       - таймаут запроса в секундах (по умолчанию 30)
+    EVENTS_PORT       - порт асинхронного сервера SSE (`/api/events`) в каждом воркере
+
+Примеры:
+    python serve.py
+    python serve.py --workers 4 --threads 8
+    kill -HUP <pid мастера>    # перезагрузка данных без простоя
+
+На платформах без gunicorn (Windows) запускается встроенный сервер Flask.
+"""
+
+import argparse
+import atexit
+import gc
+import os
+import sys
+import tempfile
+import time
+
+# Исправление кодировки для Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def build_assets(webapp):
+    """Сборка static/dist; без нее страницы ссылаются на исходные файлы"""
+    import assets
+
+    try:
+        stats = assets.build(webapp.app.static_folder)
+    except OSError as e:
+        # Например, файловая система только для чтения: используем то, что есть
+        print(f"⚠️  Статика не собрана: {e}")
+        return
+    print(f"✅ Статика: файлов {stats['assets']}, записано {stats['written']}")
+
+
+def share_broadcast(webapp):
+    """Временный файл журнала команд (broadcast.py), общий для воркеров"""
+    if webapp.app.config['BROADCAST_FILE']:
+        return
+    fd, path = tempfile.mkstemp(prefix='portfoliohub-', suffix='.bus')
+    os.close(fd)
+    webapp.app.config['BROADCAST_FILE'] = path
+    master = os.getpid()
+
+    def remove():
+        # Воркеры тоже выполняют atexit: файл удаляет только мастер
+        if os.getpid() == master and os.path.exists(path):
+            os.remove(path)
+
+    atexit.register(remove)
+
+
+def warm(webapp):
+    """Синхронный прогрев кэшей в мастере и заморозка объектов перед fork"""
+    started = time.perf_counter()
+    build_assets(webapp)
+    # Сжатие истории — в воркерах: фоновый поток мастера не переживет fork
+    webapp._history['compaction'] = False
+    webapp.warm_up()
+    # Сетевые соединения воркерам не наследуем: каждый откроет свои
+    webapp.close_github_client()
+    # Все, что загружено до этого момента, переходит в постоянное поколение GC
+    gc.freeze()
+    print(f"✅ Кэш прогрет за {time.perf_counter() - started:.2f} с "
+          f"(поколение данных {webapp._data['generation']}, проектов: {len(webapp._data['projects'] or [])})")
+
+
+def build_options(args):
+    """Настройки gunicorn"""
+    options = {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'threads': args.threads,
+        'timeout': args.timeout,
+        'graceful_timeout': args.timeout,
+        'preload_app': True,
+        'accesslog': '-' if args.access_log else None,
+        'errorlog': '-',
+    }
+    # При нескольких потоках на воркер нужен gthread (sync обслуживает один запрос)
+    options['worker_class'] = 'gthread' if args.threads > 1 else 'sync'
+    return options
+
+
+def run_gunicorn(args):
+    """Запуск gunicorn с приложением, загруженным в мастере"""
+    from gunicorn.app.base import BaseApplication
+
+    class PortfolioApplication(BaseApplication):
+        """gunicorn-приложение: загрузка и прогрев в мастере, перезагрузка данных по SIGHUP"""
+
+        def __init__(self, options):
+            self.options = options
+            self.webapp = None
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+            self.cfg.set('post_fork', self.post_fork)
+            self.cfg.set('on_reload', self.on_reload)
+
+        def load(self):
+            # Пока идет загрузка, сборщик мусора не дробит страницы, которые
+            # потом разделят воркеры
+            gc.disable()
+            import app as webapp
+            self.webapp = webapp
+            if args.workers > 1:
+                share_broadcast(webapp)
+                # Точка отсчета журнала — до fork: воркеры применят все команды после нее
+                webapp.get_broadcast()
+            if args.warmup:
+                warm(webapp)
+            return webapp.app
+
+        def post_fork(self, server, worker):
+            gc.enable()
+            if self.webapp is not None:
+                self.webapp._history['compaction'] = True
+                # У каждого воркера свой сервер SSE на общем порту (EVENTS_PORT, reuse_port)
+                self.webapp.start_event_server()
+
+        def on_reload(self, arbiter):
+            # Вызывается в мастере по SIGHUP до запуска новых воркеров
+            if self.webapp is None or not args.warmup:
+                return
+            gc.disable()
+            gc.unfreeze()
+            self.webapp.reset_cache()
+            warm(self.webapp)
+
+    PortfolioApplication(build_options(args)).run()
+
+
+def run_dev_server(args):
+    """Встроенный сервер Flask — запасной вариант без gunicorn"""
+    import app as webapp
+
+    print("⚠️  gunicorn не установлен (или недоступен на этой платформе): используется сервер Flask")
+    if args.warmup:
+        warm(webapp)
+    webapp.start_event_server()
+    webapp.app.run(host=args.host, port=args.port, threaded=True)
+
+
+def main(argv=None):
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description='Запуск PortfolioHub в продакшене')
+    parser.add_argument('--host', default='0.0.0.0', help='Адрес (по умолчанию 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)), help='Порт')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', 0)),
+                        help='Число воркеров (по умолчанию — число ядер)')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 4)),
+                        help='Потоков на воркер')
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('WEB_TIMEOUT', 30)),
+                        help='Таймаут запроса, секунд')
+    parser.add_argument('--no-warmup', dest='warmup', action='store_false',
+                        help='Не загружать данные до запуска воркеров')
+    parser.add_argument('--access-log', action='store_true', help='Писать журнал запросов в stdout')
+    args = parser.parse_args(argv)
+    args.workers = args.workers or os.cpu_count() or 1
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        run_dev_server(args)
+        return
+
+    print(f"🚀 PortfolioHub: {args.host}:{args.port}, воркеров: {args.workers}, потоков: {args.threads}")
+    run_gunicorn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+/*
+ * Фильтрация и сортировка проектов в браузере.
+ *
+ * После загрузки страницы скачивается бандл индекса (/api/bundle?v=<версия>):
+ * записи проектов, битовые множества тегов и языков и готовые порядки
+ * сортировки. Дальше клики по фильтрам, сортировке и поиск обрабатываются
+ * без запросов к серверу; адрес страницы обновляется через history API.
+ * Счетчики рядом с фильтрами пересчитываются по тем же битовым множествам.
+ * Запросы `?q=` (query.py) фильтрует сервер: такие ссылки и формы не
+ * перехватываются.
+ *
+ * Если бандл недоступен или JS отключен, ссылки работают как обычно —
+ * страницу рендерит сервер.
+ *
+ * Об изменениях набора проектов страница узнает из потока /api/events (если
+ * на сервере задан EVENTS_PORT): загружается бандл новой версии и текущий
+ * список перерисовывается.
+ *
+ * Поле поиска показывает подсказки из /api/suggest (datalist); выбранный
+ * из подсказок тег или язык включает соответствующий фильтр.
+ */
+(function () {
+    'use strict';
+
+    var results = document.getElementById('project-results');
+    if (!results || !window.fetch || !window.history || !history.pushState) {
+        return;
+    }
+
+    var bundle = null;
+
+    // Сколько тегов показывать в панели фильтров (TAG_FACETS_LIMIT в app.py)
+    var TAG_FACETS_LIMIT = 15;
+
+    function decodeBits(encoded) {
+        var raw = atob(encoded);
+        var bytes = new Uint8Array(raw.length);
+        for (var i = 0; i < raw.length; i++) {
+            bytes[i] = raw.charCodeAt(i);
+        }
+        return bytes;
+    }
+
+    function hasBit(bytes, i) {
+        return ((bytes[i >> 3] >> (i & 7)) & 1) === 1;
+    }
+
+    // Число единичных битов в каждом байте — для подсчета фасетов
+    var POPCOUNT = new Uint8Array(256);
+    for (var n = 1; n < 256; n++) {
+        POPCOUNT[n] = (n & 1) + POPCOUNT[n >> 1];
+    }
+
+    // Пересечение множеств; null — "все проекты" (фильтр не задан)
+    function intersect(a, b) {
+        if (a === null || b === null) {
+            return a === null ? b : a;
+        }
+        var out = new Uint8Array(a.length);
+        for (var i = 0; i < a.length; i++) {
+            out[i] = a[i] & b[i];
+        }
+        return out;
+    }
+
+    function countBits(bits, base) {
+        var count = 0;
+        for (var i = 0; i < bits.length; i++) {
+            count += POPCOUNT[base === null ? bits[i] : bits[i] & base[i]];
+        }
+        return count;
+    }
+
+    function escapeHtml(value) {
+        return String(value).replace(/[&<>"']/g, function (ch) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&#34;', "'": '&#39;'}[ch];
+        });
+    }
+
+    function loadBundle(url) {
+        return fetch(url, {credentials: 'same-origin'})
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error('HTTP ' + response.status);
+                }
+                return response.json();
+            })
+            .then(function (data) {
+                var fields = data.fields;
+                data.records = data.projects.map(function (row) {
+                    var project = {};
+                    fields.forEach(function (field, i) {
+                        project[field] = row[i];
+                    });
+                    return project;
+                });
+                ['tags', 'languages'].forEach(function (facet) {
+                    Object.keys(data[facet]).forEach(function (key) {
+                        data[facet][key] = decodeBits(data[facet][key]);
+                    });
+                });
+                return data;
+            });
+    }
+
+    // Параметры страницы так же, как их читает сервер (build_index_context)
+    function readState(search) {
+        var params = new URLSearchParams(search);
+        return {
+            tag: params.get('tag') || '',
+            language: params.get('language') || '',
+            search: (params.get('search') || '').toLowerCase(),
+            sort: params.has('sort') ? params.get('sort') : 'updated'
+        };
+    }
+
+    // Состояние с запросом q умеет отрисовать только сервер
+    function hasQuery(search) {
+        return Boolean((new URLSearchParams(search).get('q') || '').trim());
+    }
+
+    // Множества по каждому измерению фильтра, как ProjectIndex._filters на сервере
+    function filters(state) {
+        var empty = new Uint8Array(Math.ceil(bundle.records.length / 8));
+        var search = null;
+        if (state.search) {
+            search = new Uint8Array(empty.length);
+            bundle.records.forEach(function (project, i) {
+                if ((project.name || '').toLowerCase().indexOf(state.search) !== -1 ||
+                        (project.description || '').toLowerCase().indexOf(state.search) !== -1) {
+                    search[i >> 3] |= 1 << (i & 7);
+                }
+            });
+        }
+        return {
+            tag: state.tag ? (bundle.tags[state.tag] || empty) : null,
+            language: state.language ? (bundle.languages[state.language] || empty) : null,
+            search: search
+        };
+    }
+
+    function select(sets, sort) {
+        var bits = intersect(intersect(sets.tag, sets.language), sets.search);
+        var order = bundle.orders[sort] || bundle.records.map(function (_, i) { return i; });
+        if (bits !== null) {
+            order = order.filter(function (i) {
+                return hasBit(bits, i);
+            });
+        }
+        return order.map(function (i) {
+            return bundle.records[i];
+        });
+    }
+
+    // Счетчики без учета собственного измерения (как ProjectIndex.facets)
+    function facetCounts(sets, base, selected) {
+        var items = [];
+        Object.keys(sets).forEach(function (key) {
+            var count = countBits(sets[key], base);
+            if (count || key === selected) {
+                items.push([key, count]);
+            }
+        });
+        if (selected && !sets[selected]) {
+            items.push([selected, 0]);
+        }
+        return items.sort(function (a, b) {
+            return b[1] - a[1] || (a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0);
+        });
+    }
+
+    function renderFacet(param, items, selected) {
+        return items.map(function (item) {
+            return '<a href="?' + param + '=' + encodeURIComponent(item[0]) + '" class="filter-tag' +
+                (item[0] === selected ? ' active' : '') + '">' + escapeHtml(item[0]) +
+                ' <span class="filter-count">' + item[1] + '</span></a>';
+        }).join(' ');
+    }
+
+    function updateFacets(state, sets) {
+        var rows = {
+            tags: ['tag', facetCounts(bundle.tags, intersect(sets.language, sets.search), state.tag)
+                .slice(0, TAG_FACETS_LIMIT), state.tag],
+            languages: ['language', facetCounts(bundle.languages, intersect(sets.tag, sets.search), state.language),
+                state.language]
+        };
+        document.querySelectorAll('.filter-bar [data-facet]').forEach(function (container) {
+            var row = rows[container.getAttribute('data-facet')];
+            if (row) {
+                container.innerHTML = renderFacet(row[0], row[1], row[2]);
+            }
+        });
+    }
+
+    // Разметка карточки повторяет templates/_project_card.html
+    function renderCard(project) {
+        var html = '<div class="col-md-6 col-lg-4"><div class="project-card">';
+        if (project.language) {
+            html += '<span class="language-badge">' + escapeHtml(project.language) + '</span>';
+        }
+        html += '<div class="project-card-body">' +
+            '<h5 class="project-title"><i class="bi bi-folder-fill"></i> ' + escapeHtml(project.name) + '</h5>' +
+            '<p class="project-description">' + escapeHtml(project.description) + '</p>' +
+            '<div class="project-meta">';
+        if (project.stars > 0) {
+            html += '<div class="meta-item"><i class="bi bi-star-fill"></i> <span>' + project.stars + '</span></div>';
+        }
+        if (project.forks > 0) {
+            html += '<div class="meta-item"><i class="bi bi-diagram-3-fill"></i> <span>' + project.forks + '</span></div>';
+        }
+        if (project.is_fork) {
+            html += '<div class="meta-item"><i class="bi bi-bezier2"></i> <span>Fork</span></div>';
+        }
+        html += '</div>';
+        if (project.tags && project.tags.length) {
+            html += '<div class="project-tags">' + project.tags.slice(0, 6).map(function (tag) {
+                return '<span class="project-tag">' + escapeHtml(tag) + '</span>';
+            }).join(' ') + '</div>';
+        }
+        if (project.link) {
+            html += '<a href="' + escapeHtml(project.link) + '" target="_blank" class="project-link">' +
+                '<i class="bi bi-github"></i> <span>View on GitHub</span> <i class="bi bi-arrow-right"></i></a>';
+        }
+        return html + '</div></div></div>';
+    }
+
+    function renderEmpty(filtered) {
+        return '<div class="empty-state"><i class="bi bi-folder-x"></i><h3>Проекты не найдены</h3>' +
+            '<p class="lead">' + (filtered ? 'Попробуйте изменить критерии поиска' :
+                'Добавьте проекты или проверьте настройки GitHub') + '</p>' +
+            (filtered ? '<a href="/" class="btn btn-primary mt-3"><i class="bi bi-arrow-left me-2"></i>Сбросить фильтры</a>' : '') +
+            '</div>';
+    }
+
+    function sortHref(sort, state) {
+        var params = new URLSearchParams({sort: sort});
+        if (state.tag) {
+            params.set('tag', state.tag);
+        }
+        if (state.language) {
+            params.set('language', state.language);
+        }
+        return '?' + params.toString();
+    }
+
+    // Активные фильтры и ссылки сортировки — как их отрисовал бы сервер
+    function updateControls(state) {
+        var filtered = Boolean(state.search || state.tag || state.language);
+        document.querySelectorAll('.filter-bar .filter-tag').forEach(function (link) {
+            var params = new URLSearchParams(link.getAttribute('href').replace(/^\/?\??/, ''));
+            var active;
+            if (params.has('language')) {
+                active = params.get('language') === state.language;
+            } else if (params.has('tag')) {
+                active = params.get('tag') === state.tag;
+            } else {
+                // Ссылка "Все" в строке языков или тегов
+                var row = link.closest('.filter-tags');
+                var isLanguageRow = row && row.querySelector('a[href^="?language="]');
+                active = isLanguageRow ? !state.language : !state.tag;
+            }
+            link.classList.toggle('active', active);
+        });
+        document.querySelectorAll('.filter-bar .btn-group a').forEach(function (link) {
+            var sort = new URLSearchParams(link.getAttribute('href').replace(/^\?/, '')).get('sort');
+            link.setAttribute('href', sortHref(sort, state));
+            link.classList.toggle('btn-primary', sort === state.sort);
+            link.classList.toggle('btn-outline-light', sort !== state.sort);
+        });
+        var clear = document.querySelector('[data-clear-filters]');
+        if (clear) {
+            clear.classList.toggle('d-none', !filtered);
+        }
+        var input = document.querySelector('.filter-bar input[name="search"]');
+        if (input) {
+            input.value = state.search;
+        }
+        // Состояния без запроса q: поле запроса и ошибку разбора очищаем
+        var queryInput = document.querySelector('.filter-bar input[name="q"]');
+        if (queryInput) {
+            queryInput.value = '';
+        }
+        var queryError = document.querySelector('.filter-bar .query-error');
+        if (queryError) {
+            queryError.remove();
+        }
+    }
+
+    function apply(state) {
+        var sets = filters(state);
+        var projects = select(sets, state.sort);
+        updateFacets(state, sets);
+        results.innerHTML = projects.length ?
+            '<div class="row g-4">' + projects.map(renderCard).join('') + '</div>' :
+            renderEmpty(Boolean(state.search || state.tag || state.language));
+        updateControls(state);
+    }
+
+    function navigate(search) {
+        var state = readState(search);
+        history.pushState(null, '', search ? '?' + search : location.pathname);
+        apply(state);
+    }
+
+    document.addEventListener('click', function (event) {
+        if (!bundle || event.defaultPrevented || event.button !== 0 ||
+                event.metaKey || event.ctrlKey || event.shiftKey || event.altKey) {
+            return;
+        }
+        var link = event.target.closest('.filter-bar a, #project-results .empty-state a, [data-clear-filters]');
+        if (!link) {
+            return;
+        }
+        var href = link.getAttribute('href');
+        if ((href !== '/' && href.charAt(0) !== '?') || hasQuery(href.slice(1))) {
+            return;
+        }
+        event.preventDefault();
+        navigate(href === '/' ? '' : href.slice(1));
+    });
+
+    document.addEventListener('submit', function (event) {
+        var form = event.target;
+        var queryInput = form.querySelector('input[name="q"]');
+        if (!bundle || !form.closest('.filter-bar') || (queryInput && queryInput.value.trim())) {
+            return;
+        }
+        event.preventDefault();
+        var query = form.querySelector('input[name="search"]').value;
+        navigate(query ? new URLSearchParams({search: query}).toString() : '');
+    });
+
+    window.addEventListener('popstate', function () {
+        if (hasQuery(location.search)) {
+            location.reload();
+        } else if (bundle) {
+            apply(readState(location.search));
+        }
+    });
+
+    function subscribe(url) {
+        if (!url || !window.EventSource) {
+            return;
+        }
+        var source = new EventSource(url);
+        // ready — текущая версия при подключении, resync — если пропущенные
+        // события уже не восстановить: в обоих случаях сверяем версию бандла
+        ['ready', 'projects', 'resync'].forEach(function (name) {
+            source.addEventListener(name, reload);
+        });
+    }
+
+    function reload(event) {
+        var data = JSON.parse(event.data);
+        if (!bundle || bundle.version === data.version) {
+            return;
+        }
+        var bundleUrl = results.getAttribute('data-bundle-url').replace(/([?&]v=)[^&]*/, '$1' + data.version);
+        loadBundle(bundleUrl).then(function (fresh) {
+            bundle = fresh;
+            suggestions.cache = {};
+            results.setAttribute('data-bundle-url', bundleUrl);
+            if (!hasQuery(location.search)) {
+                apply(readState(location.search));
+            }
+        }).catch(function () {
+            // Останется прежний список; новый придет со следующей загрузкой страницы
+        });
+    }
+
+    // Подсказки поиска (/api/suggest): ответы кэшируются по префиксу до
+    // следующей версии данных
+    var suggestions = {cache: {}, latest: null, timer: null};
+    var SUGGEST_DELAY = 120;
+
+    function showSuggestions(list, items) {
+        suggestions.latest = items;
+        list.innerHTML = items.map(function (item) {
+            var label = item.kind === 'project' ? 'проект' : (item.kind === 'tag' ? 'тег' : 'язык');
+            return '<option value="' + escapeHtml(item.text) + '" label="' + label + '"></option>';
+        }).join('');
+    }
+
+    function requestSuggestions(list, prefix) {
+        if (suggestions.cache.hasOwnProperty(prefix)) {
+            showSuggestions(list, suggestions.cache[prefix]);
+            return;
+        }
+        var url = list.getAttribute('data-suggest-url') + '?' + new URLSearchParams({prefix: prefix, limit: 8});
+        fetch(url, {credentials: 'same-origin'})
+            .then(function (response) {
+                return response.ok ? response.json() : null;
+            })
+            .then(function (data) {
+                if (!data) {
+                    return;
+                }
+                suggestions.cache[prefix] = data.suggestions;
+                var input = document.querySelector('.filter-bar input[name="search"]');
+                // Пока шел запрос, текст мог измениться: показываем только актуальный ответ
+                if (input && input.value.trim() === prefix) {
+                    showSuggestions(list, data.suggestions);
+                }
+            })
+            .catch(function () {
+                // Без подсказок поле поиска работает как обычно
+            });
+    }
+
+    document.addEventListener('input', function (event) {
+        var input = event.target;
+        var list = document.getElementById('search-suggestions');
+        if (!list || input.name !== 'search' || !input.closest('.filter-bar')) {
+            return;
+        }
+        // Выбор тега или языка из списка — сразу фильтр вместо поиска по тексту
+        if (bundle && (!event.inputType || event.inputType === 'insertReplacementText') && suggestions.latest) {
+            var picked = suggestions.latest.filter(function (item) {
+                return item.kind !== 'project' && item.text === input.value;
+            })[0];
+            if (picked) {
+                var params = {};
+                params[picked.kind] = picked.text;
+                navigate(new URLSearchParams(params).toString());
+                return;
+            }
+        }
+        clearTimeout(suggestions.timer);
+        var prefix = input.value.trim();
+        if (!prefix) {
+            showSuggestions(list, []);
+            return;
+        }
+        suggestions.timer = setTimeout(function () {
+            requestSuggestions(list, prefix);
+        }, SUGGEST_DELAY);
+    });
+
+    loadBundle(results.getAttribute('data-bundle-url')).then(function (data) {
+        bundle = data;
+        subscribe(results.getAttribute('data-events-url'));
+    }).catch(function () {
+        // Без бандла остаются обычные ссылки и серверный рендеринг
+        bundle = null;
+    });
+})();
@@ -0,0 +1,156 @@
+"""
+Подсказки для поля поиска: дополнение префикса названиями проектов, тегами и языками.
+
+Строится один раз на поколение данных. Ключи — названия проектов, каждое
+слово названия вместе с остатком ("telegram bot" дает ключи "telegram bot"
+и "bot"), теги и языки в нижнем регистре — лежат одним отсортированным
+массивом. Все ключи с префиксом занимают в нем непрерывный диапазон,
+который находится двумя bisect.
+
+Лучшие limit подсказок в диапазоне дает дерево отрезков над массивом
+ключей: в узле — лучший (наименьший) ранг ключа в его поддиапазоне.
+Диапазон префикса раскладывается на O(log N) узлов, дальше heapq достает
+узел с лучшим рангом и спускается в его детей, пока не наберется limit
+подсказок: O(limit * log N) шагов при любой ширине диапазона и любом
+распределении весов. Вес — звезды (`by=stars`, у тега и языка — сумма по
+проектам) или дата обновления (`by=updated`, у тега и языка — последняя).
+
+Готовые ответы кэшируются по (префикс, вес, limit).
+
+    index = SuggestIndex(projects)
+    index.suggest('py', by='stars', limit=8)
+"""
+
+from bisect import bisect_left
+from collections import OrderedDict
+from heapq import heappop, heappush
+
+SUGGEST_ORDERS = ('stars', 'updated')
+SUGGEST_CACHE_LIMIT = 256
+MAX_PREFIX = 100
+
+# Ранг пустого листа дерева (дополнение до степени двойки)
+NO_RANK = float('inf')
+
+
+def fold(text):
+    """Ключ для сравнения: нижний регистр, пробелы схлопнуты"""
+    return ' '.join(text.lower().split())
+
+
+class SuggestIndex:
+    """Отсортированные ключи подсказок и порядки ключей по весу"""
+
+    def __init__(self, projects):
+        # Подсказки: (вид, текст, ID проекта или число проектов) + веса
+        self.items = []
+        stars = []
+        updated = []
+        groups = {}
+        for project in projects:
+            name = project.get('name') or project['id']
+            self.items.append({'kind': 'project', 'text': name, 'id': project['id']})
+            stars.append(project.get('stars', 0) or 0)
+            updated.append(project.get('updated_at') or '')
+            values = [('tag', tag) for tag in set(project.get('tags') or ())]
+            if project.get('language'):
+                values.append(('language', project['language']))
+            for key in values:
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = [0, 0, '']
+                group[0] += 1
+                group[1] += project.get('stars', 0) or 0
+                group[2] = max(group[2], project.get('updated_at') or '')
+        for (kind, text), (count, total, latest) in groups.items():
+            self.items.append({'kind': kind, 'text': text, 'count': count})
+            stars.append(total)
+            updated.append(latest)
+
+        # Ранг подсказки по каждому весу: меньше — лучше, при равенстве — по алфавиту
+        positions = range(len(self.items))
+        self._ranks = {}
+        for order, weights in (('stars', stars), ('updated', updated)):
+            ranked = sorted(positions, key=lambda i: fold(self.items[i]['text']))
+            ranked.sort(key=weights.__getitem__, reverse=True)
+            ranks = [0] * len(ranked)
+            for rank, i in enumerate(ranked):
+                ranks[i] = rank
+            self._ranks[order] = ranks
+
+        entries = set()
+        for i, item in enumerate(self.items):
+            key = fold(item['text'])
+            entries.add((key, i))
+            if item['kind'] == 'project':
+                words = key.split(' ')
+                for start in range(1, len(words)):
+                    entries.add((' '.join(words[start:]), i))
+        entries = sorted(entries)
+        self.keys = [key for key, _ in entries]
+        self._targets = [i for _, i in entries]
+        # Дерево отрезков по каждому весу: листы — ранги ключей, узел — минимум детей
+        self._size = 1
+        while self._size < len(entries):
+            self._size *= 2
+        self._trees = {}
+        for order, ranks in self._ranks.items():
+            tree = [NO_RANK] * (2 * self._size)
+            tree[self._size:self._size + len(entries)] = [ranks[target] for target in self._targets]
+            for node in range(self._size - 1, 0, -1):
+                tree[node] = min(tree[2 * node], tree[2 * node + 1])
+            self._trees[order] = tree
+        self._cache = OrderedDict()
+
+    def _range(self, prefix):
+        # Все ключи с префиксом: от prefix до prefix + максимальный символ
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + '\U0010ffff')
+
+    def _top(self, low, high, order, limit):
+        tree = self._trees[order]
+        # Узлы, точно покрывающие [low, high)
+        heap = []
+        left, right = low + self._size, high + self._size
+        while left < right:
+            if left & 1:
+                heappush(heap, (tree[left], left))
+                left += 1
+            if right & 1:
+                right -= 1
+                heappush(heap, (tree[right], right))
+            left //= 2
+            right //= 2
+        found = []
+        while heap and len(found) < limit:
+            _, node = heappop(heap)
+            if node >= self._size:
+                target = self._targets[node - self._size]
+                # Проект может попасть в диапазон несколькими словами названия
+                if target not in found:
+                    found.append(target)
+            else:
+                for child in (2 * node, 2 * node + 1):
+                    if tree[child] != NO_RANK:
+                        heappush(heap, (tree[child], child))
+        return found
+
+    def suggest(self, prefix, by='stars', limit=8):
+        """
+        Лучшие limit подсказок, начинающихся с prefix (или со слова названия)
+
+        Returns:
+            List[dict]: {'kind': 'project'|'tag'|'language', 'text', 'id' или 'count'}
+        """
+        if by not in SUGGEST_ORDERS:
+            raise ValueError(f"Неизвестный порядок подсказок: {by}")
+        prefix = fold(prefix[:MAX_PREFIX])
+        cache_key = (prefix, by, limit)
+        suggestions = self._cache.get(cache_key)
+        if suggestions is not None:
+            return suggestions
+        low, high = self._range(prefix)
+        suggestions = [self.items[i] for i in self._top(low, high, by, limit)] if high > low else []
+        self._cache[cache_key] = suggestions
+        if len(self._cache) > SUGGEST_CACHE_LIMIT:
+            self._cache.popitem(last=False)
+        return suggestions
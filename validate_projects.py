@@ -1,123 +1,312 @@
 """
 Скрипт для валидации всех info.json файлов в проектах
+
+Файлы проверяются параллельно, а результаты кэшируются по хешу содержимого
+в `.validate-cache.json`: неизменившиеся файлы повторно не разбираются.
+Кэш сбрасывается автоматически при изменении правил валидации.
+
+Примеры:
+    python validate_projects.py
+    python validate_projects.py --changed-since origin/main
+    python validate_projects.py --jobs 8 --json report.json
 """
 
+import argparse
+import hashlib
+import inspect
 import json
+import os
+import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Tuple
 
+from projectpack import open_pack
+
 # Исправление кодировки для Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
-def validate_project(info_file: Path) -> Tuple[bool, str]:
+CACHE_FILE = '.validate-cache.json'
+CACHE_LIMIT = 200000
+
+# Ниже этого числа непроверенных файлов пул процессов не окупается
+PROCESS_POOL_THRESHOLD = 256
+
+
+def validate_data(data) -> Tuple[bool, str]:
     """
-    Валидация одного info.json файла
-    
+    Проверка содержимого info.json (уже разобранного JSON)
+
     Returns:
         Tuple[bool, str]: (is_valid, error_message)
     """
+    if not isinstance(data, dict):
+        return False, "Корень info.json должен быть объектом"
+
+    # Проверяем обязательные поля
+    required_fields = ['name', 'description', 'tags', 'link']
+    missing_fields = [field for field in required_fields if field not in data]
+
+    if missing_fields:
+        return False, f"Отсутствуют поля: {', '.join(missing_fields)}"
+
+    # Проверяем типы данных
+    if not isinstance(data['name'], str) or not data['name'].strip():
+        return False, "Поле 'name' должно быть непустой строкой"
+
+    if not isinstance(data['description'], str) or not data['description'].strip():
+        return False, "Поле 'description' должно быть непустой строкой"
+
+    if not isinstance(data['tags'], list) or len(data['tags']) == 0:
+        return False, "Поле 'tags' должно быть непустым списком"
+
+    if not isinstance(data['link'], str):
+        return False, "Поле 'link' должно быть строкой"
+
+    # Проверяем длину описания
+    if len(data['description']) < 10:
+        return False, "Описание слишком короткое (минимум 10 символов)"
+
+    if len(data['description']) > 500:
+        return False, "Описание слишком длинное (максимум 500 символов)"
+
+    return True, "OK"
+
+
+def validate_content(raw: bytes) -> Tuple[bool, str]:
+    """Валидация содержимого info.json в байтах"""
     try:
-        with open(info_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Проверяем обязательные поля
-        required_fields = ['name', 'description', 'tags', 'link']
-        missing_fields = [field for field in required_fields if field not in data]
-        
-        if missing_fields:
-            return False, f"Отсутствуют поля: {', '.join(missing_fields)}"
-        
-        # Проверяем типы данных
-        if not isinstance(data['name'], str) or not data['name'].strip():
-            return False, "Поле 'name' должно быть непустой строкой"
-        
-        if not isinstance(data['description'], str) or not data['description'].strip():
-            return False, "Поле 'description' должно быть непустой строкой"
-        
-        if not isinstance(data['tags'], list) or len(data['tags']) == 0:
-            return False, "Поле 'tags' должно быть непустым списком"
-        
-        if not isinstance(data['link'], str):
-            return False, "Поле 'link' должно быть строкой"
-        
-        # Проверяем длину описания
-        if len(data['description']) < 10:
-            return False, "Описание слишком короткое (минимум 10 символов)"
-        
-        if len(data['description']) > 500:
-            return False, "Описание слишком длинное (максимум 500 символов)"
-        
-        return True, "OK"
-        
+        data = json.loads(raw.decode('utf-8'))
     except json.JSONDecodeError as e:
         return False, f"Ошибка JSON: {e}"
     except Exception as e:
         return False, f"Ошибка: {e}"
+    return validate_data(data)
+
+
+def validate_project(info_file: Path) -> Tuple[bool, str]:
+    """
+    Валидация одного info.json файла
+
+    Returns:
+        Tuple[bool, str]: (is_valid, error_message)
+    """
+    try:
+        raw = Path(info_file).read_bytes()
+    except Exception as e:
+        return False, f"Ошибка: {e}"
+    return validate_content(raw)
+
+
+def rules_version() -> str:
+    """Версия правил: хеш исходного кода validate_data/validate_content"""
+    source = inspect.getsource(validate_data) + inspect.getsource(validate_content)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+
+def load_cache(path: Path) -> dict:
+    """Кэш результатов {хеш содержимого: [is_valid, message]} для текущих правил"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('rules') != rules_version():
+        return {}
+    return cache.get('results', {})
+
+
+def save_cache(path: Path, results: dict, seen: set):
+    """Сохранение кэша; при переполнении остаются только хеши из текущего запуска"""
+    if len(results) > CACHE_LIMIT:
+        results = {key: value for key, value in results.items() if key in seen}
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'rules': rules_version(), 'results': results}, f)
+    os.replace(tmp_path, path)
+
 
+def changed_files(projects_dir: Path, revision: str) -> List[Path]:
+    """info.json, измененные относительно ревизии git (включая неотслеживаемые)"""
+    commands = [
+        ['git', 'diff', '--name-only', '--relative', '--diff-filter=ACMR', revision, '--', str(projects_dir)],
+        ['git', 'ls-files', '--others', '--exclude-standard', '--', str(projects_dir)],
+    ]
+    files = set()
+    for command in commands:
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        files.update(line for line in output.splitlines() if line.endswith('/info.json'))
+    return sorted(Path(name) for name in files if Path(name).exists())
 
-def main():
+
+def _read_and_hash(info_file: Path):
+    try:
+        raw = info_file.read_bytes()
+    except Exception as e:
+        return None, None, f"Ошибка: {e}"
+    return raw, hashlib.sha256(raw).hexdigest(), None
+
+
+def validate_files(info_files: List[Path], jobs: int = 0, cache: dict = None, contents: List[bytes] = None):
+    """
+    Параллельная валидация файлов с кэшем по хешу содержимого
+
+    Args:
+        contents: уже прочитанное содержимое файлов (например, из pack-файла)
+
+    Returns:
+        List[dict]: результаты в порядке info_files (file, project, valid, message, cached, hash)
+    """
+    jobs = jobs or os.cpu_count() or 1
+    cache = {} if cache is None else cache
+
+    if contents is not None:
+        read = [(raw, hashlib.sha256(raw).hexdigest(), None) for raw in contents]
+    else:
+        # Чтение и хеширование — ввод-вывод, хватает потоков
+        with ThreadPoolExecutor(max(jobs, 1)) as pool:
+            read = list(pool.map(_read_and_hash, info_files))
+
+    results = []
+    misses = []
+    for info_file, (raw, digest, error) in zip(info_files, read):
+        result = {'file': str(info_file), 'project': info_file.parent.name, 'hash': digest, 'cached': False}
+        if error:
+            result.update(valid=False, message=error)
+        elif digest in cache:
+            result.update(valid=cache[digest][0], message=cache[digest][1], cached=True)
+        else:
+            misses.append((result, raw))
+        results.append(result)
+
+    # Разбор JSON — работа процессора: при большом объеме отдаем пулу процессов
+    pending = [raw for _, raw in misses]
+    if jobs > 1 and len(misses) >= PROCESS_POOL_THRESHOLD:
+        with ProcessPoolExecutor(jobs) as pool:
+            checked = list(pool.map(validate_content, pending, chunksize=64))
+    else:
+        checked = [validate_content(raw) for raw in pending]
+
+    for (result, _), (is_valid, message) in zip(misses, checked):
+        result.update(valid=is_valid, message=message)
+        cache[result['hash']] = [is_valid, message]
+
+    return results
+
+
+def main(argv=None):
     """Валидация всех проектов"""
-    
-    print("=" * 70)
-    print("  Валидация проектов PortfolioHub")
-    print("=" * 70)
-    print()
-    
-    projects_dir = Path('projects')
-    
+    parser = argparse.ArgumentParser(description='Валидация проектов PortfolioHub')
+    parser.add_argument('--projects-dir', default='projects', help='Папка с проектами')
+    parser.add_argument('--jobs', type=int, default=0, help='Число воркеров (по умолчанию — число ядер)')
+    parser.add_argument('--changed-since', metavar='REV', help='Проверять только файлы, измененные с ревизии git')
+    parser.add_argument('--json', metavar='PATH', help="Записать отчет в JSON ('-' — в stdout вместо обычного вывода)")
+    parser.add_argument('--no-cache', action='store_true', help='Не использовать кэш результатов')
+    args = parser.parse_args(argv)
+
+    quiet = args.json == '-'
+    say = (lambda *a: None) if quiet else print
+
+    say("=" * 70)
+    say("  Валидация проектов PortfolioHub")
+    say("=" * 70)
+    say()
+
+    projects_dir = Path(args.projects_dir)
+    contents = None
+
     if not projects_dir.exists():
-        print("❌ Папка 'projects' не найдена!")
+        say(f"❌ Папка '{projects_dir}' не найдена!")
         return
-    
-    # Находим все info.json файлы
-    info_files = list(projects_dir.glob('*/info.json'))
-    
+
+    # Находим info.json файлы: все или только измененные
+    if args.changed_since:
+        try:
+            info_files = changed_files(projects_dir, args.changed_since)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"❌ Не удалось получить изменения из git: {e}", file=sys.stderr)
+            sys.exit(2)
+        if not info_files:
+            say(f"✅ Нет измененных проектов с {args.changed_since}")
+            sys.exit(0)
+    else:
+        # Актуальный pack-файл читается одним проходом вместо отдельных файлов
+        pack = open_pack(projects_dir)
+        if pack is not None:
+            with pack:
+                names, contents = zip(*pack.items()) if len(pack) else ((), ())
+            info_files = [projects_dir / name / 'info.json' for name in names]
+            contents = list(contents)
+        else:
+            info_files = sorted(projects_dir.glob('*/info.json'))
+
     if not info_files:
-        print("⚠️  Проекты не найдены!")
-        print(f"   Добавьте проекты в папку: {projects_dir.absolute()}")
+        say("⚠️  Проекты не найдены!")
+        say(f"   Добавьте проекты в папку: {projects_dir.absolute()}")
         return
-    
-    print(f"Найдено проектов: {len(info_files)}\n")
-    
-    # Валидация каждого проекта
+
+    say(f"Найдено проектов: {len(info_files)}\n")
+
+    cache_path = Path(CACHE_FILE)
+    cache = {} if args.no_cache else load_cache(cache_path)
+    results = validate_files(info_files, args.jobs, cache, contents)
+    if not args.no_cache:
+        save_cache(cache_path, cache, {result['hash'] for result in results})
+
+    # Вывод результатов по каждому проекту
     valid_count = 0
     invalid_count = 0
-    
-    for info_file in info_files:
-        project_name = info_file.parent.name
-        is_valid, message = validate_project(info_file)
-        
-        if is_valid:
-            print(f"✅ {project_name}")
-            print(f"   {info_file}")
+
+    for result in results:
+        if result['valid']:
+            say(f"✅ {result['project']}")
+            say(f"   {result['file']}")
             valid_count += 1
         else:
-            print(f"❌ {project_name}")
-            print(f"   {info_file}")
-            print(f"   Ошибка: {message}")
+            say(f"❌ {result['project']}")
+            say(f"   {result['file']}")
+            say(f"   Ошибка: {result['message']}")
             invalid_count += 1
-        
-        print()
-    
+
+        say()
+
+    cached_count = sum(1 for result in results if result['cached'])
+
+    if args.json:
+        report = {
+            'total': len(results),
+            'valid': valid_count,
+            'invalid': invalid_count,
+            'cached': cached_count,
+            'results': [
+                {key: result[key] for key in ('project', 'file', 'valid', 'message', 'cached')}
+                for result in results
+            ]
+        }
+        if quiet:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
     # Итоги
-    print("=" * 70)
-    print(f"Результаты валидации:")
-    print(f"  ✅ Валидных проектов: {valid_count}")
-    print(f"  ❌ Невалидных проектов: {invalid_count}")
-    print(f"  📊 Всего: {len(info_files)}")
-    print("=" * 70)
-    
+    say("=" * 70)
+    say(f"Результаты валидации:")
+    say(f"  ✅ Валидных проектов: {valid_count}")
+    say(f"  ❌ Невалидных проектов: {invalid_count}")
+    say(f"  📊 Всего: {len(results)} (из кэша: {cached_count})")
+    say("=" * 70)
+
     if invalid_count > 0:
-        print("\n⚠️  Исправьте ошибки в невалидных проектах!")
-        exit(1)
+        say("\n⚠️  Исправьте ошибки в невалидных проектах!")
+        sys.exit(1)
     else:
-        print("\n🎉 Все проекты валидны!")
-        exit(0)
+        say("\n🎉 Все проекты валидны!")
+        sys.exit(0)
 
 
 if __name__ == "__main__":
     main()
-
@@ -1,11 +1,25 @@
 """
 Скрипт для автоматического обновления портфолио при добавлении новых проектов.
 Использует watchdog для мониторинга изменений в папке projects.
+
+С `--notify <адрес сервера>` после изменений вызывает
+`/api/refresh?scope=local`: сервер сразу перечитывает локальные проекты и
+рассылает событие подписчикам `/api/events`. Серия событий (создание и
+запись файла, сохранение через временный файл и переименование) дает одно
+уведомление — через 2 секунды после последнего события серии.
+
+Примеры:
+    python watcher.py
+    python watcher.py --notify http://localhost:5000
 """
 
+import argparse
+import threading
 import time
 import sys
 from pathlib import Path
+from urllib.error import URLError
+from urllib.request import urlopen
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
@@ -17,32 +31,72 @@ if sys.platform == 'win32':
 class ProjectWatcher(FileSystemEventHandler):
     """Обработчик событий файловой системы"""
     
-    def __init__(self):
-        self.last_event_time = 0
-        self.debounce_seconds = 2  # Задержка для избежания дублирования событий
+    def __init__(self, notify_url=None):
+        self.debounce_seconds = 2  # Пауза после последнего события серии
+        self.notify_url = notify_url
+        self._changes = {}
+        self._timer = None
+        self._lock = threading.Lock()
     
     def on_any_event(self, event):
         """Обработка любого события в папке projects"""
-        current_time = time.time()
-        
-        # Игнорируем слишком частые события
-        if current_time - self.last_event_time < self.debounce_seconds:
+        if event.is_directory or event.event_type not in ('created', 'modified', 'deleted', 'moved'):
             return
         
-        # Обрабатываем только изменения info.json файлов
-        if event.is_directory or not event.src_path.endswith('info.json'):
+        # Обрабатываем только изменения info.json файлов; сохранение через
+        # временный файл приходит как переименование в info.json
+        path = event.src_path
+        if event.event_type == 'moved' and event.dest_path.endswith('info.json'):
+            path = event.dest_path
+        if not path.endswith('info.json'):
             return
         
-        self.last_event_time = current_time
+        # Уведомляем после паузы в событиях: каждое новое событие откладывает его
+        with self._lock:
+            self._changes[path] = event.event_type
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_seconds, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def flush(self):
+        """Сообщение (и уведомление сервера) о накопленных изменениях"""
+        with self._lock:
+            changes, self._changes = self._changes, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not changes:
+            return
         
-        if event.event_type in ['created', 'modified', 'deleted']:
-            print(f"\n[{time.strftime('%H:%M:%S')}] Обнаружено изменение: {event.event_type}")
-            print(f"Файл: {event.src_path}")
+        print(f"\n[{time.strftime('%H:%M:%S')}] Обнаружено изменений: {len(changes)}")
+        for path, event_type in changes.items():
+            print(f"Файл: {path} ({event_type})")
+        if self.notify_url:
+            self.notify()
+        else:
             print("✓ Портфолио будет автоматически обновлено при следующем запросе\n")
+    
+    def notify(self):
+        """Запрос к серверу на перечитывание локальных проектов"""
+        url = self.notify_url.rstrip('/') + '/api/refresh?scope=local'
+        try:
+            with urlopen(url, timeout=5) as response:
+                response.read()
+            print(f"✓ Сервер уведомлен: {self.notify_url}\n")
+        except (URLError, OSError) as e:
+            print(f"⚠️  Не удалось уведомить сервер: {e}")
+            print("   Портфолио обновится при следующем запросе после истечения кэша\n")
 
 
-def main():
+def main(argv=None):
     """Запуск мониторинга папки projects"""
+    parser = argparse.ArgumentParser(description='Мониторинг изменений проектов PortfolioHub')
+    parser.add_argument('--notify', metavar='URL',
+                        help='Адрес запущенного сервера, например http://localhost:5000')
+    args = parser.parse_args(argv)
+    
     projects_dir = Path('projects')
     
     # Создаем папку projects если её нет
@@ -54,10 +108,12 @@ def main():
     print("  PortfolioHub - Автоматический мониторинг проектов")
     print("=" * 60)
     print(f"\n[*] Отслеживание изменений в: {projects_dir.absolute()}")
+    if args.notify:
+        print(f"[*] Уведомление сервера: {args.notify}")
     print("[*] Нажмите Ctrl+C для остановки\n")
     
     # Создаем наблюдателя
-    event_handler = ProjectWatcher()
+    event_handler = ProjectWatcher(args.notify)
     observer = Observer()
     observer.schedule(event_handler, str(projects_dir), recursive=True)
     observer.start()
@@ -70,6 +126,8 @@ def main():
         observer.stop()
     
     observer.join()
+    # Изменения, пришедшие перед остановкой
+    event_handler.flush()
     print("[+] Мониторинг остановлен")
 
 
@@ -0,0 +1,107 @@
+"""
+Вебхуки GitHub: проверка подписи и разбор событий.
+
+GitHub отправляет событие POST-запросом с заголовками:
+    X-GitHub-Event           - тип события (repository, push, star, fork, ping)
+    X-GitHub-Delivery        - уникальный ID доставки (повторная доставка — тот же ID)
+    X-Hub-Signature-256      - sha256=<HMAC-SHA256 тела с секретом вебхука>
+
+Маршрут `/api/github/webhook` (app.py) проверяет подпись и передает
+изменение всем воркерам через журнал команд (broadcast.py), где ID доставки
+записывается один раз; каждый воркер меняет одну запись репозитория в кэше
+источников — без полной загрузки из GitHub. События, пришедшие не по
+порядку, отбрасываются по `updated_at` репозитория.
+
+    change = parse_event('star', payload)
+    change.full_name, change.repo, change.removed, change.previous
+"""
+
+import hashlib
+import hmac
+from collections import namedtuple
+from datetime import datetime, timezone
+
+SIGNATURE_PREFIX = 'sha256='
+
+# События, меняющие запись репозитория; ping — проверка при создании вебхука
+EVENTS = ('repository', 'push', 'star', 'fork')
+
+# Действия события repository, после которых репозитория больше нет в портфолио
+REMOVING_ACTIONS = ('deleted', 'privatized')
+
+
+class RepoChange(namedtuple('RepoChange', 'full_name repo removed previous')):
+    """
+    Изменение одного репозитория из события вебхука
+
+    Attributes:
+        full_name: owner/name репозитория после события
+        repo: репозиторий в формате REST API (как в списке /users/<имя>/repos)
+        removed: репозиторий удален или стал приватным
+        previous: прежний owner/name при переименовании или передаче, иначе None
+    """
+    __slots__ = ()
+
+
+def sign(secret, body):
+    """Значение X-Hub-Signature-256 для тела запроса"""
+    digest = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return SIGNATURE_PREFIX + digest
+
+
+def verify_signature(secret, body, signature):
+    """Подпись X-Hub-Signature-256 совпадает (сравнение за постоянное время)"""
+    if not secret or not signature or not signature.startswith(SIGNATURE_PREFIX):
+        return False
+    return hmac.compare_digest(sign(secret, body), signature)
+
+
+def _iso(value):
+    # В событии push created_at и pushed_at — unix time, в остальных событиях — ISO 8601
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return value
+
+
+def normalize_repo(repo):
+    """Репозиторий из события в формате REST API (даты строками ISO 8601)"""
+    repo = dict(repo)
+    for key in ('created_at', 'updated_at', 'pushed_at'):
+        if key in repo:
+            repo[key] = _iso(repo[key])
+    return repo
+
+
+def parse_event(event, payload):
+    """
+    Изменение репозитория из события вебхука
+
+    Returns:
+        RepoChange | None: None, если событие не меняет данные репозитория
+    """
+    if event not in EVENTS or not isinstance(payload.get('repository'), dict):
+        return None
+    repo = normalize_repo(payload['repository'])
+    action = payload.get('action')
+    changes = payload.get('changes') or {}
+
+    previous = None
+    if event == 'repository' and action == 'renamed':
+        old_name = changes.get('repository', {}).get('name', {}).get('from')
+        if old_name:
+            previous = f"{repo['owner']['login']}/{old_name}"
+    elif event == 'repository' and action == 'transferred':
+        old_owner = changes.get('owner', {}).get('from', {})
+        login = (old_owner.get('user') or old_owner.get('organization') or {}).get('login')
+        if login:
+            previous = f"{login}/{repo['name']}"
+
+    removed = bool(repo.get('private')) or (event == 'repository' and action in REMOVING_ACTIONS)
+    return RepoChange(repo['full_name'], repo, removed, previous)
+
+
+def is_stale(repo, project):
+    """Событие старше данных в кэше: updated_at репозитория раньше, чем у проекта"""
+    incoming = repo.get('updated_at')
+    current = project.get('updated_at') if project else None
+    return bool(incoming and current and incoming < current)